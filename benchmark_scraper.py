@@ -2,6 +2,7 @@ import time
 import cProfile
 import pstats
 import io
+import tempfile
 from src.web_scraping import WebScraper
 from bs4 import BeautifulSoup, NavigableString, Comment
 import re
@@ -251,9 +252,10 @@ class OriginalWebScraper(WebScraper):
             
         return '\n'.join(cleaned_lines)
         
-    def save_results(self, result: dict, url: str, output_dir: str, save_json: bool = True, save_markdown: bool = True) -> tuple:
+    def save_results(self, result: dict, url: str, output_dir: str, save_json: bool = True, save_markdown: bool = True, markdown_content=None) -> tuple:
         """
         スクレイピング結果を保存します。（変更前の実装）
+        markdown_contentは無視し、従来どおりjson_dataからMarkdownを再生成します。
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         # URLを安全なファイル名に変換
@@ -550,7 +552,31 @@ def run_benchmark():
     avg_improvement = (avg_original - avg_optimized) / avg_original * 100
     print(f"平均改善率: {avg_improvement:.2f}%")
     
-    print("\n5. 結論")
+    print("\n5. save_markdown=True時のscrape_multiple_urlsの1ページあたりCPU時間")
+    print("-" * 50)
+    
+    # ネットワークの影響を除くため、fetch_htmlを固定HTMLを返すように差し替える
+    original_scraper.fetch_html = lambda url: large_html
+    optimized_scraper.fetch_html = lambda url: large_html
+    original_scraper.rate_limiter.default_delay = 0
+    optimized_scraper.rate_limiter.default_delay = 0
+    page_urls = [f"https://example.com/page{i}" for i in range(5)]
+    
+    def measure_cpu_per_page(scraper):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start_cpu = time.process_time()
+            scraper.scrape_multiple_urls(page_urls, output_dir=output_dir,
+                                         save_json=False, save_markdown=True)
+            return (time.process_time() - start_cpu) / len(page_urls)
+    
+    original_page_cpu = measure_cpu_per_page(original_scraper)
+    optimized_page_cpu = measure_cpu_per_page(optimized_scraper)
+    print(f"変更前 (Markdownを再生成): {original_page_cpu:.6f} 秒/ページ")
+    print(f"変更後 (生成済みMarkdownを再利用): {optimized_page_cpu:.6f} 秒/ページ")
+    save_improvement = (original_page_cpu - optimized_page_cpu) / original_page_cpu * 100
+    print(f"改善率: {save_improvement:.2f}%")
+    
+    print("\n6. 結論")
     print("-" * 50)
     
     if avg_improvement > 0 or regex_improvement > 0:
@@ -0,0 +1,66 @@
+import statistics
+import subprocess
+import sys
+import time
+
+# 計測対象のコード（それぞれ新しいPythonプロセスで実行する）
+IMPORT_CODE = """
+import time
+start = time.perf_counter()
+from src.web_search import WebSearch
+print(time.perf_counter() - start)
+"""
+
+CONSTRUCT_CODE = """
+import time
+from src.web_search import WebSearch
+start = time.perf_counter()
+WebSearch(default_engine="google")
+print(time.perf_counter() - start)
+"""
+
+FIRST_USE_CODE = """
+import time
+from src.web_search import WebSearch
+web_search = WebSearch()
+start = time.perf_counter()
+web_search._get_engine({engine!r})
+print(time.perf_counter() - start)
+"""
+
+def run_in_fresh_process(code, repeat=5):
+    """新しいプロセスでコードを実行し、出力された秒数を集計する"""
+    times = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if completed.returncode != 0:
+            return None, completed.stderr.strip().splitlines()[-1]
+        times.append(float(completed.stdout.strip()))
+    return times, None
+
+def report(label, times, error):
+    if error:
+        print(f"{label}: 計測できませんでした ({error})")
+        return
+    print(f"{label}: 中央値 {statistics.median(times) * 1000:.2f} ms "
+          f"(最小 {min(times) * 1000:.2f} ms, 最大 {max(times) * 1000:.2f} ms)")
+
+def run_benchmark():
+    print("WebSearchの起動時間の計測")
+    print("=" * 50)
+
+    # プロセス全体の起動時間（インタプリタの起動を含む）
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "from src.web_search import WebSearch; WebSearch()"], check=True)
+    print(f"プロセス起動からWebSearch生成まで: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    report("src.web_searchのインポート", *run_in_fresh_process(IMPORT_CODE))
+    report("WebSearch()の生成", *run_in_fresh_process(CONSTRUCT_CODE))
+
+    print("\n各エンジンの初回利用時の生成コスト")
+    print("-" * 50)
+    for engine in ["google", "bing", "duckduckgo"]:
+        report(engine, *run_in_fresh_process(FIRST_USE_CODE.format(engine=engine)))
+
+if __name__ == "__main__":
+    run_benchmark()
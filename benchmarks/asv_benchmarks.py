@@ -0,0 +1,44 @@
+"""
+asv（airspeed velocity）用のベンチマーク。リポジトリ直下のasv.conf.jsonから実行します。
+
+このリポジトリはパッケージとしてインストールしないため、現在の作業ツリーを
+現在のPython環境で計測し、結果をコミットごとに記録します。
+
+    asv run --python=same --set-commit-hash=$(git rev-parse HEAD)
+    asv publish        # 履歴をHTMLで表示
+"""
+from .corpus import load_corpus
+from .fixture_server import FixtureServer
+from .run_benchmarks import MAX_DEPTH, make_scraper
+
+PAGES = ["small-utf8", "large-utf8", "medium-shift_jis", "deep-nesting", "table-heavy"]
+
+
+class ScrapeStages:
+    params = PAGES
+    param_names = ["page"]
+
+    def setup(self, page):
+        self.server = FixtureServer(load_corpus()).start()
+        self.scraper = make_scraper()
+        self.url = self.server.url_for(page)
+        self.html = self.scraper.fetch_html(self.url)
+        self.json_data = self.scraper.html_to_json(self.html, max_depth=MAX_DEPTH)
+
+    def teardown(self, page):
+        self.server.stop()
+
+    def time_fetch(self, page):
+        self.scraper.fetch_html(self.url)
+
+    def time_parse(self, page):
+        self.scraper.html_to_json(self.html, max_depth=MAX_DEPTH)
+
+    def time_render(self, page):
+        self.scraper.json_to_markdown(self.json_data)
+
+    def time_pipeline(self, page):
+        self.scraper.scrape_url(self.url, max_depth=MAX_DEPTH)
+
+    def peakmem_pipeline(self, page):
+        self.scraper.scrape_url(self.url, max_depth=MAX_DEPTH)
@@ -0,0 +1,35 @@
+import time
+
+import pytest
+
+from .corpus import load_corpus
+from .fixture_server import FixtureServer
+from .run_benchmarks import make_scraper
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    pytest_benchmark = None
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    with FixtureServer(load_corpus()) as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def scraper():
+    return make_scraper()
+
+
+if pytest_benchmark is None:
+    # pytest-benchmarkがない環境でもベンチマークを通常のテストとして1回ずつ実行できるようにする
+    @pytest.fixture
+    def benchmark():
+        def run(func, *args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            run.elapsed = time.perf_counter() - start
+            return result
+        return run
@@ -0,0 +1,140 @@
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import List, Optional
+
+# 録画したページを置くディレクトリ（manifest.jsonと各HTMLファイル）
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+JAPANESE_WORDS = ["検索", "結果", "情報", "記事", "東京", "天気", "ニュース", "技術", "開発", "日本語",
+                  "ページ", "データ", "解析", "高速化", "処理", "説明", "概要", "関連", "最新", "更新"]
+ENGLISH_WORDS = ["search", "result", "python", "scraping", "latency", "throughput", "parser",
+                 "markdown", "engine", "benchmark", "cache", "request", "response", "server"]
+
+
+@dataclass
+class CorpusPage:
+    """
+    フィクスチャサーバーが配信する1ページ。
+
+    Attributes:
+        name (str): ページ名（URLのパスに使用）
+        body (bytes): レスポンスボディ
+        content_type (str): Content-Typeヘッダーの値
+    """
+    name: str
+    body: bytes
+    content_type: str
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+def load_corpus(corpus_dir: Optional[str] = None) -> List[CorpusPage]:
+    """
+    ベンチマーク用のコーパスを読み込みます。
+
+    corpus_dirにmanifest.jsonがある場合は録画したページを読み込み、
+    ない場合はgenerate_corpusで生成したページを返します。
+    manifest.jsonの形式: [{"name": "...", "file": "...", "content_type": "..."}, ...]
+
+    Args:
+        corpus_dir (str, optional): コーパスのディレクトリ。デフォルトはbenchmarks/corpus
+
+    Returns:
+        List[CorpusPage]: ページのリスト
+    """
+    corpus_dir = corpus_dir or DEFAULT_CORPUS_DIR
+    manifest_path = os.path.join(corpus_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return generate_corpus()
+
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    pages = []
+    for entry in manifest:
+        with open(os.path.join(corpus_dir, entry["file"]), "rb") as f:
+            pages.append(CorpusPage(entry["name"], f.read(), entry.get("content_type", "text/html")))
+    return pages
+
+
+def generate_corpus(seed: int = 0) -> List[CorpusPage]:
+    """
+    実際のWebページに近い構造のページを決定的に生成します。
+
+    サイズ（数KB〜数百KB）、エンコーディング（UTF-8、Shift_JIS、EUC-JP、
+    charset指定なし）、入れ子の深さの異なるページを含みます。
+
+    Args:
+        seed (int): 乱数のシード
+
+    Returns:
+        List[CorpusPage]: ページのリスト
+    """
+    rng = random.Random(seed)
+    specs = [
+        # (ページ名, 段落数, 入れ子の深さ, エンコーディング, Content-Typeにcharsetを含めるか)
+        ("small-utf8", 10, 2, "utf-8", True),
+        ("medium-utf8", 150, 4, "utf-8", True),
+        ("large-utf8", 1000, 4, "utf-8", True),
+        ("medium-shift_jis", 150, 4, "shift_jis", True),
+        ("medium-euc-jp", 150, 4, "euc-jp", True),
+        ("medium-no-charset", 150, 4, "utf-8", False),
+        ("deep-nesting", 50, 200, "utf-8", True),
+        ("table-heavy", 40, 3, "utf-8", True),
+    ]
+    pages = []
+    for name, paragraphs, depth, encoding, declare_charset in specs:
+        html = _generate_page(rng, name, paragraphs, depth, tables=name == "table-heavy")
+        content_type = f"text/html; charset={encoding}" if declare_charset else "text/html"
+        pages.append(CorpusPage(name, html.encode(encoding), content_type))
+    return pages
+
+
+def _sentence(rng, min_words=8, max_words=30):
+    words = []
+    for _ in range(rng.randint(min_words, max_words)):
+        words.append(rng.choice(JAPANESE_WORDS if rng.random() < 0.6 else ENGLISH_WORDS))
+    return " ".join(words) + "。"
+
+
+def _generate_page(rng, name, paragraphs, depth, tables=False):
+    parts = [
+        "<!DOCTYPE html><html><head>",
+        f"<title>{name}</title>",
+        '<meta name="viewport" content="width=device-width">',
+        '<link rel="stylesheet" href="/static/site.css">',
+        "<style>body { font-family: sans-serif; } .ad { display: none; }</style>",
+        '<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>',
+        '<script type="application/ld+json">{"@type": "Article", "headline": "benchmark"}</script>',
+        "</head><body>",
+        '<header><nav><ul>',
+    ]
+    for i in range(20):
+        parts.append(f'<li><a href="/section/{i}">{rng.choice(JAPANESE_WORDS)}</a></li>')
+    parts.append("</ul></nav></header>")
+    parts.append("<div class=\"wrapper\">" * depth)
+    parts.append("<main><article>")
+    parts.append(f"<h1>{_sentence(rng, 3, 6)}</h1>")
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"<h2>{_sentence(rng, 2, 5)}</h2>")
+        parts.append(f"<p>{_sentence(rng)} <a href=\"https://example.com/{i}\">{_sentence(rng, 1, 3)}</a> "
+                     f"<strong>{_sentence(rng, 1, 4)}</strong></p>")
+        if i % 15 == 7:
+            parts.append("<ul>" + "".join(f"<li>{_sentence(rng, 2, 8)}</li>" for _ in range(5)) + "</ul>")
+        if tables and i % 2 == 0:
+            parts.append("<table><tr><th>項目</th><th>値</th><th>備考</th></tr>")
+            for row in range(20):
+                parts.append(f"<tr><td>{rng.choice(JAPANESE_WORDS)}</td><td>{row}</td>"
+                             f"<td>{_sentence(rng, 1, 4)}</td></tr>")
+            parts.append("</table>")
+        if i % 25 == 12:
+            parts.append('<div class="ad"><iframe src="https://ads.example.com/"></iframe></div>')
+            parts.append("<!-- 広告枠 -->")
+    parts.append("</article></main>")
+    parts.append("</div>" * depth)
+    parts.append("<footer><p>&copy; 2024 Example</p></footer></body></html>")
+    return "\n".join(parts)
@@ -0,0 +1,89 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List
+
+from .corpus import CorpusPage
+
+
+class FixtureServer:
+    """
+    コーパスのページを配信するローカルHTTPサーバー。
+
+    ベンチマークを外部サイトやネットワークの状態に左右されずに再現できるよう、
+    127.0.0.1の空いているポートで別スレッドとして起動します。
+
+    使用例:
+        with FixtureServer(load_corpus()) as server:
+            scraper.fetch_html(server.url_for("medium-utf8"))
+    """
+
+    def __init__(self, pages: Iterable[CorpusPage], latency: float = 0.0):
+        """
+        Args:
+            pages (Iterable[CorpusPage]): 配信するページ
+            latency (float): 各レスポンスの前に待機する秒数（ネットワーク遅延の模擬）
+        """
+        self.pages: Dict[str, CorpusPage] = {page.name: page for page in pages}
+        self.latency = latency
+        self._server = None
+        self._thread = None
+
+    def start(self) -> "FixtureServer":
+        """サーバーを起動します"""
+        pages = self.pages
+        latency = self.latency
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # ヘッダーと本文を別々に書き込むため、Nagleアルゴリズムによる遅延を避ける
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                page = pages.get(self.path.rsplit("/", 1)[-1])
+                if latency:
+                    time.sleep(latency)
+                if page is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", page.content_type)
+                self.send_header("Content-Length", str(page.size))
+                self.end_headers()
+                self.wfile.write(page.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止します"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, name: str) -> str:
+        """ページ名に対応するURLを返す"""
+        return f"{self.base_url}/pages/{name}"
+
+    def urls(self) -> List[str]:
+        """すべてのページのURLを返す"""
+        return [self.url_for(name) for name in self.pages]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
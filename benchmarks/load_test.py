@@ -0,0 +1,123 @@
+"""
+モックサーバーに対するWebSearchの負荷試験。
+
+WebSearch.search_batchでクエリを並行して送信し、達成したQPS、検索1件あたりの
+レイテンシ（p50/p95/p99）、失敗・空の結果の件数、サーバー側で受信したリクエスト数
+（ページ分割やリトライによる増幅）を計測します。
+
+使用例:
+    python -m benchmarks.load_test --engine bing --queries 500 --concurrency 16 \\
+        --latency-median 0.05 --rate-limit-rate 0.02
+"""
+import argparse
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.bing_web_search import BingWebSearch
+from src.duckduckgo_instant_answer import DuckDuckGoInstantAnswer
+from src.google_custom_search import GoogleCustomSearch
+from src.instrumentation import CallbackHook, Instrumentation
+from src.web_search import WebSearch
+
+from .mock_search_server import MockSearchServer, fixed_latency, lognormal_latency
+from .run_benchmarks import percentile
+
+
+def mock_web_search(base_url: str, instrumentation: Optional[Instrumentation] = None) -> WebSearch:
+    """すべてのエンジンの接続先をモックサーバーに向けたWebSearchを作成する"""
+    web_search = WebSearch(instrumentation=instrumentation)
+    web_search.register_engine("google", lambda: GoogleCustomSearch(api_key="mock", cse_id="mock",
+                                                                    base_url=base_url))
+    web_search.register_engine("bing", lambda: BingWebSearch(api_key="mock", base_url=base_url))
+    web_search.register_engine("duckduckgo", lambda: DuckDuckGoInstantAnswer(base_url=base_url))
+    return web_search
+
+
+def run_load_test(server: MockSearchServer, engine: str, queries: List[str], concurrency: int,
+                  qps: float = 0, max_results: int = 10) -> Dict[str, float]:
+    """
+    search_batchでqueriesを検索し、負荷試験の結果を返します。
+
+    Args:
+        server (MockSearchServer): 起動済みのモックサーバー
+        engine (str): エンジン名
+        queries (List[str]): 検索クエリ
+        concurrency (int): 同時実行数
+        qps (float): クライアント側のQPS制限（0の場合は制限しない）
+        max_results (int): 1クエリあたりの取得件数
+
+    Returns:
+        Dict[str, float]: 計測結果
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def on_stage(name, duration, attributes, error):
+        if name == "search":
+            with lock:
+                latencies.append(duration)
+
+    web_search = mock_web_search(server.base_url, Instrumentation([CallbackHook(on_stage)]))
+    server.reset_stats()
+
+    failed = empty = 0
+    start = time.perf_counter()
+    for item in web_search.search_batch(queries, engine=engine, concurrency=concurrency, qps=qps,
+                                        daily_quota=len(queries), max_results=max_results):
+        if item["error"]:
+            failed += 1
+        elif not item["results"]:
+            # Google Custom Searchはエラーを握りつぶして空の結果を返す
+            empty += 1
+    wall = time.perf_counter() - start
+
+    server_stats = server.stats().get(engine, {})
+    server_requests = sum(server_stats.values())
+    return {
+        "queries": len(queries),
+        "qps": len(queries) / wall if wall > 0 else float("inf"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "failed": failed,
+        "empty": empty,
+        "server_requests": server_requests,
+        "server_429": server_stats.get(429, 0),
+        "server_500": server_stats.get(500, 0),
+        # 1を超える分はページ分割やリトライによる追加のリクエスト
+        "requests_per_query": server_requests / len(queries) if queries else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="モック検索サーバーに対するWebSearchの負荷試験")
+    parser.add_argument("--engine", choices=["google", "bing", "duckduckgo"], default="bing")
+    parser.add_argument("--queries", type=int, default=200, help="送信するクエリ数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同時実行数")
+    parser.add_argument("--qps", type=float, default=0, help="クライアント側のQPS制限（0は制限なし）")
+    parser.add_argument("--max-results", type=int, default=10, help="1クエリあたりの取得件数")
+    parser.add_argument("--latency-median", type=float, default=0.05, help="応答遅延の中央値（秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.5,
+                        help="応答遅延の対数正規分布のsigma（0の場合は固定遅延）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500を返す割合")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429を返す割合")
+    parser.add_argument("--server-qps-limit", type=float, help="サーバー側のQPS上限（超過分は429）")
+    args = parser.parse_args(argv)
+
+    if args.latency_sigma > 0:
+        latency = lognormal_latency(args.latency_median, args.latency_sigma)
+    else:
+        latency = fixed_latency(args.latency_median)
+    queries = [f"負荷試験 クエリ{i}" for i in range(args.queries)]
+
+    with MockSearchServer(latency=latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                          qps_limit=args.server_qps_limit) as server:
+        result = run_load_test(server, args.engine, queries, args.concurrency, args.qps, args.max_results)
+
+    for key, value in result.items():
+        print(f"{key:<20}{value:>12.2f}" if isinstance(value, float) else f"{key:<20}{value:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Google Custom Search、Bing Web Search v7、DuckDuckGo Instant Answer APIの
+レスポンス形式を模擬するローカルのモックサーバー。
+
+各エンジンのbase_urlにserver.base_urlを指定すると、クォータを消費せずに
+WebSearch全体の負荷試験を行えます。
+
+    with MockSearchServer(latency=lognormal_latency(0.05), rate_limit_rate=0.05) as server:
+        engine = BingWebSearch(api_key="dummy", base_url=server.base_url)
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# 乱数生成器を受け取り、応答までの待機秒数を返す関数
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def fixed_latency(seconds: float) -> LatencyDistribution:
+    """常に同じ秒数だけ待機する"""
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> LatencyDistribution:
+    """low〜highの一様分布"""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> LatencyDistribution:
+    """中央値median、対数の標準偏差sigmaの対数正規分布（裾の長い実際のAPIに近い分布）"""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class MockSearchServer:
+    """
+    検索APIのモックサーバー。
+
+    パス:
+        /customsearch/v1  Google Custom Search JSON API
+        /v7.0/search      Bing Web Search API v7
+        /                 DuckDuckGo Instant Answer API（format=json）
+
+    遅延の分布、エラー（500）の割合、429の割合、QPSの上限（超過分は429）を設定できます。
+    stats()でエンジンごとの受信数と返したエラーの数を確認できます。
+    """
+
+    def __init__(self, latency: Optional[LatencyDistribution] = None, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, qps_limit: Optional[float] = None,
+                 total_results: int = 1000, seed: int = 0):
+        """
+        Args:
+            latency (LatencyDistribution, optional): 応答遅延の分布。指定がない場合は遅延なし
+            error_rate (float): 500 Internal Server Errorを返す割合（0〜1）
+            rate_limit_rate (float): 429 Too Many Requestsを返す割合（0〜1）
+            qps_limit (float, optional): エンジンごとの1秒あたりの最大リクエスト数。超過分には429を返す
+            total_results (int): 検索結果の総数
+            seed (int): 乱数のシード
+        """
+        self.latency = latency or fixed_latency(0.0)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.qps_limit = qps_limit
+        self.total_results = total_results
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = Counter()  # (エンジン名, ステータスコード) -> 件数
+        self._window = {}  # エンジン名 -> (秒, その秒のリクエスト数)
+        self._server = None
+        self._thread = None
+
+    def _decide(self, engine: str):
+        """リクエストごとの遅延と返すステータスコードを決める"""
+        with self._lock:
+            delay = max(self.latency(self._rng), 0.0)
+            status = 200
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                status = 429
+            elif roll < self.rate_limit_rate + self.error_rate:
+                status = 500
+            if self.qps_limit is not None and status == 200:
+                second = int(time.monotonic())
+                window_second, count = self._window.get(engine, (second, 0))
+                if window_second != second:
+                    count = 0
+                count += 1
+                self._window[engine] = (second, count)
+                if count > self.qps_limit:
+                    status = 429
+            self._counts[(engine, status)] += 1
+        return delay, status
+
+    def stats(self) -> Dict[str, Dict[int, int]]:
+        """エンジンごとのステータスコード別の受信数を返す"""
+        with self._lock:
+            result = {}
+            for (engine, status), count in self._counts.items():
+                result.setdefault(engine, {})[status] = count
+            return result
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def start(self) -> "MockSearchServer":
+        """サーバーを起動します"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                if parsed.path.endswith("/customsearch/v1"):
+                    engine, build = "google", server._google_response
+                elif parsed.path.endswith("/v7.0/search"):
+                    engine, build = "bing", server._bing_response
+                elif parsed.path == "/" and params.get("format") == "json":
+                    engine, build = "duckduckgo", server._duckduckgo_response
+                else:
+                    self._send(404, {"error": "not found"})
+                    return
+
+                delay, status = server._decide(engine)
+                if delay:
+                    time.sleep(delay)
+                if status == 429:
+                    self._send(429, {"error": {"code": 429, "message": "Rate limit exceeded"}},
+                               {"Retry-After": "1"})
+                elif status == 500:
+                    self._send(500, {"error": {"code": 500, "message": "Backend error"}})
+                else:
+                    self._send(200, build(params))
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止します"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _results(self, query, offset, count):
+        end = min(offset + count, self.total_results)
+        for rank in range(offset + 1, end + 1):
+            yield rank, {
+                "title": f"{query} - 結果{rank}",
+                "url": f"https://example.com/{rank}?q={query}",
+                "snippet": f"{query}に関する{rank}番目の検索結果の抜粋です。",
+            }
+
+    def _google_response(self, params):
+        start = int(params.get("start", 1))
+        num = int(params.get("num", 10))
+        return {
+            "kind": "customsearch#search",
+            "searchInformation": {"totalResults": str(self.total_results)},
+            "items": [
+                {"kind": "customsearch#result", "title": item["title"], "link": item["url"],
+                 "snippet": item["snippet"]}
+                for _, item in self._results(params.get("q", ""), start - 1, num)
+            ],
+        }
+
+    def _bing_response(self, params):
+        query = params.get("q", "")
+        count = int(params.get("count", 10))
+        offset = int(params.get("offset", 0))
+        sections = params.get("responseFilter", "Webpages").lower().split(",")
+        response = {"_type": "SearchResponse", "queryContext": {"originalQuery": query}}
+        results = list(self._results(query, offset, count))
+        if "webpages" in sections:
+            response["webPages"] = {
+                "totalEstimatedMatches": self.total_results,
+                "value": [{"name": item["title"], "url": item["url"], "snippet": item["snippet"]}
+                          for _, item in results],
+            }
+        if "news" in sections:
+            response["news"] = {"value": [
+                {"name": item["title"], "url": item["url"], "description": item["snippet"],
+                 "provider": [{"name": "Example News"}], "datePublished": "2024-01-01T00:00:00Z"}
+                for _, item in results
+            ]}
+        if "images" in sections:
+            response["images"] = {"value": [
+                {"name": item["title"], "contentUrl": f"https://example.com/{rank}.jpg",
+                 "thumbnailUrl": f"https://example.com/{rank}_thumb.jpg", "hostPageUrl": item["url"],
+                 "width": 640, "height": 480}
+                for rank, item in results
+            ]}
+        if "videos" in sections:
+            response["videos"] = {"value": [
+                {"name": item["title"], "contentUrl": f"https://example.com/{rank}.mp4",
+                 "thumbnailUrl": f"https://example.com/{rank}_thumb.jpg", "hostPageUrl": item["url"],
+                 "duration": "PT1M", "publisher": [{"name": "Example"}]}
+                for rank, item in results
+            ]}
+        return response
+
+    def _duckduckgo_response(self, params):
+        query = params.get("q", "")
+        return {
+            "Heading": query,
+            "AbstractText": f"{query}の概要です。",
+            "AbstractURL": f"https://example.com/abstract?q={query}",
+            "RelatedTopics": [
+                {"Text": f"{item['title']} - {item['snippet']}", "FirstURL": item["url"]}
+                for _, item in self._results(query, 0, 20)
+            ],
+        }
@@ -0,0 +1,277 @@
+"""
+オフラインで再現可能なスクレイピングのベンチマーク。
+
+ローカルのフィクスチャサーバーが配信するコーパスに対して、取得（fetch）・解析（parse）・
+Markdown変換（render）・一連の処理（pipeline）のスループット、レイテンシ（p50/p99）、
+ピークRSSを計測し、結果を履歴ファイルに追記します。
+
+使用例:
+    python -m benchmarks.run_benchmarks --iterations 5 --concurrency 8
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.http_transport import TRANSPORTS, httpx
+from src.web_scraping import WebScraper
+
+from .corpus import load_corpus
+from .fixture_server import FixtureServer
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(__file__), "results", "history.jsonl")
+# scrape_multiple_urlsのデフォルトと同じ深さで解析する
+MAX_DEPTH = 20
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """最近傍法でパーセンタイルを求める（qは0〜100）"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def reset_peak_rss() -> bool:
+    """Linuxでプロセスのピーク常駐メモリ（VmHWM）をリセットする。リセットできた場合はTrue"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """プロセスのピーク常駐メモリ（バイト）を返す。取得できない場合はNone"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOSはバイト、Linuxはキロバイト単位
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def measure(operation: Callable[[object], object], items: Sequence[object], iterations: int = 1,
+            concurrency: int = 1) -> Dict[str, float]:
+    """
+    itemsの各要素にoperationを適用し、スループットとレイテンシを計測します。
+
+    Args:
+        operation (Callable): 1件を処理する関数
+        items (Sequence): 処理対象
+        iterations (int): itemsを繰り返す回数
+        concurrency (int): 同時に処理するスレッド数
+
+    Returns:
+        Dict[str, float]: pages, pages_per_second, p50_ms, p99_ms, peak_rss_bytes
+    """
+    workload = list(items) * iterations
+    latencies = []
+    lock = threading.Lock()
+
+    def run(item):
+        start = time.perf_counter()
+        operation(item)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    rss_reset = reset_peak_rss()
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run, workload))
+    else:
+        for item in workload:
+            run(item)
+    wall = time.perf_counter() - start
+
+    return {
+        "pages": len(workload),
+        "pages_per_second": len(workload) / wall if wall > 0 else float("inf"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        # リセットできない環境ではプロセス開始以降のピークになる
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_rss_is_process_lifetime": not rss_reset,
+    }
+
+
+def make_scraper(transport: str = "requests") -> WebScraper:
+    scraper = WebScraper(transport=transport)
+    scraper.rate_limiter.default_delay = 0
+    scraper.max_retries = 1
+    return scraper
+
+
+def thread_local_scraper(scraper: WebScraper) -> Callable[[], WebScraper]:
+    """スレッドごとに浅いコピーのWebScraperを返す関数を作成する（scrape_urlは除外設定を書き換えるため）"""
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, "scraper"):
+            local.scraper = copy.copy(scraper)
+        return local.scraper
+    return get
+
+
+def run_suite(corpus_dir: Optional[str] = None, iterations: int = 3, concurrency: int = 8,
+              latency: float = 0.0) -> Dict[str, Dict[str, float]]:
+    """
+    すべてのステージのベンチマークを実行します。
+
+    Args:
+        corpus_dir (str, optional): コーパスのディレクトリ
+        iterations (int): コーパスを繰り返す回数
+        concurrency (int): 並列モードのスレッド数
+        latency (float): フィクスチャサーバーの応答遅延（秒）
+
+    Returns:
+        Dict[str, Dict[str, float]]: ステージ名をキーとする計測結果
+    """
+    pages = load_corpus(corpus_dir)
+    scraper = make_scraper()
+    results = {}
+
+    with FixtureServer(pages, latency=latency) as server:
+        urls = server.urls()
+        html_pages = [scraper.fetch_html(url) for url in urls]
+        json_pages = [scraper.html_to_json(html, max_depth=MAX_DEPTH) for html in html_pages]
+
+        results["fetch"] = measure(scraper.fetch_html, urls, iterations)
+        results["parse"] = measure(lambda html: scraper.html_to_json(html, max_depth=MAX_DEPTH),
+                                   html_pages, iterations)
+        results["render"] = measure(scraper.json_to_markdown, json_pages, iterations)
+        results["pipeline"] = measure(lambda url: scraper.scrape_url(url, max_depth=MAX_DEPTH), urls, iterations)
+
+        get_scraper = thread_local_scraper(scraper)
+        results[f"fetch_concurrent_{concurrency}"] = measure(
+            lambda url: get_scraper().fetch_html(url), urls, iterations, concurrency)
+        results[f"pipeline_concurrent_{concurrency}"] = measure(
+            lambda url: get_scraper().scrape_url(url, max_depth=MAX_DEPTH), urls, iterations, concurrency)
+    return results
+
+
+def available_transports() -> List[str]:
+    """インストール済みの依存関係で利用できるtransport"""
+    return [transport for transport in TRANSPORTS if transport != "httpx" or httpx is not None]
+
+
+def run_transport_comparison(corpus_dir: Optional[str] = None, iterations: int = 3, concurrency: int = 8,
+                             latency: float = 0.0, transports: Optional[Sequence[str]] = None
+                             ) -> Dict[str, Dict[str, float]]:
+    """
+    transportごとに取得の逐次・並列のスループットとレイテンシを計測します。
+
+    フィクスチャサーバーは平文のHTTP/1.1のため、ここでの比較はクライアントの実装と接続プールの差に
+    なります。HTTP/2の多重化の効果はTLSとh2に対応したサーバーに対してWebScraper(transport="httpx")で
+    計測してください。
+
+    Args:
+        corpus_dir (str, optional): コーパスのディレクトリ
+        iterations (int): コーパスを繰り返す回数
+        concurrency (int): 並列モードのスレッド数
+        latency (float): フィクスチャサーバーの応答遅延（秒）
+        transports (Sequence[str], optional): 比較するtransport。指定がない場合は利用可能なすべて
+
+    Returns:
+        Dict[str, Dict[str, float]]: "fetch_<transport>"などをキーとする計測結果
+    """
+    pages = load_corpus(corpus_dir)
+    results = {}
+    with FixtureServer(pages, latency=latency) as server:
+        urls = server.urls()
+        for transport in transports or available_transports():
+            scraper = make_scraper(transport)
+            # 接続の確立を計測に含めないよう、先に1回ずつ取得しておく
+            for url in urls:
+                scraper.fetch_html(url)
+            results[f"fetch_{transport}"] = measure(scraper.fetch_html, urls, iterations)
+            # httpxのクライアントはスレッド間で共有し、同じオリジンへの接続をまとめる
+            get_scraper = thread_local_scraper(scraper)
+            results[f"fetch_{transport}_concurrent_{concurrency}"] = measure(
+                lambda url: get_scraper().fetch_html(url), urls, iterations, concurrency)
+            scraper.session.close()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(results: Dict[str, Dict[str, float]], history_path: str, settings: dict) -> None:
+    """計測結果をコミット・環境の情報とともに履歴ファイル（JSON Lines）に追記する"""
+    os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    width = max([24] + [len(stage) + 2 for stage in results])
+    print(f"{'stage':<{width}}{'pages':>8}{'pages/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MB':>14}")
+    print("-" * (width + 54))
+    for stage, values in results.items():
+        rss = values["peak_rss_bytes"]
+        rss_text = f"{rss / 1024 / 1024:.1f}" if rss is not None else "-"
+        print(f"{stage:<{width}}{values['pages']:>8}{values['pages_per_second']:>12.1f}"
+              f"{values['p50_ms']:>10.2f}{values['p99_ms']:>10.2f}{rss_text:>14}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="オフラインのスクレイピングベンチマーク")
+    parser.add_argument("--corpus-dir", help="録画したページのディレクトリ（manifest.jsonを含む）")
+    parser.add_argument("--iterations", type=int, default=3, help="コーパスを繰り返す回数")
+    parser.add_argument("--concurrency", type=int, default=8, help="並列モードのスレッド数")
+    parser.add_argument("--latency", type=float, default=0.0, help="フィクスチャサーバーの応答遅延（秒）")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="結果を追記する履歴ファイル")
+    parser.add_argument("--no-history", action="store_true", help="履歴ファイルに記録しない")
+    parser.add_argument("--compare-transports", action="store_true",
+                        help="全ステージの代わりにtransport（requests/httpx）ごとの取得を比較する")
+    args = parser.parse_args(argv)
+
+    if args.compare_transports:
+        results = run_transport_comparison(args.corpus_dir, args.iterations, args.concurrency, args.latency)
+    else:
+        results = run_suite(args.corpus_dir, args.iterations, args.concurrency, args.latency)
+    print_results(results)
+    if not args.no_history:
+        append_history(results, args.history, {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "corpus_dir": args.corpus_dir,
+            "compare_transports": args.compare_transports,
+        })
+        print(f"\n結果を{args.history}に追記しました")
+
+
+if __name__ == "__main__":
+    main()
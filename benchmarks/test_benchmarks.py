@@ -0,0 +1,62 @@
+"""
+pytest-benchmark用のベンチマーク。
+
+    pytest benchmarks --benchmark-autosave   # 結果を.benchmarks/に保存
+    pytest-benchmark compare                 # 保存済みの結果と比較
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .run_benchmarks import MAX_DEPTH, available_transports, make_scraper, thread_local_scraper
+
+PAGES = ["small-utf8", "large-utf8", "medium-shift_jis", "medium-no-charset", "deep-nesting", "table-heavy"]
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_fetch(benchmark, fixture_server, scraper, page):
+    html = benchmark(scraper.fetch_html, fixture_server.url_for(page))
+    assert html
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_parse(benchmark, fixture_server, scraper, page):
+    html = scraper.fetch_html(fixture_server.url_for(page))
+    json_data = benchmark(scraper.html_to_json, html, max_depth=MAX_DEPTH)
+    assert json_data
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_render(benchmark, fixture_server, scraper, page):
+    json_data = scraper.html_to_json(scraper.fetch_html(fixture_server.url_for(page)), max_depth=MAX_DEPTH)
+    markdown = benchmark(scraper.json_to_markdown, json_data)
+    assert isinstance(markdown, str)
+
+
+def test_pipeline_concurrent(benchmark, fixture_server, scraper):
+    get_scraper = thread_local_scraper(scraper)
+    urls = fixture_server.urls()
+
+    def scrape_all():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(lambda url: get_scraper().scrape_url(url, max_depth=MAX_DEPTH), urls))
+
+    results = benchmark(scrape_all)
+    assert all(result is not None for result in results)
+
+
+@pytest.mark.parametrize("transport", ["requests", "httpx"])
+def test_fetch_concurrent_by_transport(benchmark, fixture_server, transport):
+    if transport not in available_transports():
+        pytest.skip(f"{transport}がインストールされていません")
+    scraper = make_scraper(transport)
+    get_scraper = thread_local_scraper(scraper)
+    urls = fixture_server.urls() * 4
+
+    def fetch_all():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(lambda url: get_scraper().fetch_html(url), urls))
+
+    results = benchmark(fetch_all)
+    scraper.session.close()
+    assert all(results)
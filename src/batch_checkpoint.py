@@ -0,0 +1,93 @@
+import json
+import os
+from collections import Counter
+from datetime import date
+from typing import Optional
+
+
+class BatchCheckpoint:
+    """
+    search_batchの進捗を追記型のJSON Linesファイルに記録するクラス。
+
+    1行に1件のクォータの予約、またはクエリの実行記録を書き込むため、数万件のバッチでも
+    ファイル全体を書き直す必要がありません。中断後に同じファイルを指定すると、完了済みの
+    クエリを読み飛ばし、当日のクォータ消費量（実行中に中断したリクエストを含む）も引き継ぎます。
+    """
+
+    def __init__(self, file_path: Optional[str] = None):
+        """
+        Args:
+            file_path (Optional[str]): チェックポイントファイルのパス。Noneの場合は記録しない
+        """
+        self.file_path = file_path
+        self.completed = set()
+        self.usage = Counter()  # (エンジン名, 日付) -> リクエスト数
+        self._fp = None
+
+        if file_path and os.path.exists(file_path):
+            self._load()
+        if file_path:
+            self._fp = open(file_path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断時に書きかけになった最終行は無視する
+                    continue
+                if "reserved" in record:
+                    self.usage[(record["engine"], record["date"])] += record["reserved"]
+                elif record.get("ok"):
+                    self.completed.add((record["engine"], record["query"]))
+
+    def is_completed(self, engine: str, query: str) -> bool:
+        """クエリが完了済みかどうかを返す"""
+        return (engine, query) in self.completed
+
+    def used_today(self, engine: str) -> int:
+        """エンジンの当日のリクエスト数を返す"""
+        return self.usage[(engine, date.today().isoformat())]
+
+    def reserve(self, engine: str, requests: int = 1) -> None:
+        """
+        リクエストの送信前にクォータの消費を記録します。
+        完了を待たずにファイルへ書き込むため、実行中に中断したリクエストも再開時に消費量に含まれます。
+
+        Args:
+            engine (str): エンジン名
+            requests (int): 送信するAPIリクエストの数
+        """
+        today = date.today().isoformat()
+        self.usage[(engine, today)] += requests
+        self._write({"engine": engine, "date": today, "reserved": requests})
+
+    def record(self, engine: str, query: str, ok: bool) -> None:
+        """
+        クエリの実行結果を記録します。
+
+        Args:
+            engine (str): エンジン名
+            query (str): 検索クエリ
+            ok (bool): 成功したかどうか。失敗したクエリは再開時に再実行される
+        """
+        if ok:
+            self.completed.add((engine, query))
+        self._write({
+            "engine": engine,
+            "query": query,
+            "date": date.today().isoformat(),
+            "ok": ok
+        })
+
+    def _write(self, record: dict) -> None:
+        if self._fp is not None:
+            self._fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._fp.flush()
+
+    def close(self) -> None:
+        """ファイルを閉じます"""
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
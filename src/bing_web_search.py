@@ -1,28 +1,138 @@
 import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
 import requests
 from dotenv import load_dotenv
+from src.search_engine import SearchEngine, EngineCapabilities
 
-class BingWebSearch:
+@dataclass(frozen=True)
+class BingWebPage:
+    title: str
+    link: str
+    snippet: str
+
+@dataclass(frozen=True)
+class BingNewsArticle:
+    title: str
+    link: str
+    snippet: str
+    provider: Optional[str]
+    date_published: Optional[str]
+
+@dataclass(frozen=True)
+class BingImage:
+    title: str
+    link: str
+    thumbnail_url: Optional[str]
+    host_page_url: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+
+@dataclass(frozen=True)
+class BingVideo:
+    title: str
+    link: str
+    thumbnail_url: Optional[str]
+    host_page_url: Optional[str]
+    duration: Optional[str]
+    publisher: Optional[str]
+
+def _first_name(values):
+    return values[0].get("name") if values else None
+
+# セクション名と、その要素を型付きの結果に変換する関数
+SECTION_PARSERS = {
+    "webPages": lambda item: BingWebPage(
+        title=item.get("name", ""),
+        link=item.get("url", ""),
+        snippet=item.get("snippet", ""),
+    ),
+    "news": lambda item: BingNewsArticle(
+        title=item.get("name", ""),
+        link=item.get("url", ""),
+        snippet=item.get("description", ""),
+        provider=_first_name(item.get("provider")),
+        date_published=item.get("datePublished"),
+    ),
+    "images": lambda item: BingImage(
+        title=item.get("name", ""),
+        link=item.get("contentUrl", ""),
+        thumbnail_url=item.get("thumbnailUrl"),
+        host_page_url=item.get("hostPageUrl"),
+        width=item.get("width"),
+        height=item.get("height"),
+    ),
+    "videos": lambda item: BingVideo(
+        title=item.get("name", ""),
+        link=item.get("contentUrl", ""),
+        thumbnail_url=item.get("thumbnailUrl"),
+        host_page_url=item.get("hostPageUrl"),
+        duration=item.get("duration"),
+        publisher=_first_name(item.get("publisher")),
+    ),
+}
+
+class BingWebSearch(SearchEngine):
     BASE_URL = "https://api.bing.microsoft.com/v7.0/search"
+    SEARCH_PATH = "/v7.0/search"
 
-    def __init__(self, api_key=None):
+    # セクション名とresponseFilterの値の対応
+    SECTION_FILTERS = {
+        "webPages": "Webpages",
+        "news": "News",
+        "images": "Images",
+        "videos": "Videos",
+    }
+    # normalizeはwebPagesしか使わないため、デフォルトではそれ以外の回答を要求しない
+    DEFAULT_SECTIONS = ("webPages",)
+
+    name = "bing"
+    # 1リクエスト最大50件、S1プランは1000トランザクションあたり約15USD
+    CAPABILITIES = EngineCapabilities(
+        max_concurrency=3,
+        qps=3,
+        cost_per_query=0.015,
+        max_results_per_request=50,
+    )
+
+    def __init__(self, api_key=None, base_url=None):
+        """
+        Args:
+            api_key (str, optional): APIキー。指定がない場合は環境変数BING_API_KEY
+            base_url (str, optional): APIの接続先（例: "http://127.0.0.1:8000"）。
+                                      ローカルのモックサーバーを使用する場合に指定する
+        """
         load_dotenv()
         self.api_key = api_key or os.getenv("BING_API_KEY")
+        self.endpoint = base_url.rstrip("/") + self.SEARCH_PATH if base_url else self.BASE_URL
 
         if not self.api_key:
             raise ValueError("Bing API key is required")
 
-    def search(self, query, **params):
+    def search(self, query, max_results=None, sections=DEFAULT_SECTIONS, **params):
         """
         Bing Web Search APIを使用して検索を実行します
         
         Args:
             query (str): 検索クエリ
-            **params: その他の検索パラメータ（mkt, count等）
+            max_results (int, optional): 取得件数。countが指定されていない場合にcountとして使用
+            sections (Sequence[str], optional): 取得するセクション（"webPages", "news", "images", "videos"）。
+                                                responseFilterとanswerCountに変換される。
+                                                Noneの場合はすべての回答を含む完全なレスポンスを取得する
+            **params: その他の検索パラメータ（mkt, count, responseFilter等）
             
         Returns:
             dict: 検索結果
         """
+        if max_results is not None:
+            params.setdefault("count", max_results)
+        if sections and "responseFilter" not in params:
+            unknown = [section for section in sections if section not in self.SECTION_FILTERS]
+            if unknown:
+                raise ValueError("Invalid sections. Choose from: " + ", ".join(self.SECTION_FILTERS.keys()))
+            params["responseFilter"] = ",".join(self.SECTION_FILTERS[section] for section in sections)
+            params.setdefault("answerCount", len(sections))
+
         headers = {
             "Ocp-Apim-Subscription-Key": self.api_key
         }
@@ -32,6 +142,40 @@ class BingWebSearch:
             **params
         }
 
-        response = requests.get(self.BASE_URL, headers=headers, params=search_params)
+        response = requests.get(self.endpoint, headers=headers, params=search_params)
         response.raise_for_status()
-        return response.json() 
\ No newline at end of file
+        return response.json()
+
+    def normalize(self, results):
+        """検索結果を標準化された形式に変換します"""
+        standardized_results = []
+        for item in results.get("webPages", {}).get("value", []):
+            standardized_results.append({
+                "title": item.get("name", ""),
+                "link": item.get("url", ""),
+                "snippet": item.get("snippet", ""),
+                "source": self.name
+            })
+        return standardized_results
+
+    def normalize_sections(self, results, sections: Optional[Sequence[str]] = None) -> Dict[str, List]:
+        """
+        検索結果を型付きのセクション別の結果に変換します。
+        指定されていないセクションは走査しません。
+
+        Args:
+            results (dict): searchメソッドから返された検索結果
+            sections (Sequence[str], optional): 変換するセクション。Noneの場合はレスポンスに含まれるすべてのセクション
+
+        Returns:
+            Dict[str, List]: セクション名をキーとし、BingWebPage, BingNewsArticle,
+                             BingImage, BingVideoのリストを値とする辞書
+        """
+        if sections is None:
+            sections = [section for section in SECTION_PARSERS if section in results]
+
+        normalized = {}
+        for section in sections:
+            parser = SECTION_PARSERS[section]
+            normalized[section] = [parser(item) for item in results.get(section, {}).get("value", [])]
+        return normalized
@@ -0,0 +1,153 @@
+import re
+from typing import Dict, Optional, Set, Tuple
+
+from bs4 import NavigableString, Tag
+
+# 本文らしさ・定型部分らしさを示すclass/idのパターン
+POSITIVE_PATTERN = re.compile(r'article|body|content|entry|hentry|main|page|post|text|blog|story', re.I)
+NEGATIVE_PATTERN = re.compile(
+    r'banner|breadcrumb|combx|comment|community|consent|cookie|disqus|extra|footer|gdpr|header|'
+    r'legends|menu|modal|nav|outbrain|pager|pagination|popup|promo|related|remark|rss|share|'
+    r'shoutbox|sidebar|skyscraper|social|sponsor|subscribe|tags|tool|widget|\bads?\b|advert',
+    re.I
+)
+# 本文の中には現れないとみなすタグ
+BOILERPLATE_TAGS = {'nav', 'footer', 'aside', 'form'}
+# 本文を含むコンテナの候補となるタグ
+CANDIDATE_TAGS = {'article', 'main', 'section', 'div', 'td', 'body'}
+# 段落として得点を与えるタグ
+SCORED_TAGS = {'p', 'pre', 'td', 'blockquote', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# リンクの割合で定型部分かどうかを判定するブロック要素
+LINK_LIST_TAGS = {'ul', 'ol', 'div', 'section', 'table', 'header', 'p'}
+
+MIN_PARAGRAPH_CHARS = 25
+MAX_LINK_DENSITY = 0.5
+
+
+def _class_weight(tag: Tag) -> int:
+    weight = 0
+    for value in (" ".join(tag.get('class') or []), tag.get('id') or ""):
+        if not value:
+            continue
+        if NEGATIVE_PATTERN.search(value):
+            weight -= 25
+        if POSITIVE_PATTERN.search(value):
+            weight += 25
+    return weight
+
+
+def _text_stats(root: Tag) -> Dict[int, Tuple[int, int]]:
+    """
+    各要素のテキスト長とリンク内のテキスト長を1回の走査で求める。
+
+    深い入れ子でも再帰の上限に達しないよう、スタックを使って帰りがけ順に集計する。
+
+    Returns:
+        Dict[int, Tuple[int, int]]: id(要素)をキーとする(テキスト長, リンク内のテキスト長)
+    """
+    stats = {}
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if not visited:
+            stack.append((node, True))
+            for child in node.children:
+                if isinstance(child, Tag):
+                    stack.append((child, False))
+            continue
+        text_length = link_length = 0
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                text_length += len(child.strip())
+            elif isinstance(child, Tag):
+                child_text, child_link = stats[id(child)]
+                text_length += child_text
+                link_length += child_link
+        if node.name == 'a':
+            link_length = text_length
+        stats[id(node)] = (text_length, link_length)
+    return stats
+
+
+def _link_density(stats, tag: Tag) -> float:
+    text_length, link_length = stats[id(tag)]
+    return link_length / text_length if text_length else 0.0
+
+
+def _is_boilerplate(stats, tag: Tag) -> bool:
+    if tag.name in BOILERPLATE_TAGS:
+        return True
+    role = tag.get('role')
+    if role in ('navigation', 'banner', 'contentinfo', 'complementary', 'dialog'):
+        return True
+    weight = _class_weight(tag)
+    if weight < 0:
+        return True
+    # リンクが大半を占めるブロック（関連リンク、タグ一覧など）
+    if tag.name in LINK_LIST_TAGS and weight <= 0 and _link_density(stats, tag) > MAX_LINK_DENSITY:
+        return True
+    return False
+
+
+def select_main_content(root: Tag) -> Tuple[Tag, Set[int]]:
+    """
+    readabilityと同様にテキスト量とリンクの割合でブロックを採点し、本文のコンテナと
+    その中で変換を省略する定型部分を求めます。
+
+    Args:
+        root (Tag): html要素またはBeautifulSoupオブジェクト
+
+    Returns:
+        Tuple[Tag, Set[int]]: 本文のコンテナと、変換しない要素のidの集合
+    """
+    stats = _text_stats(root)
+    scores: Dict[int, float] = {}
+    candidates: Dict[int, Tag] = {}
+
+    for tag in root.find_all(SCORED_TAGS):
+        text_length, _ = stats[id(tag)]
+        if text_length < MIN_PARAGRAPH_CHARS:
+            continue
+        # 段落の長さに応じた得点を、親に全額、祖父母に半額加算する
+        score = 1 + min(text_length / 100, 3)
+        for ancestor, share in ((tag.parent, 1.0), (tag.parent.parent if tag.parent else None, 0.5)):
+            if ancestor is None or ancestor.name not in CANDIDATE_TAGS:
+                continue
+            key = id(ancestor)
+            if key not in candidates:
+                candidates[key] = ancestor
+                scores[key] = _class_weight(ancestor) + (5 if ancestor.name in ('article', 'main') else 0)
+            scores[key] += score * share
+
+    best: Optional[Tag] = None
+    best_score = 0.0
+    for key, tag in candidates.items():
+        # リンクの多いブロックは本文とみなしにくくする
+        score = scores[key] * (1 - _link_density(stats, tag))
+        if best is None or score > best_score:
+            best, best_score = tag, score
+
+    if best is None:
+        best = root.find('body') or root
+    else:
+        # 本文が複数の兄弟要素に分かれている場合は、共通の親をコンテナにする
+        parent = best.parent
+        if parent is not None and parent.name in CANDIDATE_TAGS:
+            siblings = [sibling for sibling in parent.find_all(recursive=False)
+                        if sibling is not best and scores.get(id(sibling), 0) * (1 - _link_density(stats, sibling))
+                        >= max(10.0, best_score * 0.2)]
+            if siblings:
+                best = parent
+
+    pruned = set()
+    stack = [best]
+    while stack:
+        node = stack.pop()
+        for child in node.children:
+            if not isinstance(child, Tag):
+                continue
+            if _is_boilerplate(stats, child):
+                pruned.add(id(child))
+            else:
+                stack.append(child)
+    return best, pruned
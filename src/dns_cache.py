@@ -0,0 +1,383 @@
+import asyncio
+import errno
+import ipaddress
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+try:
+    from urllib3.exceptions import NameResolutionError
+except ImportError:  # urllib3 1.x
+    NameResolutionError = None
+
+try:
+    import aiodns
+except ImportError:  # aiodnsは任意の依存関係
+    aiodns = None
+
+# socket.getaddrinfoの1件分: (family, type, proto, canonname, sockaddr)
+AddrInfo = Tuple[int, int, int, str, tuple]
+
+CONNECT_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN}
+
+
+def _interleave_families(addrinfos: List[AddrInfo]) -> List[AddrInfo]:
+    """RFC 8305と同様に、最初のアドレスファミリーから始めてIPv6とIPv4を交互に並べる"""
+    if not addrinfos:
+        return []
+    first_family = addrinfos[0][0]
+    primary = [info for info in addrinfos if info[0] == first_family]
+    secondary = [info for info in addrinfos if info[0] != first_family]
+    ordered = []
+    for index in range(max(len(primary), len(secondary))):
+        ordered.extend(group[index] for group in (primary, secondary) if index < len(group))
+    return ordered
+
+
+def _with_port(sockaddr: tuple, port: int) -> tuple:
+    return (sockaddr[0], port) + tuple(sockaddr[2:])
+
+
+class DNSCache:
+    """
+    プロセス内でホスト名の解決結果をTTLの間キャッシュするクラス。
+
+    DNSCachingAdapterをrequests.Sessionにマウントすると、新しい接続を作るたびに
+    システムのリゾルバを呼ぶ代わりにキャッシュを参照します。複数のアドレスがある場合は
+    Happy Eyeballs（RFC 8305）と同様に、一定時間ごとに次のアドレスへの接続を並行して
+    開始し、最初に確立した接続を使います。
+
+    aiodnsがインストールされている場合、preresolveはDNSの応答のTTLを使って非同期に解決します。
+    それ以外の場合はスレッドでgetaddrinfoを並行して呼び出し、TTLにはttlを使います。
+    """
+
+    def __init__(self, ttl: float = 300.0, negative_ttl: float = 30.0, happy_eyeballs_delay: float = 0.25,
+                 use_aiodns: bool = True, instrumentation: Optional[Instrumentation] = None):
+        """
+        Args:
+            ttl (float): 解決結果の有効期間（秒）。aiodnsで解決した場合はDNSの応答のTTLとの小さい方
+            negative_ttl (float): 解決に失敗したホストを再度問い合わせるまでの時間（秒）
+            happy_eyeballs_delay (float): 次のアドレスへの接続を開始するまでの待ち時間（秒）
+            use_aiodns (bool): aiodnsがインストールされている場合にpreresolveで使うかどうか
+            instrumentation (Instrumentation, optional): 解決ごとに"fetch.dns"ステージを通知する計測器
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.happy_eyeballs_delay = happy_eyeballs_delay
+        self.use_aiodns = use_aiodns and aiodns is not None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        # ホスト名 -> (有効期限, 解決結果またはsocket.gaierror)
+        self._entries: Dict[str, Tuple[float, object]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_ip_address(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host.strip("[]"))
+            return True
+        except ValueError:
+            return False
+
+    def _record(self, host: str, hit: bool, duration: float = 0.0, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(host, {"lookups": 0, "hits": 0, "misses": 0, "failures": 0,
+                                                  "resolve_seconds": 0.0, "max_resolve_ms": 0.0})
+            stats["lookups"] += 1
+            if hit:
+                stats["hits"] += 1
+                return
+            stats["misses"] += 1
+            stats["failures"] += failed
+            stats["resolve_seconds"] += duration
+            stats["max_resolve_ms"] = max(stats["max_resolve_ms"], duration * 1000)
+
+    def _store(self, host: str, result: object, ttl: float) -> None:
+        with self._lock:
+            self._entries[host] = (time.monotonic() + ttl, result)
+
+    def _cached(self, host: str) -> Optional[object]:
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def resolve(self, host: str) -> List[AddrInfo]:
+        """
+        ホスト名を解決します。有効なキャッシュがある場合はそれを返します。
+
+        Args:
+            host (str): ホスト名
+
+        Returns:
+            List[AddrInfo]: 接続を試す順に並べたアドレス（ポートは0）
+
+        Raises:
+            socket.gaierror: 解決に失敗した場合（negative_ttlの間は問い合わせずに同じ例外を送出する）
+        """
+        cached = self._cached(host)
+        if cached is not None:
+            self._record(host, hit=True)
+            if isinstance(cached, socket.gaierror):
+                raise cached
+            return cached
+
+        start = time.perf_counter()
+        try:
+            with self.instrumentation.span("fetch.dns", host=host):
+                addrinfos = _interleave_families(socket.getaddrinfo(host, None, socket.AF_UNSPEC,
+                                                                    socket.SOCK_STREAM))
+        except socket.gaierror as e:
+            self._record(host, hit=False, duration=time.perf_counter() - start, failed=True)
+            self._store(host, e, self.negative_ttl)
+            raise
+        self._record(host, hit=False, duration=time.perf_counter() - start)
+        self._store(host, addrinfos, self.ttl)
+        return addrinfos
+
+    def preresolve(self, urls: Iterable[str], concurrency: int = 16) -> Dict[str, bool]:
+        """
+        URLのホスト名をまとめて並行に解決し、キャッシュに格納します。
+
+        Args:
+            urls (Iterable[str]): URLまたはホスト名
+            concurrency (int): 同時に解決する数
+
+        Returns:
+            Dict[str, bool]: 解決したホスト名と成否（キャッシュ済みのホストは含まない）
+        """
+        hosts = []
+        for url in urls:
+            host = urlsplit(url).hostname if "://" in url else url
+            if host and not self._is_ip_address(host) and self._cached(host) is None and host not in hosts:
+                hosts.append(host)
+        if not hosts:
+            return {}
+        if self.use_aiodns:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self.apreresolve(hosts, concurrency))
+
+        def resolve(host):
+            try:
+                self.resolve(host)
+                return True
+            except socket.gaierror:
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(hosts))) as executor:
+            return dict(zip(hosts, executor.map(resolve, hosts)))
+
+    async def apreresolve(self, hosts: Iterable[str], concurrency: int = 16) -> Dict[str, bool]:
+        """
+        preresolveの非同期版。aiodnsがない場合はgetaddrinfoをスレッドで実行します。
+
+        Args:
+            hosts (Iterable[str]): ホスト名
+            concurrency (int): 同時に解決する数
+
+        Returns:
+            Dict[str, bool]: ホスト名と解決の成否
+        """
+        hosts = list(dict.fromkeys(hosts))
+        semaphore = asyncio.Semaphore(concurrency)
+        resolver = aiodns.DNSResolver() if self.use_aiodns else None
+
+        async def resolve(host):
+            async with semaphore:
+                if resolver is None:
+                    try:
+                        await asyncio.to_thread(self.resolve, host)
+                        return True
+                    except socket.gaierror:
+                        return False
+                return await self._aresolve_with_aiodns(resolver, host)
+
+        results = await asyncio.gather(*(resolve(host) for host in hosts))
+        return dict(zip(hosts, results))
+
+    async def _aresolve_with_aiodns(self, resolver, host: str) -> bool:
+        start = time.perf_counter()
+        addrinfos = []
+        ttls = []
+        for query_type, family in (("AAAA", socket.AF_INET6), ("A", socket.AF_INET)):
+            try:
+                records = await resolver.query(host, query_type)
+            except aiodns.error.DNSError:
+                # AAAAレコードがないホストは多いため、片方の失敗は無視する
+                continue
+            for record in records:
+                sockaddr = (record.host, 0, 0, 0) if family == socket.AF_INET6 else (record.host, 0)
+                addrinfos.append((family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", sockaddr))
+                ttls.append(record.ttl)
+        duration = time.perf_counter() - start
+        self.instrumentation.record("fetch.dns", duration, host=host)
+        if not addrinfos:
+            self._record(host, hit=False, duration=duration, failed=True)
+            self._store(host, socket.gaierror(socket.EAI_NONAME, f"{host}を解決できません"), self.negative_ttl)
+            return False
+        self._record(host, hit=False, duration=duration)
+        self._store(host, _interleave_families(addrinfos), min([self.ttl] + ttls))
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """ホスト名ごとの問い合わせ数、キャッシュのヒット数、解決にかかった時間を返す"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def clear(self) -> None:
+        """キャッシュを破棄します"""
+        with self._lock:
+            self._entries.clear()
+
+    def create_connection(self, address: Tuple[str, int], timeout: object = None,
+                          source_address: Optional[tuple] = None,
+                          socket_options: Optional[list] = None) -> socket.socket:
+        """
+        キャッシュしたアドレスにHappy Eyeballsで接続します（urllib3のcreate_connectionの代わり）。
+
+        Args:
+            address (Tuple[str, int]): (ホスト名, ポート)
+            timeout (float, optional): 接続と以降の読み書きのタイムアウト（秒）
+            source_address (tuple, optional): 接続元のアドレス
+            socket_options (list, optional): setsockoptに渡すオプション
+
+        Returns:
+            socket.socket: 接続済みのソケット
+        """
+        host, port = address
+        host = host.strip("[]")
+        if not isinstance(timeout, (int, float)) and timeout is not None:
+            # urllib3の_DEFAULT_TIMEOUTはソケットの既定値を使う
+            timeout = socket.getdefaulttimeout()
+        if self._is_ip_address(host):
+            addrinfos = socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        else:
+            addrinfos = [info[:4] + (_with_port(info[4], port),) for info in self.resolve(host)]
+
+        sock = self._connect_staggered(addrinfos, timeout, source_address, socket_options)
+        sock.setblocking(True)
+        sock.settimeout(timeout)
+        return sock
+
+    def _connect_staggered(self, addrinfos, timeout, source_address, socket_options) -> socket.socket:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        remaining = list(addrinfos)
+        pending = {}
+        errors = []
+        winner = None
+        next_attempt = 0.0
+        selector = selectors.DefaultSelector()
+        try:
+            while winner is None and (remaining or pending):
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    raise socket.timeout("timed out")
+                if remaining and (not pending or now >= next_attempt):
+                    family, socktype, proto, _, sockaddr = remaining.pop(0)
+                    sock = socket.socket(family, socktype, proto)
+                    try:
+                        for option in socket_options or ():
+                            sock.setsockopt(*option)
+                        if source_address:
+                            sock.bind(source_address)
+                        sock.setblocking(False)
+                        result = sock.connect_ex(sockaddr)
+                        if result not in CONNECT_IN_PROGRESS:
+                            raise OSError(result, f"{sockaddr[0]}: {errno.errorcode.get(result, result)}")
+                    except OSError as e:
+                        sock.close()
+                        errors.append(e)
+                        continue
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    pending[sock] = sockaddr
+                    next_attempt = now + self.happy_eyeballs_delay
+
+                # 次の接続を開始する時刻か、タイムアウトまで待つ
+                waits = [next_attempt - now] if remaining else []
+                if deadline is not None:
+                    waits.append(deadline - now)
+                for key, _ in selector.select(max(min(waits), 0) if waits else None):
+                    sock = key.fileobj
+                    selector.unregister(sock)
+                    sockaddr = pending.pop(sock)
+                    result = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if result == 0:
+                        winner = sock
+                        break
+                    sock.close()
+                    errors.append(OSError(result, f"{sockaddr[0]}: {errno.errorcode.get(result, result)}"))
+                    # 失敗した場合は待たずに次のアドレスへ接続する
+                    next_attempt = 0.0
+        finally:
+            for sock in pending:
+                sock.close()
+            selector.close()
+
+        if winner is not None:
+            return winner
+        if errors:
+            raise errors[-1]
+        raise OSError("getaddrinfo returns an empty list")
+
+
+class _DNSCachingConnectionMixin:
+    dns_cache: DNSCache
+
+    def _new_conn(self) -> socket.socket:
+        try:
+            return self.dns_cache.create_connection(
+                (self._dns_host, self.port),
+                self.timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options,
+            )
+        except socket.gaierror as e:
+            if NameResolutionError is not None:
+                raise NameResolutionError(self.host, self, e) from e
+            raise NewConnectionError(self, f"Failed to resolve '{self.host}': {e}") from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+
+class DNSCachingAdapter(HTTPAdapter):
+    """新しい接続を作る際にDNSCacheで名前解決とHappy Eyeballsの接続を行うHTTPAdapter"""
+
+    __attrs__ = HTTPAdapter.__attrs__ + ["dns_cache"]
+
+    def __init__(self, dns_cache: DNSCache, **kwargs):
+        """
+        Args:
+            dns_cache (DNSCache): 使用するキャッシュ
+            **kwargs: HTTPAdapterの引数
+        """
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        attributes = {"dns_cache": self.dns_cache}
+        http_connection = type("DNSCachingHTTPConnection", (_DNSCachingConnectionMixin, HTTPConnection), attributes)
+        https_connection = type("DNSCachingHTTPSConnection", (_DNSCachingConnectionMixin, HTTPSConnection),
+                                attributes)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("DNSCachingHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http_connection}),
+            "https": type("DNSCachingHTTPSConnectionPool", (HTTPSConnectionPool,),
+                          {"ConnectionCls": https_connection}),
+        }
@@ -1,7 +1,26 @@
 # %%
+import requests
 from duckduckgo_search import DDGS
+from src.search_engine import SearchEngine, EngineCapabilities
+
+class DuckDuckGoInstantAnswer(SearchEngine):
+    name = "duckduckgo"
+    # 公式APIではないため、レート制限を避けるよう直列・低頻度で呼び出す
+    CAPABILITIES = EngineCapabilities(
+        max_concurrency=1,
+        qps=1,
+        cost_per_query=0.0,
+    )
+
+    def __init__(self, base_url=None):
+        """
+        Args:
+            base_url (str, optional): Instant Answer API（api.duckduckgo.com）互換の接続先。
+                                      duckduckgo-searchライブラリは接続先を変更できないため、
+                                      指定した場合はこのAPIのJSONから検索結果を作成する
+        """
+        self.base_url = base_url
 
-class DuckDuckGoInstantAnswer:
     def search(self, query, search_type="text", region="jp-jp", safesearch="off", timelimit=None, max_results=4):
         """
         duckduckgo-searchライブラリを使用して検索を実行します。
@@ -18,6 +37,25 @@ class DuckDuckGoInstantAnswer:
         Returns:
             list: 検索結果（各要素は dict）
         """
+        return list(self._iter_raw(query, search_type, region, safesearch, timelimit, max_results))
+
+    def iter_search(self, query, search_type="text", region="jp-jp", safesearch="off", timelimit=None, max_results=4):
+        """
+        検索結果を標準化された形式で、DDGのページが届いた順に1件ずつ返します。
+        途中で反復を止めた場合、以降のページは取得しません。
+
+        引数はsearchと同じです。
+
+        Yields:
+            dict: "title", "link", "snippet", "source"を持つ辞書
+        """
+        for item in self._iter_raw(query, search_type, region, safesearch, timelimit, max_results):
+            yield self._standardize(item)
+
+    def _iter_raw(self, query, search_type, region, safesearch, timelimit, max_results):
+        if self.base_url:
+            yield from self._iter_instant_answer(query, search_type, region, max_results)
+            return
         with DDGS() as ddgs:
             search_functions = {
                 "text": ddgs.text,
@@ -29,15 +67,52 @@ class DuckDuckGoInstantAnswer:
             if search_type not in search_functions:
                 raise ValueError("Invalid search_type. Choose from: " + ", ".join(search_functions.keys()))
             
-            results = list(search_functions[search_type](
+            # ライブラリのバージョンによってはページ単位で結果を返すジェネレータになる
+            yield from search_functions[search_type](
                 keywords=query,
                 region=region,
                 safesearch=safesearch,
                 timelimit=timelimit,
                 max_results=max_results
-            ))
-        
-        return results
+            )
+
+    def _iter_instant_answer(self, query, search_type, region, max_results):
+        if search_type != "text":
+            raise ValueError("Instant Answer APIはsearch_type=\"text\"のみ対応しています")
+        response = requests.get(self.base_url.rstrip("/") + "/", params={
+            "q": query,
+            "format": "json",
+            "no_html": 1,
+            "skip_disambig": 1,
+            "kl": region,
+        })
+        response.raise_for_status()
+        data = response.json()
+
+        # duckduckgo-searchのtext()と同じ形式（title, href, body）に変換する
+        items = []
+        if data.get("AbstractURL"):
+            items.append({"title": data.get("Heading", ""), "href": data["AbstractURL"],
+                          "body": data.get("AbstractText", "")})
+        for topic in data.get("RelatedTopics", []):
+            # カテゴリ別のトピックは"Topics"の中に入れ子になっている
+            for entry in topic.get("Topics", [topic]):
+                if entry.get("FirstURL"):
+                    items.append({"title": entry.get("Text", "").split(" - ")[0], "href": entry["FirstURL"],
+                                  "body": entry.get("Text", "")})
+        yield from items[:max_results] if max_results else items
+
+    def _standardize(self, item):
+        return {
+            "title": item.get("title", ""),
+            "link": item.get("href", ""),
+            "snippet": item.get("body", ""),
+            "source": self.name
+        }
+
+    def normalize(self, results):
+        """検索結果を標準化された形式に変換します"""
+        return [self._standardize(item) for item in results]
     
 if __name__ == "__main__":
     ddg = DuckDuckGoInstantAnswer()
@@ -1,33 +1,237 @@
 # %%
 
 from dotenv import load_dotenv
+import logging
+import math
 import os
 import json
+from contextlib import nullcontext
+from functools import lru_cache
 from time import sleep
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httplib2
 from googleapiclient.discovery import build
+from src.search_engine import SearchEngine, EngineCapabilities
 
-# ここに取得したAPIキーと検索エンジンIDを設定
+# 1リクエストで取得できる件数と、start + num の上限
+PAGE_SIZE = 10
+MAX_TOTAL_RESULTS = 100
+MAX_PAGE_CONCURRENCY = 10
 
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+# レスポンスから取得するフィールド（normalizeとページ分割で使うものだけに絞る）
+DEFAULT_FIELDS = "searchInformation/totalResults,items(title,link,snippet)"
+
+_thread_local = threading.local()
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _load_env():
+    # .envの読み込みはインポート時ではなく初回利用時に1度だけ行う
+    load_dotenv()
+
+@lru_cache(maxsize=8)
+def _get_service(api_key, base_url=None):
+    # discoveryドキュメントの解析を伴うため、APIキー・接続先ごとにサービスを使い回す
+    if base_url:
+        return build("customsearch", "v1", developerKey=api_key, client_options={"api_endpoint": base_url})
+    return build("customsearch", "v1", developerKey=api_key)
+
+def _thread_http():
+    # httplib2.Httpはスレッドセーフではないため、スレッドごとに作成する
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http()
+    return http
+
+def _fetch_page(service, keyword, custom_search_engine_id, start, num, fields=None):
+    params = {}
+    if fields:
+        params["fields"] = fields
+    return service.cse().list(
+        q=keyword,
+        cx=custom_search_engine_id,
+        lr='lang_ja',
+        start=start,
+        num=num,
+        **params
+    ).execute(http=_thread_http())
+
+def get_search_response(keyword, max_results=10, custom_search_engine_id=None, api_key=None,
+                        fields=DEFAULT_FIELDS, base_url=None, max_concurrency=MAX_PAGE_CONCURRENCY,
+                        before_request=None, request_slots=None):
+    """
+    Google Custom Search APIで検索し、ページごとのレスポンスを順位順のリストで返します。
+
+    1リクエストの上限は10件のため、max_resultsが10を超える場合は
+    start=1, 11, 21…のページを並行して取得します。いずれかのページの取得に失敗した場合は
+    残りのページを取り消し、その例外を送出します。
+
+    Args:
+        keyword (str): 検索クエリ
+        max_results (int): 取得件数（APIの仕様上、最大100件）
+        custom_search_engine_id (str, optional): 検索エンジンID。指定がない場合は環境変数GOOGLE_CSE_ID
+        api_key (str, optional): APIキー。指定がない場合は環境変数GOOGLE_API_KEY
+        fields (str, optional): レスポンスに含めるフィールドの指定（partial response）。
+                                Noneの場合はpagemapなどを含む完全なレスポンスを取得する
+        base_url (str, optional): APIの接続先（例: "http://127.0.0.1:8000"）。ローカルのモックサーバーを
+                                  使用する場合に指定する
+        max_concurrency (int): 1つのクエリで同時に取得するページ数の上限
+        before_request (callable, optional): 各ページのリクエストの直前に呼び出す関数（レート制限用）
+        request_slots (threading.Semaphore, optional): 取得中に確保するセマフォ。複数のクエリで共有し、
+                                                        全体の同時リクエスト数を制限する
+
+    Returns:
+        list: ページごとのレスポンスのリスト（順位順）
+
+    Raises:
+        googleapiclient.errors.HttpError: いずれかのページでAPIがエラー（クォータ超過の403、
+                                          レート制限の429など）を返した場合
+    """
+    _load_env()
+    service = _get_service(api_key or os.getenv("GOOGLE_API_KEY"), base_url)
+    custom_search_engine_id = custom_search_engine_id or os.getenv("GOOGLE_CSE_ID")
+
+    # start + num は100を超えられない
+    max_results = min(max_results, MAX_TOTAL_RESULTS)
+    pages = [
+        (start, min(PAGE_SIZE, max_results - start + 1))
+        for start in range(1, max_results + 1, PAGE_SIZE)
+    ]
+
+    def fetch(start, num):
+        # ページごとのリクエストもレート制限と同時リクエスト数の上限の対象とする
+        with request_slots if request_slots is not None else nullcontext():
+            if before_request is not None:
+                before_request()
+            return _fetch_page(service, keyword, custom_search_engine_id, start, num, fields)
+
+    if len(pages) == 1:
+        try:
+            return [fetch(*pages[0])]
+        except Exception as e:
+            # 空の結果として返すと、search_batchが成功として記録し再開時に再実行されないため送出する
+            logger.error(f"Google Custom Searchの検索に失敗しました ({keyword}): {e}")
+            raise
+
+    page_results = {}
+    total_results = None
+    with ThreadPoolExecutor(max_workers=max(1, min(len(pages), max_concurrency))) as executor:
+        futures = {
+            executor.submit(fetch, start, num): start
+            for start, num in pages
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            if future.cancelled():
+                # 検索結果の総数を超えるため取り消したページ
+                continue
+            try:
+                page_results[start] = future.result()
+            except Exception as e:
+                # 一部のページが欠けた結果を成功として返さず、未開始のページを取り消して送出する
+                logger.error(f"Google Custom Searchのページの取得に失敗しました ({keyword}, start={start}): {e}")
+                for pending_future in futures:
+                    pending_future.cancel()
+                raise
+            if total_results is None:
+                total_results = int(page_results[start].get("searchInformation", {}).get("totalResults", 0))
+                # 検索結果の総数を超えるページは開始前であれば取り消す
+                for pending_future, pending_start in futures.items():
+                    if pending_start > total_results:
+                        pending_future.cancel()
 
-def get_search_response(keyword, max_results=10, custom_search_engine_id=GOOGLE_CSE_ID):
-    service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY)
     responses = []
-    
-    try:
-        result = service.cse().list(
-            q=keyword,
-            cx=custom_search_engine_id,
-            lr='lang_ja',
-            num=max_results,# 1リクエストで10件取得可能
-        ).execute()
-        responses.append(result)
-    except Exception as e:
-        print("Error:", e)
+    for start, _ in pages:
+        if start not in page_results:
+            continue
+        if total_results is not None and start > total_results:
+            break
+        response = page_results[start]
+        responses.append(response)
+        # 結果が尽きたページ以降は不要
+        if not response.get("items"):
+            break
     return responses
 
+class GoogleCustomSearch(SearchEngine):
+    """Google Custom Search APIをSearchEngineとして利用するためのクラス"""
+
+    name = "google"
+    # 1リクエスト最大10件、無料枠は1日100クエリ、以降は1000クエリあたり5USD
+    CAPABILITIES = EngineCapabilities(
+        max_concurrency=4,
+        qps=10,
+        daily_quota=100,
+        cost_per_query=0.005,
+        max_results_per_request=10,
+    )
+
+    def __init__(self, api_key=None, cse_id=None, base_url=None):
+        """
+        Args:
+            api_key (str, optional): APIキー。指定がない場合は環境変数GOOGLE_API_KEY
+            cse_id (str, optional): 検索エンジンID。指定がない場合は環境変数GOOGLE_CSE_ID
+            base_url (str, optional): APIの接続先。ローカルのモックサーバーを使用する場合に指定する
+        """
+        _load_env()
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.cse_id = cse_id or os.getenv("GOOGLE_CSE_ID")
+        self.base_url = base_url
+
+        if not self.api_key or not self.cse_id:
+            raise ValueError("Google API key and CSE ID are required")
+        # 並行する複数のクエリのページ取得を合わせて、max_concurrency件までに制限する
+        self._request_slots = threading.BoundedSemaphore(self.CAPABILITIES.max_concurrency)
+
+    def search(self, query, max_results=10, custom_search_engine_id=None, fields=DEFAULT_FIELDS,
+               before_request=None, **kwargs):
+        """
+        Google Custom Search APIを使用して検索を実行します
+
+        Args:
+            query (str): 検索クエリ
+            max_results (int): 取得件数
+            custom_search_engine_id (str, optional): 検索エンジンID。指定がない場合はインスタンスの値を使用
+            fields (str, optional): レスポンスに含めるフィールドの指定。Noneの場合は完全なレスポンスを取得する
+            before_request (callable, optional): 各ページのリクエストの直前に呼び出す関数（レート制限用）
+
+        Returns:
+            list: レスポンスのリスト
+        """
+        return get_search_response(
+            query,
+            max_results=max_results,
+            custom_search_engine_id=custom_search_engine_id or self.cse_id,
+            api_key=self.api_key,
+            fields=fields,
+            base_url=self.base_url,
+            max_concurrency=self.CAPABILITIES.max_concurrency,
+            before_request=before_request,
+            request_slots=self._request_slots,
+        )
+
+    def request_count(self, max_results=10):
+        """10件ごとのページを別々のリクエストで取得するため、ページ数を返す"""
+        return max(1, math.ceil(min(max_results, MAX_TOTAL_RESULTS) / PAGE_SIZE))
+
+    def search_paced(self, query, acquire, max_results=10, **kwargs):
+        """並行して取得するページのリクエストごとにacquireを呼び出して検索を実行します"""
+        return self.search(query, max_results=max_results, before_request=acquire, **kwargs)
+
+    def normalize(self, results):
+        """検索結果を標準化された形式に変換します"""
+        standardized_results = []
+        for response in results:
+            for item in response.get("items", []):
+                standardized_results.append({
+                    "title": item.get("title", ""),
+                    "link": item.get("link", ""),
+                    "snippet": item.get("snippet", "").replace("\n", " "),
+                    "source": self.name
+                })
+        return standardized_results
+
 def main():
     target_keyword = "NYダウ　平均株価"
     api_response = get_search_response(target_keyword)
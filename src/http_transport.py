@@ -0,0 +1,203 @@
+from typing import Iterator, Mapping, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.util import make_headers
+
+try:
+    import httpx
+except ImportError:  # httpxは任意の依存関係
+    httpx = None
+
+try:
+    import brotli
+except ImportError:  # brotli（またはbrotlicffi）は任意の依存関係
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandardは任意の依存関係
+    zstandard = None
+
+# WebScraperで選択できるHTTPクライアント
+TRANSPORTS = ("requests", "httpx")
+# Accept-Encodingで提示する順序（圧縮率の高いものを先に並べる）
+CONTENT_ENCODINGS = ("zstd", "br", "gzip", "deflate")
+
+
+class ContentTooLargeError(requests.RequestException):
+    """展開後の本文が上限を超えた（圧縮爆弾の可能性がある）場合の例外"""
+
+
+def accept_encoding(transport: str = "requests") -> str:
+    """
+    transportで展開できる圧縮形式を並べたAccept-Encodingヘッダーの値を返します。
+
+    br（brotli/brotlicffi）とzstd（zstandard）は、対応するパッケージがインストールされ、
+    HTTPクライアントが展開に対応している場合のみ含めます。
+
+    Args:
+        transport (str): "requests"または"httpx"
+
+    Returns:
+        str: "zstd, br, gzip, deflate"のような値
+    """
+    if transport == "requests":
+        # urllib3は展開できる形式のみを返す（brやzstdはパッケージとurllib3のバージョンに依存）
+        available = {name.strip() for name in make_headers(accept_encoding=True)["accept-encoding"].split(",")}
+    else:
+        available = {"gzip", "deflate"}
+        if brotli is not None:
+            available.add("br")
+        if zstandard is not None:
+            available.add("zstd")
+    return ", ".join(name for name in CONTENT_ENCODINGS if name in available)
+
+
+def _to_requests_error(error: Exception) -> requests.RequestException:
+    """fetch_htmlのリトライ処理がそのまま使えるよう、httpxの例外をrequestsの例外に変換する"""
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error))
+    if isinstance(error, httpx.InvalidURL):
+        return requests.exceptions.InvalidURL(str(error))
+    return requests.ConnectionError(str(error))
+
+
+class HTTPXResponse:
+    """httpx.Responseをfetch_htmlとRobotsCacheが使うrequests.Responseの属性で参照するためのラッパー"""
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self._content: Optional[bytes] = None
+        content_type = response.headers.get("content-type", "")
+        # requestsと同様に、charsetの指定がない場合はNone（fetch_htmlがchardetで推測する）
+        self.encoding: Optional[str] = None
+        if "charset=" in content_type.lower():
+            self.encoding = content_type.lower().split("charset=")[-1].split(";")[0].strip()
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self._response.headers
+
+    @property
+    def url(self) -> str:
+        return str(self._response.url)
+
+    @property
+    def http_version(self) -> str:
+        """"HTTP/1.1"や"HTTP/2"などのプロトコル"""
+        return self._response.http_version
+
+    @property
+    def content(self) -> bytes:
+        """本文を受信して返す。初回の参照時に受信を完了し、接続をプールに戻す"""
+        if self._content is None:
+            try:
+                self._content = self._response.read()
+            except httpx.HTTPError as e:
+                raise _to_requests_error(e) from e
+            finally:
+                self._response.close()
+        return self._content
+
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """展開した本文を受信しながら少しずつ返す（requests.Response.iter_contentと同様）"""
+        if self._content is not None:
+            yield self._content
+            return
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise _to_requests_error(e) from e
+        finally:
+            self._response.close()
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            kind = "Client Error" if self.status_code < 500 else "Server Error"
+            raise requests.HTTPError(f"{self.status_code} {kind}: {self._response.reason_phrase} for url: {self.url}")
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class HTTPXSession:
+    """
+    httpx.ClientをWebScraper.sessionとして使うためのラッパー。
+
+    http2=Trueの場合、同じオリジンへの並行したリクエストは1つのHTTP/2接続上のストリームとして
+    多重化されます。接続プールはhttpxがオリジンごとに管理し、スレッド間で共有できます。
+    HTTP/2を使うにはh2パッケージが必要です（TLSのALPNで合意できない場合はHTTP/1.1になります）。
+    """
+
+    def __init__(self, headers: Optional[Mapping[str, str]] = None, http2: bool = True, verify: bool = True,
+                 max_connections: int = 100, max_keepalive_connections: int = 20):
+        """
+        Args:
+            headers (Mapping[str, str], optional): すべてのリクエストに付与するヘッダー
+            http2 (bool): HTTP/2を有効にするかどうか
+            verify (bool): SSLの検証を行うかどうか（クライアント単位の設定のため、getのverifyは無視する）
+            max_connections (int): 全オリジン合計の最大接続数
+            max_keepalive_connections (int): 再利用のために保持する最大接続数
+
+        Raises:
+            ImportError: httpx（http2=Trueの場合はh2も）がインストールされていない場合
+        """
+        if httpx is None:
+            raise ImportError("transport='httpx'を使用するにはhttpxパッケージが必要です（HTTP/2にはh2も必要）")
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.http2 = http2
+        self.client = httpx.Client(
+            http2=http2,
+            verify=verify,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+        )
+
+    def get(self, url: str, timeout: Optional[float] = None, stream: bool = False, **kwargs) -> HTTPXResponse:
+        """
+        GETリクエストを送信します。stream=Trueの場合はヘッダーの受信までで戻り、
+        本文はcontentを参照したときに受信します。
+
+        Args:
+            url (str): リクエスト先のURL
+            timeout (float, optional): タイムアウト（秒）
+            stream (bool): 本文の受信を遅延するかどうか
+            **kwargs: requests.Session.getとの互換のための引数（verifyなど。使用しない）
+
+        Returns:
+            HTTPXResponse: レスポンス
+
+        Raises:
+            requests.RequestException: 接続やタイムアウトのエラー
+        """
+        request = self.client.build_request("GET", url, headers=dict(self.headers), timeout=timeout)
+        try:
+            response = HTTPXResponse(self.client.send(request, stream=True))
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            raise _to_requests_error(e) from e
+        if not stream:
+            response.content
+        return response
+
+    def close(self) -> None:
+        """接続プールを閉じます"""
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
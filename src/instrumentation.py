@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opentelemetryは任意の依存関係
+    otel_trace = None
+
+
+class InstrumentationHook:
+    """
+    計測結果を受け取るフックの基底クラス。
+
+    startはステージの開始時に呼ばれ、戻り値はfinishにそのまま渡されます。
+    """
+
+    def start(self, name: str, attributes: Dict[str, Any]) -> Any:
+        return None
+
+    def finish(self, token: Any, name: str, duration: float, attributes: Dict[str, Any],
+               error: Optional[BaseException]) -> None:
+        pass
+
+
+class CallbackHook(InstrumentationHook):
+    """ステージの完了ごとにcallback(name, duration, attributes, error)を呼び出すフック"""
+
+    def __init__(self, callback: Callable[[str, float, Dict[str, Any], Optional[BaseException]], None]):
+        self.callback = callback
+
+    def finish(self, token, name, duration, attributes, error):
+        self.callback(name, duration, attributes, error)
+
+
+class StageMetrics(InstrumentationHook):
+    """
+    ステージごとの呼び出し回数・合計時間・エラー数を集計するPrometheus形式のカウンター。
+    """
+
+    def __init__(self, prefix: str = "web_search"):
+        """
+        Args:
+            prefix (str): メトリクス名の接頭辞
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._count = defaultdict(int)
+        self._seconds = defaultdict(float)
+        self._errors = defaultdict(int)
+
+    def finish(self, token, name, duration, attributes, error):
+        with self._lock:
+            self._count[name] += 1
+            self._seconds[name] += duration
+            if error is not None:
+                self._errors[name] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        集計結果を返します。
+
+        Returns:
+            Dict[str, Dict[str, float]]: ステージ名をキーとし、count, seconds, errorsを持つ辞書
+        """
+        with self._lock:
+            return {
+                name: {"count": self._count[name], "seconds": self._seconds[name], "errors": self._errors[name]}
+                for name in self._count
+            }
+
+    def to_prometheus_text(self) -> str:
+        """Prometheusのテキスト形式で集計結果を返す"""
+        lines = [
+            f"# TYPE {self.prefix}_stage_seconds_total counter",
+            f"# TYPE {self.prefix}_stage_calls_total counter",
+            f"# TYPE {self.prefix}_stage_errors_total counter",
+        ]
+        for name, values in sorted(self.snapshot().items()):
+            label = f'{{stage="{name}"}}'
+            lines.append(f"{self.prefix}_stage_seconds_total{label} {values['seconds']:.6f}")
+            lines.append(f"{self.prefix}_stage_calls_total{label} {values['count']}")
+            lines.append(f"{self.prefix}_stage_errors_total{label} {values['errors']}")
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHook(InstrumentationHook):
+    """各ステージをOpenTelemetryのスパンとして記録するフック"""
+
+    def __init__(self, tracer=None):
+        """
+        Args:
+            tracer: OpenTelemetryのTracer。指定がない場合はグローバルなTracerProviderから取得する
+
+        Raises:
+            ImportError: opentelemetry-apiがインストールされていない場合
+        """
+        if otel_trace is None:
+            raise ImportError("OpenTelemetryHookを使用するにはopentelemetry-apiパッケージが必要です")
+        self.tracer = tracer or otel_trace.get_tracer(__name__)
+
+    def start(self, name, attributes):
+        span = self.tracer.start_span(name, attributes=_otel_attributes(attributes))
+        # 入れ子のステージが子スパンになるよう、現在のスパンとして設定する
+        manager = otel_trace.use_span(span, end_on_exit=False)
+        manager.__enter__()
+        return span, manager
+
+    def finish(self, token, name, duration, attributes, error):
+        span, manager = token
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        manager.__exit__(None, None, None)
+        span.end()
+
+
+def _otel_attributes(attributes):
+    return {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in attributes.items()}
+
+
+class Instrumentation:
+    """
+    検索・スクレイピングの各ステージの所要時間を計測し、登録されたフックへ通知するクラス。
+
+    フックが1つも登録されていない場合、spanは共有のnullcontextを返すだけなので
+    計測のオーバーヘッドはほぼありません。
+    入れ子のspanは外側のspanの属性（URLやエンジン名）を引き継ぎます。
+    """
+
+    _NULL_SPAN = nullcontext()
+
+    def __init__(self, hooks: Optional[List[InstrumentationHook]] = None):
+        """
+        Args:
+            hooks (List[InstrumentationHook], optional): 計測結果を受け取るフック
+        """
+        self.hooks = list(hooks or [])
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        """フックが登録されているかどうか"""
+        return bool(self.hooks)
+
+    def add_hook(self, hook: InstrumentationHook) -> None:
+        """フックを追加します"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: InstrumentationHook) -> None:
+        """フックを削除します"""
+        self.hooks.remove(hook)
+
+    def span(self, name: str, **attributes):
+        """
+        ステージの所要時間を計測するコンテキストマネージャを返します。
+
+        Args:
+            name (str): ステージ名（例: "fetch.ttfb", "parse.parse_node"）
+            **attributes: URLやエンジン名などの属性
+        """
+        if not self.hooks:
+            return self._NULL_SPAN
+        return self._span(name, attributes)
+
+    def record(self, name: str, duration: float, error: Optional[BaseException] = None, **attributes) -> None:
+        """
+        計測済みの所要時間をフックへ通知します。
+
+        Args:
+            name (str): ステージ名
+            duration (float): 所要時間（秒）
+            error (BaseException, optional): ステージで発生した例外
+            **attributes: URLやエンジン名などの属性
+        """
+        parent_attributes = getattr(self._local, "attributes", None)
+        if parent_attributes:
+            attributes = {**parent_attributes, **attributes}
+        for hook in self.hooks:
+            hook.finish(hook.start(name, attributes), name, duration, attributes, error)
+
+    @contextmanager
+    def _span(self, name, attributes):
+        parent_attributes = getattr(self._local, "attributes", None)
+        if parent_attributes:
+            attributes = {**parent_attributes, **attributes}
+        self._local.attributes = attributes
+        tokens = [hook.start(name, attributes) for hook in self.hooks]
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self._local.attributes = parent_attributes
+            # 入れ子のスパンを正しく閉じるため、開始と逆の順で通知する
+            for hook, token in reversed(list(zip(self.hooks, tokens))):
+                hook.finish(token, name, duration, attributes, error)
+
+
+# 計測を行わないデフォルトのインスタンス
+NULL_INSTRUMENTATION = Instrumentation()
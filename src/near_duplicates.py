@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+FINGERPRINT_BITS = 64
+# 重複判定の対象とする最小のトークン数（これより短いテキストは判定しない）
+MIN_FINGERPRINT_TOKENS = 20
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def extract_text(json_data: Any) -> str:
+    """html_to_jsonの結果からテキストノードのみを文書の順に連結して返す"""
+    texts = []
+    stack = [json_data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            texts.append(node)
+        elif isinstance(node, dict):
+            stack.extend(reversed(node.get("children", [])))
+    return " ".join(texts)
+
+
+def simhash(text: str, shingle_size: int = 5) -> int:
+    """
+    テキストの64ビットのSimHashを求めます。
+
+    空白を正規化した文字n-gramを特徴量とするため、単語の区切りがない日本語にも使えます。
+    ほぼ同じ内容のテキストはハミング距離の小さい値になります。
+
+    Args:
+        text (str): 対象のテキスト
+        shingle_size (int): 特徴量とする文字n-gramの長さ
+
+    Returns:
+        int: 64ビットのフィンガープリント
+    """
+    text = WHITESPACE_PATTERN.sub(" ", text.lower()).strip()
+    if not text:
+        return 0
+    shingles = Counter(text[i:i + shingle_size] for i in range(max(1, len(text) - shingle_size + 1)))
+
+    # プロセスをまたいで同じ値になるよう、hash()ではなくblake2bを使う
+    digests = [(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), weight)
+               for shingle, weight in shingles.items()]
+    total = sum(shingles.values())
+
+    # ビットごとに数える代わりにバイト値ごとに重みを集計し、最後に256通りの値からビットの重みを求める
+    fingerprint = 0
+    for position in range(8):
+        byte_weights = Counter()
+        for digest, weight in digests:
+            byte_weights[digest[position]] += weight
+        for bit in range(8):
+            ones = sum(weight for value, weight in byte_weights.items() if value >> bit & 1)
+            if ones * 2 > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """2つのフィンガープリントの異なるビットの数を返す"""
+    return bin(a ^ b).count("1")
+
+
+class FingerprintIndex:
+    """
+    SimHashのフィンガープリントでほぼ重複したページを検出するインデックス。
+
+    64ビットをmax_distance + 1個の帯に分け、いずれかの帯が一致する候補だけを比較するため、
+    登録数が増えても検索はほぼ定数時間です。file_pathを指定すると追記型のJSON Linesファイルに
+    記録し、次回以降のバッチでも過去のページとの重複を検出できます。
+    """
+
+    def __init__(self, file_path: Optional[str] = None, max_distance: int = 3):
+        """
+        Args:
+            file_path (str, optional): フィンガープリントを記録するファイル。Noneの場合はメモリ上のみ
+            max_distance (int): 重複とみなすハミング距離の上限
+        """
+        self.file_path = file_path
+        self.max_distance = max_distance
+        self._band_count = max_distance + 1
+        self._band_width = FINGERPRINT_BITS // self._band_count
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(self._band_count)]
+        self._urls: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._fp = None
+
+        if file_path and os.path.exists(file_path):
+            self._load()
+        if file_path:
+            self._fp = open(file_path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断時に書きかけになった最終行は無視する
+                    continue
+                self._insert(record["url"], int(record["fingerprint"], 16))
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self._band_width) - 1
+        for band in range(self._band_count):
+            yield band, fingerprint >> (band * self._band_width) & mask
+
+    def _insert(self, url: str, fingerprint: int) -> None:
+        if fingerprint in self._urls:
+            return
+        self._urls[fingerprint] = url
+        for band, key in self._band_keys(fingerprint):
+            self._bands[band].setdefault(key, []).append(fingerprint)
+
+    def _find(self, fingerprint: int) -> Optional[str]:
+        if fingerprint in self._urls:
+            return self._urls[fingerprint]
+        for band, key in self._band_keys(fingerprint):
+            for candidate in self._bands[band].get(key, ()):
+                if hamming_distance(fingerprint, candidate) <= self.max_distance:
+                    return self._urls[candidate]
+        return None
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """ほぼ重複したページが登録済みの場合はそのURLを返す"""
+        with self._lock:
+            return self._find(fingerprint)
+
+    def check_and_add(self, url: str, fingerprint: int) -> Optional[str]:
+        """
+        ほぼ重複したページが登録済みであればそのURLを返し、なければ登録してNoneを返します。
+        複数のスレッドから呼び出しても、同じ内容のページの一方だけが登録されます。
+
+        Args:
+            url (str): ページのURL
+            fingerprint (int): simhashで求めたフィンガープリント
+
+        Returns:
+            Optional[str]: 重複元のURL
+        """
+        with self._lock:
+            duplicate_of = self._find(fingerprint)
+            if duplicate_of is not None and duplicate_of != url:
+                return duplicate_of
+            if duplicate_of is None:
+                self._insert(url, fingerprint)
+                if self._fp is not None:
+                    self._fp.write(json.dumps({"url": url, "fingerprint": f"{fingerprint:016x}"},
+                                              ensure_ascii=False) + "\n")
+                    self._fp.flush()
+            return None
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def close(self) -> None:
+        """ファイルを閉じます"""
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
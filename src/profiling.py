@@ -0,0 +1,248 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import tracemalloc
+from typing import Dict, List
+
+from .instrumentation import InstrumentationHook
+
+
+class PipelineProfiler(InstrumentationHook):
+    """
+    パイプラインのステージごとにcProfileの統計とtracemallocのピークメモリを収集するフック。
+
+    ステージが入れ子になっている場合、外側のステージの計測は内側のステージの実行中は
+    一時停止するため、各ステージの統計にはそのステージ自身の処理のみが含まれます。
+    cProfileはスレッドごとに計測するため、スレッドごとの統計を出力時に統合します。
+    tracemallocはプロセス全体で共有されるため、並列実行時のピークメモリは目安となります。
+    """
+
+    def __init__(self, trace_memory: bool = True, max_stack_depth: int = 64):
+        """
+        Args:
+            trace_memory (bool): tracemallocでステージごとのピークメモリを計測するかどうか
+            max_stack_depth (int): 折りたたみスタック形式で出力するスタックの最大の深さ
+        """
+        self.trace_memory = trace_memory
+        self.max_stack_depth = max_stack_depth
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = {}  # (ステージ名, スレッドID) -> cProfile.Profile
+        self._calls = {}
+        self._seconds = {}
+        self._peak_memory = {}
+        self._started_tracemalloc = False
+
+    def start_tracing(self) -> None:
+        """tracemallocを開始します（既に開始されている場合は何もしない）"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop_tracing(self) -> None:
+        """start_tracingで開始したtracemallocを停止します"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self) -> List[dict]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(self, name, attributes):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        key = (name, threading.get_ident())
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = cProfile.Profile()
+
+        frame = {"profile": profile, "base": 0, "peak": 0}
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent["peak"] = max(parent["peak"], peak)
+            _reset_peak()
+            frame["base"] = frame["peak"] = current
+        if parent is not None:
+            parent["profile"].disable()
+        stack.append(frame)
+        profile.enable()
+        return frame
+
+    def finish(self, token, name, duration, attributes, error):
+        token["profile"].disable()
+        stack = self._stack()
+        stack.pop()
+        parent = stack[-1] if stack else None
+
+        peak_memory = None
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            token["peak"] = max(token["peak"], peak)
+            peak_memory = max(token["peak"] - token["base"], 0)
+            if parent is not None:
+                parent["peak"] = max(parent["peak"], token["peak"])
+            _reset_peak()
+
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            self._seconds[name] = self._seconds.get(name, 0.0) + duration
+            if peak_memory is not None:
+                self._peak_memory[name] = max(self._peak_memory.get(name, 0), peak_memory)
+
+        if parent is not None:
+            parent["profile"].enable()
+
+    def stats(self) -> Dict[str, pstats.Stats]:
+        """
+        ステージごとのcProfileの統計を返します。
+
+        Returns:
+            Dict[str, pstats.Stats]: ステージ名をキーとする統計
+        """
+        with self._lock:
+            profiles = list(self._profiles.items())
+        merged = {}
+        for (name, _), profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if name in merged:
+                merged[name].add(profile)
+            else:
+                merged[name] = pstats.Stats(profile)
+        return merged
+
+    def summary(self, top: int = 10) -> Dict[str, dict]:
+        """
+        ステージごとの集計結果を返します。
+
+        Args:
+            top (int): ステージごとに含める関数の数（自身の処理時間の降順）
+
+        Returns:
+            Dict[str, dict]: ステージ名をキーとし、calls, seconds, peak_memory_bytes,
+                             top_functionsを持つ辞書
+        """
+        stats = self.stats()
+        with self._lock:
+            names = list(self._calls)
+            result = {
+                name: {
+                    "calls": self._calls[name],
+                    "seconds": self._seconds[name],
+                    "peak_memory_bytes": self._peak_memory.get(name),
+                    "top_functions": []
+                }
+                for name in names
+            }
+        for name, stage_stats in stats.items():
+            if name not in result:
+                continue
+            entries = sorted(stage_stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            result[name]["top_functions"] = [
+                {
+                    "function": _function_label(func),
+                    "calls": nc,
+                    "tottime": tt,
+                    "cumtime": ct
+                }
+                for func, (cc, nc, tt, ct, callers) in entries[:top]
+            ]
+        return result
+
+    def collapsed_stacks(self) -> List[str]:
+        """
+        flamegraph.plやspeedscopeで読み込める折りたたみスタック形式の行を返します。
+
+        cProfileは呼び出し元と呼び出し先の組しか記録しないため、各関数の時間は
+        呼び出し元ごとの累積時間の比率で配分した近似値になります。値はマイクロ秒です。
+        各スタックの先頭はステージ名です。
+        """
+        lines = []
+        for name, stage_stats in sorted(self.stats().items()):
+            entries = stage_stats.stats
+            callees = {}
+            for func, (cc, nc, tt, ct, callers) in entries.items():
+                for caller, edge in callers.items():
+                    if caller in entries:
+                        callees.setdefault(caller, []).append((func, edge))
+            samples = {}
+            for func, (cc, nc, tt, ct, callers) in entries.items():
+                # ステージの開始時点で既に実行中だった関数から呼ばれた分をスタックの起点とする
+                if ct <= 0:
+                    continue
+                called_ct = sum(edge[3] for caller, edge in callers.items()
+                                if caller in entries and caller != func)
+                root_scale = max(ct - called_ct, 0.0) / ct
+                if root_scale > 0:
+                    self._collapse(entries, callees, func, [name], root_scale, samples)
+            for stack, micros in samples.items():
+                if micros >= 1:
+                    lines.append(f"{stack} {int(micros)}")
+        return lines
+
+    def _collapse(self, entries, callees, func, stack, scale, samples):
+        stack = stack + [_frame_label(func)]
+        _, _, tt, ct, _ = entries[func]
+        key = ";".join(stack)
+        samples[key] = samples.get(key, 0.0) + tt * scale * 1e6
+        if len(stack) >= self.max_stack_depth:
+            return
+        for callee, edge in callees.get(func, []):
+            callee_ct = entries[callee][3]
+            if callee_ct <= 0 or _frame_label(callee) in stack:
+                continue
+            self._collapse(entries, callees, callee, stack, scale * min(edge[3] / callee_ct, 1.0), samples)
+
+    def dump(self, output_dir: str) -> Dict[str, str]:
+        """
+        ステージごとのpstatsファイル、折りたたみスタック形式のファイル、JSONの集計結果を保存します。
+
+        Args:
+            output_dir (str): 保存先ディレクトリ
+
+        Returns:
+            Dict[str, str]: "summary", "collapsed"と各ステージ名をキーとする保存先のパス
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {}
+        for name, stage_stats in self.stats().items():
+            path = os.path.join(output_dir, f"{re.sub(r'[^0-9A-Za-z_.-]', '_', name)}.pstats")
+            stage_stats.dump_stats(path)
+            paths[name] = path
+
+        paths["collapsed"] = os.path.join(output_dir, "profile.collapsed")
+        with open(paths["collapsed"], "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+
+        paths["summary"] = os.path.join(output_dir, "summary.json")
+        with open(paths["summary"], "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return paths
+
+
+def _reset_peak():
+    # tracemalloc.reset_peakはPython 3.9以降でのみ利用可能
+    reset_peak = getattr(tracemalloc, "reset_peak", None)
+    if reset_peak is not None:
+        reset_peak()
+
+
+def _function_label(func):
+    filename, line, function = func
+    return f"{filename}:{line}({function})"
+
+
+def _frame_label(func):
+    filename, line, function = func
+    if filename == "~":
+        return function
+    return f"{function} ({os.path.basename(filename)}:{line})"
@@ -1,5 +1,6 @@
 from urllib.parse import urlparse
 import time
+import threading
 from collections import defaultdict
 # import asyncio
 
@@ -12,27 +13,51 @@ class RateLimiter:
         self.last_request_time = defaultdict(float)
         self.default_delay = default_delay
         self.last_domain = None  # 直前にリクエストしたドメインを保持
+        # robots.txtのCrawl-delayなど、ドメインごとに指定された最小間隔（秒）
+        self.host_delays = {}
+        self.lock = threading.Lock()
         # self.lock = asyncio.Lock()  # 非同期ロック
 
+    def set_host_delay(self, domain, delay):
+        """ドメインごとの最小間隔を設定する
+
+        Args:
+            domain (str): ドメイン（URLのnetloc）
+            delay (float, optional): 最小間隔（秒）。Noneの場合は設定を削除する
+        """
+        if delay is None:
+            self.host_delays.pop(domain, None)
+        else:
+            self.host_delays[domain] = delay
+
     def wait_if_needed(self, url):
         """同じドメインに連続してリクエストする場合のみ、待機時間を確保する
 
+        最小間隔が設定されたドメインは、間に他のドメインへのリクエストを挟んでも、
+        また複数のスレッドから呼び出されても、設定した間隔を空ける
+
         Args:
             url (str): リクエスト先のURL
         """
         domain = urlparse(url).netloc
-        current_time = time.time()
-        
-        # 直前のリクエストが同じドメインだった場合のみ待機
-        if domain == self.last_domain:
-            elapsed_time = current_time - self.last_request_time[domain]
-            if elapsed_time < self.default_delay:
-                wait_time = self.default_delay - elapsed_time
-                time.sleep(wait_time)
-        
-        # 現在の情報を記録
-        self.last_request_time[domain] = current_time
-        self.last_domain = domain 
+        with self.lock:
+            current_time = time.time()
+            request_time = current_time
+            host_delay = self.host_delays.get(domain)
+            if host_delay is not None:
+                request_time = max(current_time, self.last_request_time[domain] + host_delay)
+            # 直前のリクエストが同じドメインだった場合のみ待機
+            elif domain == self.last_domain:
+                request_time = max(current_time, self.last_request_time[domain] + self.default_delay)
+
+            # 現在の情報を記録（待機する場合は待機後の時刻を予約する）
+            self.last_request_time[domain] = request_time
+            self.last_domain = domain
+
+        # ロックの外で待機し、他のドメインへのリクエストを妨げないようにする
+        wait_time = request_time - current_time
+        if wait_time > 0:
+            time.sleep(wait_time)
 
     # async def wait_if_needed_async(self, url):
     #     """同じドメインに連続してリクエストする場合のみ、非同期で待機時間を確保する
@@ -53,4 +78,29 @@ class RateLimiter:
             
     #         # 現在の情報を記録
     #         self.last_request_time[domain] = time.time()
-    #         self.last_domain = domain 
\ No newline at end of file
+    #         self.last_domain = domain 
+
+class QueryRateLimiter:
+    """複数スレッドから呼び出される検索リクエストを、指定したQPS以下に間隔調整する"""
+
+    def __init__(self, qps=None):
+        """
+        Args:
+            qps (float, optional): 1秒あたりの最大リクエスト数。Noneの場合は制限しない
+        """
+        self.interval = 1.0 / qps if qps else 0.0
+        self.next_request_time = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """次のリクエストを送信してよい時刻まで待機する"""
+        if not self.interval:
+            return
+        with self.lock:
+            current_time = time.monotonic()
+            request_time = max(current_time, self.next_request_time)
+            self.next_request_time = request_time + self.interval
+        # ロックの外で待機し、他のスレッドは次の枠を予約できるようにする
+        wait_time = request_time - current_time
+        if wait_time > 0:
+            time.sleep(wait_time)
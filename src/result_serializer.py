@@ -0,0 +1,222 @@
+import gzip
+import io
+import json
+import threading
+from typing import Any, BinaryIO, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # orjsonは任意の依存関係
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstandardは任意の依存関係
+    zstandard = None
+
+# 利用可能な出力形式と圧縮形式
+JSON_FORMATS = ("pretty", "compact", "orjson", "ndjson")
+COMPRESSIONS = (None, "gzip", "zstd")
+COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# 圧縮ストリームへ書き込む際のチャンクサイズ
+WRITE_CHUNK_SIZE = 64 * 1024
+# compact形式で展開しながら書き込む入れ子の深さ。これより深い部分木はC実装のエンコーダで一括変換する
+COMPACT_STREAM_DEPTH = 6
+COMPACT_SEPARATORS = (",", ":")
+
+
+def validate_options(json_format: str, compression: Optional[str]) -> None:
+    """
+    出力形式と圧縮形式の組み合わせが利用可能かを検証します。
+
+    Args:
+        json_format (str): JSONの出力形式
+        compression (Optional[str]): 圧縮形式
+
+    Raises:
+        ValueError: 未対応の出力形式・圧縮形式が指定された場合
+        ImportError: zstdが指定されたがzstandardがインストールされていない場合
+    """
+    if json_format not in JSON_FORMATS:
+        raise ValueError("Invalid json_format. Choose from: " + ", ".join(JSON_FORMATS))
+    if compression not in COMPRESSIONS:
+        raise ValueError("Invalid compression. Choose from: gzip, zstd")
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("zstd圧縮を使用するにはzstandardパッケージが必要です")
+
+
+def file_extension(json_format: str, compression: Optional[str] = None) -> str:
+    """
+    出力形式と圧縮形式に対応するファイル拡張子を返します。
+
+    Args:
+        json_format (str): JSONの出力形式
+        compression (Optional[str]): 圧縮形式
+
+    Returns:
+        str: ".json" や ".ndjson.gz" などの拡張子
+    """
+    base = ".ndjson" if json_format == "ndjson" else ".json"
+    return base + COMPRESSION_EXTENSIONS[compression]
+
+
+def open_output(file_path: str, compression: Optional[str] = None, append: bool = False) -> BinaryIO:
+    """
+    圧縮形式に応じたバイナリ書き込みストリームを開きます。
+
+    Args:
+        file_path (str): 出力先のファイルパス
+        compression (Optional[str]): 圧縮形式（None, "gzip", "zstd"）
+        append (bool): 追記モードで開くかどうか
+
+    Returns:
+        BinaryIO: 書き込み用のバイナリストリーム
+    """
+    mode = "ab" if append else "wb"
+    if compression == "gzip":
+        # 圧縮率より速度を優先する
+        return gzip.open(file_path, mode, compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd圧縮を使用するにはzstandardパッケージが必要です")
+        raw = open(file_path, mode)
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    return open(file_path, mode)
+
+
+def encode_json(data: Any, json_format: str = "compact") -> bytes:
+    """
+    データを1つのJSONドキュメントのバイト列に変換します。
+
+    Args:
+        data (Any): 変換対象のデータ
+        json_format (str): JSONの出力形式
+
+    Returns:
+        bytes: UTF-8でエンコードされたJSON
+    """
+    if json_format in ("orjson", "ndjson") and orjson is not None:
+        return orjson.dumps(data)
+    if json_format == "pretty":
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    # C実装のエンコーダが使われるワンショット変換
+    return json.dumps(data, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode("utf-8")
+
+
+def _iter_compact_chunks(data: Any, depth: int = 0) -> Iterator[str]:
+    # 浅い階層の配列・オブジェクトだけを展開し、要素ごとにjson.dumps（C実装）で変換する
+    if depth >= COMPACT_STREAM_DEPTH or not data or not isinstance(data, (dict, list, tuple)) or (
+            isinstance(data, dict) and not all(isinstance(key, str) for key in data)):
+        # 文字列以外のキーの変換規則はjson.dumpsに任せる
+        yield json.dumps(data, ensure_ascii=False, separators=COMPACT_SEPARATORS)
+        return
+    if isinstance(data, dict):
+        opening = "{"
+        for key, value in data.items():
+            yield opening + json.dumps(key, ensure_ascii=False) + ":"
+            yield from _iter_compact_chunks(value, depth + 1)
+            opening = ","
+        yield "}"
+        return
+    opening = "["
+    for value in data:
+        yield opening
+        yield from _iter_compact_chunks(value, depth + 1)
+        opening = ","
+    yield "]"
+
+
+def write_json(fp: BinaryIO, data: Any, json_format: str = "pretty") -> None:
+    """
+    データをJSONとしてストリームに書き込みます。
+
+    pretty形式は文字列全体を組み立てず、JSONEncoder.iterencodeの出力を少しずつ書き込みます。
+    compact形式は浅い階層だけを展開し、COMPACT_STREAM_DEPTHより深い部分木ごとにC実装のエンコーダで
+    変換して書き込むため、ワンショット変換に近い速度で、メモリ使用量は最大の部分木の大きさに抑えられます。
+    orjson形式（orjsonがある場合はndjson形式も）はペイロード全体をバイト列に変換してから
+    書き込むため、ドキュメントの大きさ分のメモリを使います。
+
+    Args:
+        fp (BinaryIO): 書き込み先のバイナリストリーム
+        data (Any): 書き込むデータ
+        json_format (str): JSONの出力形式
+    """
+    if json_format in ("pretty", "compact"):
+        if json_format == "pretty":
+            chunks = json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(data)
+        else:
+            chunks = _iter_compact_chunks(data)
+        writer = io.TextIOWrapper(fp, encoding="utf-8", write_through=False)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+            writer.flush()
+        finally:
+            # 下位のストリームは呼び出し元で閉じる
+            writer.detach()
+        return
+
+    payload = memoryview(encode_json(data, json_format))
+    for start in range(0, len(payload), WRITE_CHUNK_SIZE):
+        fp.write(payload[start:start + WRITE_CHUNK_SIZE])
+    if json_format == "ndjson":
+        fp.write(b"\n")
+
+
+def save_json_file(file_path: str, data: Any, json_format: str = "pretty",
+                   compression: Optional[str] = None) -> None:
+    """
+    データをJSONファイルとして保存します。
+
+    Args:
+        file_path (str): 保存先のファイルパス
+        data (Any): 保存するデータ
+        json_format (str): JSONの出力形式
+        compression (Optional[str]): 圧縮形式
+    """
+    with open_output(file_path, compression) as fp:
+        write_json(fp, data, json_format)
+
+
+class NDJSONWriter:
+    """
+    バッチ処理の結果を1行1ドキュメントのNDJSONとして追記するライター。
+
+    書き込みはロックで直列化するため、複数のスレッドで1つのライターを共有できます
+    （圧縮したストリームに別々のハンドルから追記すると、行が混ざって壊れるため）。
+    """
+
+    def __init__(self, file_path: str, compression: Optional[str] = None):
+        """
+        Args:
+            file_path (str): 出力先のファイルパス
+            compression (Optional[str]): 圧縮形式（None, "gzip", "zstd"）
+        """
+        self.file_path = file_path
+        self.compression = compression
+        self._fp = open_output(file_path, compression, append=True)
+        self._lock = threading.Lock()
+
+    def write(self, record: Any) -> None:
+        """
+        1件のドキュメントを1行として書き込みます。
+
+        Args:
+            record (Any): 書き込むドキュメント
+        """
+        with self._lock:
+            write_json(self._fp, record, "ndjson")
+
+    def close(self) -> None:
+        """ストリームを閉じます"""
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
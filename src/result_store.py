@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import result_serializer
+
+
+class SQLiteResultStore:
+    """
+    スクレイピング結果をSQLiteに追記型で保存するストア。
+
+    URLごとにファイルを作成する代わりに、1つのデータベースへバッチ単位で書き込み、
+    URLと取得日時のインデックスでディレクトリを走査せずに参照できます。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            json_data BLOB,
+            markdown_data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_pages_url_fetched_at ON pages (url, fetched_at);
+        CREATE INDEX IF NOT EXISTS idx_pages_fetched_at ON pages (fetched_at);
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): SQLiteデータベースファイルのパス
+        """
+        self.db_path = db_path
+        # バックグラウンドの書き込みスレッドからも利用できるようにする
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> int:
+        """
+        複数の結果を1つのトランザクションでまとめて追記します。
+
+        Args:
+            records (List[Dict[str, Any]]): 以下のキーを持つ辞書のリスト
+                - url: スクレイピング対象のURL
+                - fetched_at: 取得日時（ISO 8601形式、省略時は現在時刻）
+                - json_data: JSON形式のデータ（省略可）
+                - markdown_data: Markdown形式のデータ（省略可）
+
+        Returns:
+            int: 書き込んだ件数
+        """
+        rows = []
+        for record in records:
+            json_data = record.get("json_data")
+            rows.append((
+                record["url"],
+                record.get("fetched_at") or datetime.now().isoformat(),
+                result_serializer.encode_json(json_data) if json_data is not None else None,
+                record.get("markdown_data")
+            ))
+        if not rows:
+            return 0
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO pages (url, fetched_at, json_data, markdown_data) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        指定したURLの最新の結果を取得します。
+
+        Args:
+            url (str): 対象のURL
+
+        Returns:
+            Optional[Dict[str, Any]]: 保存された結果。存在しない場合はNone
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, fetched_at, json_data, markdown_data FROM pages "
+                "WHERE url = ? ORDER BY fetched_at DESC, id DESC LIMIT 1",
+                (url,)
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def history(self, url: str) -> List[Dict[str, Any]]:
+        """
+        指定したURLの結果を取得日時の古い順にすべて取得します。
+
+        Args:
+            url (str): 対象のURL
+
+        Returns:
+            List[Dict[str, Any]]: 保存された結果のリスト
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, fetched_at, json_data, markdown_data FROM pages "
+                "WHERE url = ? ORDER BY fetched_at, id",
+                (url,)
+            ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def iter_fetched_between(self, start: Optional[str] = None, end: Optional[str] = None,
+                             batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        取得日時の範囲で結果を古い順に返します。
+
+        batch_size件ずつ読み出すため、範囲内の件数が多くてもメモリ使用量は一定です。
+        ロックは1回の読み出しごとに取得するため、反復中も他のスレッドから書き込めます。
+
+        Args:
+            start (Optional[str]): この日時以降（ISO 8601形式、Noneの場合は制限なし）
+            end (Optional[str]): この日時より前（ISO 8601形式、Noneの場合は制限なし）
+            batch_size (int): 1回に読み出す件数
+
+        Yields:
+            Dict[str, Any]: 保存された結果
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("fetched_at >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("fetched_at < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT url, fetched_at, json_data, markdown_data FROM pages "
+                f"{where}ORDER BY fetched_at, id",
+                params
+            )
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_record(row)
+        finally:
+            with self._lock:
+                cursor.close()
+
+    def urls(self) -> List[str]:
+        """保存されているURLの一覧を返す"""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT url FROM pages ORDER BY url").fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """データベース接続を閉じます"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _row_to_record(row) -> Dict[str, Any]:
+        url, fetched_at, json_data, markdown_data = row
+        return {
+            "url": url,
+            "fetched_at": fetched_at,
+            "json_data": json.loads(json_data) if json_data is not None else None,
+            "markdown_data": markdown_data
+        }
@@ -0,0 +1,82 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class BackgroundResultWriter:
+    """
+    スクレイピング結果の保存をバックグラウンドのスレッドで行うライター。
+
+    キューのサイズに上限を設けることで、書き込みが取得に追いつかない場合は
+    submitがブロックし、メモリ使用量が増え続けないようにします。
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue_size: int = 32):
+        """
+        Args:
+            max_queue_size (int): 書き込み待ちのジョブの最大数
+        """
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="BackgroundResultWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Callable[[], Optional[Dict[str, Any]]], result: Dict[str, Any],
+               timeout: Optional[float] = None) -> None:
+        """
+        保存ジョブをキューに追加します。キューが満杯の場合は空くまで待機します。
+
+        ジョブの戻り値の辞書はresultに反映され、例外が発生した場合は
+        result["save_error"]にエラー内容が設定されます。
+
+        Args:
+            job (Callable[[], Optional[Dict[str, Any]]]): 保存処理を行う関数
+            result (Dict[str, Any]): 保存結果を反映する辞書
+            timeout (Optional[float]): キューが空くまでの最大待機時間（秒）
+
+        Raises:
+            RuntimeError: close後に呼び出された場合
+            queue.Full: timeout内にキューが空かなかった場合
+        """
+        if self._closed:
+            raise RuntimeError("BackgroundResultWriterは既に閉じられています")
+        self._queue.put((job, result), timeout=timeout)
+
+    def flush(self) -> None:
+        """キューに追加済みのすべてのジョブの完了を待ちます"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """残りのジョブを書き込んでからスレッドを終了します"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                job, result = item
+                try:
+                    updates = job()
+                    if updates:
+                        result.update(updates)
+                except Exception as e:
+                    self.logger.error(f"バックグラウンドでの保存に失敗しました: {str(e)}")
+                    result["save_error"] = str(e)
+            finally:
+                self._queue.task_done()
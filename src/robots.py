@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+
+class RobotsPolicy:
+    """1つのオリジン（スキーム + ホスト）のrobots.txtの判定結果"""
+
+    def __init__(self, origin: str, body: Optional[str], status: Optional[int], fetched_at: float,
+                 expires_at: float, user_agent: str = "*"):
+        """
+        Args:
+            origin (str): "https://example.com"のようなオリジン
+            body (str, optional): robots.txtの内容
+            status (int, optional): 取得時のステータスコード。接続エラーの場合はNone
+            fetched_at (float): 取得した時刻（UNIX時間）
+            expires_at (float): キャッシュの有効期限（UNIX時間）
+            user_agent (str): 判定に使うユーザーエージェントのトークン
+        """
+        self.origin = origin
+        self.body = body
+        self.status = status
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.user_agent = user_agent
+
+        self._parser = RobotFileParser()
+        if status is not None and 200 <= status < 300:
+            self._parser.parse((body or "").splitlines())
+        elif status is not None and 400 <= status < 500 and status != 429:
+            # RFC 9309: 4xx（robots.txtが存在しない）はすべて許可
+            self._parser.allow_all = True
+        else:
+            # RFC 9309: サーバーエラーや接続できない場合はすべて拒否とみなす
+            self._parser.disallow_all = True
+        # 取得のたびに参照するため、Crawl-delayは生成時に一度だけ求める
+        delay = self._parser.crawl_delay(user_agent) if self._parser.last_checked else None
+        self.crawl_delay: Optional[float] = float(delay) if delay is not None else None
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires_at
+
+    def can_fetch(self, url: str) -> bool:
+        """URLの取得が許可されているかどうかを返す"""
+        return self._parser.can_fetch(self.user_agent, url)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "origin": self.origin,
+            "status": self.status,
+            "body": self.body,
+            "fetched_at": self.fetched_at,
+        }
+
+
+class RobotsCache:
+    """
+    ホストごとのrobots.txtを取得してキャッシュするクラス。
+
+    robots.txtはオリジンごとに1回だけ取得し、ttlの間はメモリ上の辞書から参照するため、
+    2回目以降の判定でネットワークやディスクへのアクセスは発生しません。cache_dirを指定すると
+    取得結果をオリジンごとのJSONファイルに保存し、プロセスをまたいで再利用します。
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, user_agent: str = "*",
+                 ttl: float = 24 * 60 * 60, error_ttl: float = 5 * 60,
+                 cache_dir: Optional[str] = None, timeout: float = 10, verify: bool = True):
+        """
+        Args:
+            session (requests.Session, optional): robots.txtの取得に使うセッション。
+                                                  指定がない場合は新しく作成する
+            user_agent (str): robots.txtのUser-agent行と照合するトークン
+            ttl (float): 取得したrobots.txtの有効期間（秒）
+            error_ttl (float): 取得に失敗した場合（すべて拒否とみなす）の有効期間（秒）
+            cache_dir (str, optional): 取得結果を保存するディレクトリ。Noneの場合はメモリ上のみ
+            timeout (float): 取得のタイムアウト（秒）
+            verify (bool): SSLの検証を行うかどうか
+        """
+        self.session = session or requests.Session()
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.verify = verify
+        self.logger = logging.getLogger(__name__)
+        self._policies: Dict[str, RobotsPolicy] = {}
+        self._lock = threading.Lock()
+        # 同じオリジンのrobots.txtを複数のスレッドが同時に取得しないためのロック
+        self._origin_locks: Dict[str, threading.Lock] = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def origin_of(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def policy(self, url: str) -> RobotsPolicy:
+        """
+        URLのオリジンのRobotsPolicyを返します。キャッシュにない場合や期限切れの場合のみ取得します。
+
+        Args:
+            url (str): 判定対象のURL
+
+        Returns:
+            RobotsPolicy: オリジンのrobots.txtの判定結果
+        """
+        origin = self.origin_of(url)
+        policy = self._policies.get(origin)
+        if policy is not None and not policy.is_expired():
+            return policy
+
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            # 待機中に他のスレッドが取得した場合はその結果を使う
+            policy = self._policies.get(origin)
+            if policy is None or policy.is_expired():
+                policy = self._load_from_disk(origin)
+                if policy is None or policy.is_expired():
+                    policy = self._fetch(origin)
+                    self._save_to_disk(policy)
+                self._policies[origin] = policy
+        return policy
+
+    def can_fetch(self, url: str) -> bool:
+        """URLの取得がrobots.txtで許可されているかどうかを返す"""
+        return self.policy(url).can_fetch(url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """URLのホストのCrawl-delay（秒）を返す。指定がない場合はNone"""
+        return self.policy(url).crawl_delay
+
+    def clear(self) -> None:
+        """メモリ上のキャッシュを破棄します（ディスクのキャッシュは残る）"""
+        with self._lock:
+            self._policies.clear()
+
+    def _fetch(self, origin: str) -> RobotsPolicy:
+        status = body = None
+        try:
+            response = self.session.get(f"{origin}/robots.txt", timeout=self.timeout, verify=self.verify)
+            status = response.status_code
+            if 200 <= status < 300:
+                body = response.text
+        except requests.RequestException as e:
+            self.logger.warning(f"robots.txtの取得に失敗しました ({origin}): {str(e)}")
+        now = time.time()
+        return RobotsPolicy(origin, body, status, now, self._expires_at(status, now), self.user_agent)
+
+    def _expires_at(self, status: Optional[int], fetched_at: float) -> float:
+        ok = status is not None and status < 500 and status != 429
+        return fetched_at + (self.ttl if ok else self.error_ttl)
+
+    def _cache_path(self, origin: str) -> str:
+        name = hashlib.sha1(origin.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _load_from_disk(self, origin: str) -> Optional[RobotsPolicy]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(origin), encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # 有効期限は保存時ではなく、このインスタンスのttlで判定する
+        status = record.get("status")
+        return RobotsPolicy(origin, record.get("body"), status, record["fetched_at"],
+                            self._expires_at(status, record["fetched_at"]), self.user_agent)
+
+    def _save_to_disk(self, policy: RobotsPolicy) -> None:
+        if not self.cache_dir:
+            return
+        path = self._cache_path(policy.origin)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(policy.to_dict(), f, ensure_ascii=False)
+            # 書き込み途中のファイルを読まないよう、書き終えてから置き換える
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.logger.warning(f"robots.txtのキャッシュを保存できませんでした ({policy.origin}): {str(e)}")
@@ -0,0 +1,270 @@
+import asyncio
+import queue
+import threading
+from dataclasses import dataclass
+from functools import partial
+from importlib import import_module
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class EngineCapabilities:
+    """
+    検索エンジンの性能特性と制限。WebSearchが並列度や呼び出し間隔を決めるために使用します。
+
+    Attributes:
+        max_concurrency (int): 同時に実行できるリクエスト数
+        qps (Optional[float]): 1秒あたりの最大リクエスト数（Noneの場合は制限なし）
+        daily_quota (Optional[int]): 1日あたりの最大リクエスト数（Noneの場合は制限なし）
+        cost_per_query (float): 1リクエストあたりの費用（USD）
+        max_results_per_request (Optional[int]): 1リクエストで取得できる最大件数
+        native_async (bool): asearchがスレッドを使わずに非同期で実行されるかどうか
+    """
+    max_concurrency: int = 1
+    qps: Optional[float] = None
+    daily_quota: Optional[int] = None
+    cost_per_query: float = 0.0
+    max_results_per_request: Optional[int] = None
+    native_async: bool = False
+
+
+class PrefetchIterator:
+    """
+    イテレータをバックグラウンドのスレッドで先読みするイテレータ。
+
+    利用側が前の結果を処理している間も次の結果の取得を進めます。
+    closeされると先読みスレッドは次の要素の取得前に停止します。
+    """
+
+    _DONE = object()
+
+    def __init__(self, make_iterator: Callable[[], Iterator[Any]], buffer_size: int = 16):
+        """
+        Args:
+            make_iterator (Callable[[], Iterator[Any]]): 先読みスレッドで呼び出すイテレータの生成関数
+            buffer_size (int): 先読みしておく最大件数
+        """
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._produce, args=(make_iterator,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        # closeされた場合に満杯のキューで待ち続けないよう、タイムアウト付きで待機する
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, make_iterator) -> None:
+        try:
+            iterator = make_iterator()
+            try:
+                for item in iterator:
+                    if not self._put((item, None)):
+                        break
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+        except Exception as e:
+            self._put((self._DONE, e))
+            return
+        self._put((self._DONE, None))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        item, error = self._queue.get()
+        if item is self._DONE:
+            self._finished = True
+            if error is not None:
+                raise error
+            raise StopIteration
+        return item
+
+    def close(self) -> None:
+        """先読みを停止します"""
+        self._finished = True
+        self._stop.set()
+        # 別スレッドで__next__が待機している場合に終了させる
+        try:
+            self._queue.put_nowait((self._DONE, None))
+        except queue.Full:
+            pass
+
+
+class SearchEngine:
+    """
+    検索エンジンの共通インターフェース。
+
+    サブクラスはsearch、normalizeを実装し、CAPABILITIESで性能特性を宣言します。
+    asearchはデフォルトではsearchをスレッドプールで実行します。
+    """
+
+    name = ""
+    CAPABILITIES = EngineCapabilities()
+
+    def search(self, query: str, max_results: int = 4, **kwargs) -> Any:
+        """
+        検索を実行し、エンジン固有の形式で結果を返します。
+
+        Args:
+            query (str): 検索クエリ
+            max_results (int): 取得件数
+            **kwargs: エンジン固有のパラメータ
+
+        Returns:
+            Any: 検索結果（エンジンによって形式が異なる）
+        """
+        raise NotImplementedError
+
+    def request_count(self, max_results: int = 4) -> int:
+        """
+        searchを1回呼び出したときに送信するAPIリクエストの数を返します。
+        search_batchはこの数だけクォータを消費します。
+
+        Args:
+            max_results (int): 取得件数
+
+        Returns:
+            int: APIリクエストの数
+        """
+        return 1
+
+    def search_paced(self, query: str, acquire: Callable[[], None], max_results: int = 4, **kwargs) -> Any:
+        """
+        APIリクエストごとにacquireを呼び出してから検索を実行します（レート制限用）。
+
+        デフォルトではrequest_countの回数だけacquireを呼び出してからsearchを実行します。
+        複数のリクエストに分けて送信するエンジンはオーバーライドし、各リクエストの直前に呼び出します。
+
+        Args:
+            query (str): 検索クエリ
+            acquire (Callable[[], None]): リクエストを送信してよいときまで待機する関数
+            max_results (int): 取得件数
+            **kwargs: エンジン固有のパラメータ
+
+        Returns:
+            Any: 検索結果（エンジンによって形式が異なる）
+        """
+        for _ in range(self.request_count(max_results)):
+            acquire()
+        return self.search(query, max_results=max_results, **kwargs)
+
+    async def asearch(self, query: str, max_results: int = 4, **kwargs) -> Any:
+        """
+        searchの非同期版。デフォルトではイベントループをブロックしないよう
+        スレッドプールでsearchを実行します。
+
+        Args:
+            query (str): 検索クエリ
+            max_results (int): 取得件数
+            **kwargs: エンジン固有のパラメータ
+
+        Returns:
+            Any: 検索結果（エンジンによって形式が異なる）
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(self.search, query, max_results=max_results, **kwargs))
+
+    def iter_search(self, query: str, max_results: int = 4, **kwargs) -> Iterator[Dict[str, str]]:
+        """
+        検索結果を標準化された形式で1件ずつ返します。
+
+        デフォルトではsearchの完了後にnormalizeした結果を返します。
+        ページ単位で結果を受け取れるエンジンはオーバーライドし、届いた順に返します。
+
+        Args:
+            query (str): 検索クエリ
+            max_results (int): 取得件数
+            **kwargs: エンジン固有のパラメータ
+
+        Yields:
+            Dict[str, str]: "title", "link", "snippet", "source"を持つ辞書
+        """
+        yield from self.normalize(self.search(query, max_results=max_results, **kwargs))
+
+    async def aiter_search(self, query: str, max_results: int = 4, **kwargs) -> AsyncIterator[Dict[str, str]]:
+        """
+        iter_searchの非同期版。iter_searchを別スレッドで先読みし、届いた順に返します。
+
+        Args:
+            query (str): 検索クエリ
+            max_results (int): 取得件数
+            **kwargs: エンジン固有のパラメータ
+
+        Yields:
+            Dict[str, str]: "title", "link", "snippet", "source"を持つ辞書
+        """
+        loop = asyncio.get_running_loop()
+        iterator = PrefetchIterator(partial(self.iter_search, query, max_results=max_results, **kwargs))
+        done = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(None, next, iterator, done)
+                if item is done:
+                    break
+                yield item
+        finally:
+            iterator.close()
+
+    def normalize(self, results: Any) -> List[Dict[str, str]]:
+        """
+        searchの結果を標準化された形式に変換します。
+
+        Args:
+            results: searchメソッドから返された検索結果
+
+        Returns:
+            List[Dict[str, str]]: "title", "link", "snippet", "source"を持つ辞書のリスト
+        """
+        raise NotImplementedError
+
+    def capabilities(self) -> EngineCapabilities:
+        """エンジンの性能特性と制限を返す"""
+        return self.CAPABILITIES
+
+
+# エンジン名と生成関数の対応。生成関数は初回利用時に呼び出される
+ENGINE_REGISTRY: Dict[str, Callable[[], SearchEngine]] = {}
+
+
+def register_engine(name: str, factory: Callable[[], SearchEngine]) -> None:
+    """
+    検索エンジンの生成関数をグローバルなレジストリに登録します。
+
+    Args:
+        name (str): エンジン名
+        factory (Callable[[], SearchEngine]): SearchEngineを返す関数
+    """
+    ENGINE_REGISTRY[name] = factory
+
+
+def lazy_factory(module_name: str, class_name: str, **kwargs) -> Callable[[], SearchEngine]:
+    """
+    モジュールの読み込みをインスタンス生成時まで遅延させる生成関数を作成します。
+
+    Args:
+        module_name (str): エンジンを定義しているモジュール名
+        class_name (str): エンジンのクラス名
+        **kwargs: コンストラクタに渡す引数
+
+    Returns:
+        Callable[[], SearchEngine]: 生成関数
+    """
+    def factory():
+        return getattr(import_module(module_name), class_name)(**kwargs)
+    return factory
+
+
+register_engine("google", lazy_factory("src.google_custom_search", "GoogleCustomSearch"))
+register_engine("bing", lazy_factory("src.bing_web_search", "BingWebSearch"))
+register_engine("duckduckgo", lazy_factory("src.duckduckgo_instant_answer", "DuckDuckGoInstantAnswer"))
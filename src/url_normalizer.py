@@ -0,0 +1,138 @@
+import fnmatch
+import re
+import string
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 計測用でページの内容に影響しないクエリパラメータ（fnmatch形式）
+DEFAULT_TRACKING_PARAMS = (
+    'utm_*', 'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'igshid', 'spm', 'ref_src',
+)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+DUPLICATE_SLASHES_PATTERN = re.compile(r'/{2,}')
+PERCENT_ENCODED_PATTERN = re.compile(r'%([0-9A-Fa-f]{2})')
+# RFC 3986でエンコードする必要のない文字
+UNRESERVED_CHARS = frozenset(string.ascii_letters + string.digits + '-._~')
+
+
+def _normalize_percent_encoding(match: re.Match) -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED_CHARS else match.group(0).upper()
+
+
+class UrlNormalizer:
+    """
+    同じページを指すURLの表記ゆれを正規化し、重複判定やキャッシュのキーとなる文字列を返します。
+
+    正規化したURLはキーとして使うためのもので、実際の取得には元のURLを使います
+    （strip_wwwやignore_schemeで別ホスト・別スキームに変わる場合があるため）。
+    """
+
+    def __init__(self, strip_tracking_params: bool = True,
+                 tracking_params: Iterable[str] = DEFAULT_TRACKING_PARAMS,
+                 remove_fragment: bool = True, lowercase_host: bool = True,
+                 remove_default_port: bool = True, strip_www: bool = True,
+                 ignore_scheme: bool = True, strip_trailing_slash: bool = True,
+                 sort_query: bool = True):
+        """
+        Args:
+            strip_tracking_params (bool): tracking_paramsに一致するクエリパラメータを除くかどうか
+            tracking_params (Iterable[str]): 除くクエリパラメータ名（"utm_*"のようなfnmatch形式）
+            remove_fragment (bool): #以降を除くかどうか
+            lowercase_host (bool): スキームとホスト名を小文字にするかどうか
+            remove_default_port (bool): スキームの既定のポート（:80、:443）を除くかどうか
+            strip_www (bool): ホスト名先頭の"www."を除くかどうか
+            ignore_scheme (bool): httpとhttpsを同じURLとみなすかどうか
+            strip_trailing_slash (bool): パス末尾の"/"を除くかどうか
+            sort_query (bool): クエリパラメータを名前順に並べ替えるかどうか
+        """
+        self.strip_tracking_params = strip_tracking_params
+        self.tracking_params = tuple(tracking_params)
+        self.remove_fragment = remove_fragment
+        self.lowercase_host = lowercase_host
+        self.remove_default_port = remove_default_port
+        self.strip_www = strip_www
+        self.ignore_scheme = ignore_scheme
+        self.strip_trailing_slash = strip_trailing_slash
+        self.sort_query = sort_query
+        # 完全一致のパラメータ名は集合で判定し、ワイルドカードを含むものだけfnmatchで照合する
+        self._exact_params = {name for name in self.tracking_params if not any(c in name for c in '*?[')}
+        self._param_patterns = [re.compile(fnmatch.translate(name))
+                                for name in self.tracking_params if name not in self._exact_params]
+
+    def _is_tracking_param(self, name: str) -> bool:
+        name = name.lower()
+        return name in self._exact_params or any(pattern.match(name) for pattern in self._param_patterns)
+
+    def normalize(self, url: str) -> str:
+        """
+        URLを正規化します。http(s)以外のURLや解析できないURLは前後の空白を除いてそのまま返します。
+
+        Args:
+            url (str): 正規化するURL
+
+        Returns:
+            str: 正規化したURL
+        """
+        url = url.strip()
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS or not parts.hostname:
+            return url
+
+        # urlsplitのhostnameは常に小文字のため、大文字小文字を保つ場合はnetlocから取り出す
+        host = parts.hostname
+        if not self.lowercase_host and ':' not in host:
+            host = parts.netloc.rpartition('@')[2].split(':')[0]
+        if self.strip_www and host.lower().startswith('www.'):
+            host = host[4:]
+        # hostnameではIPv6アドレスの角括弧が外れるため、ポートと区別できるよう付け直す
+        if ':' in host:
+            host = f"[{host}]"
+        if port is not None and not (self.remove_default_port and port == DEFAULT_PORTS[scheme]):
+            host = f"{host}:{port}"
+        if parts.username:
+            userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+            host = f"{userinfo}@{host}"
+        if self.ignore_scheme:
+            scheme = 'https'
+
+        # パーセントエンコードの表記ゆれ（%7eと~、%2fと%2Fなど）をそろえる
+        path = PERCENT_ENCODED_PATTERN.sub(_normalize_percent_encoding, parts.path)
+        path = DUPLICATE_SLASHES_PATTERN.sub('/', path) or '/'
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip('/') or '/'
+
+        query = parts.query
+        if query and (self.strip_tracking_params or self.sort_query):
+            params = parse_qsl(query, keep_blank_values=True)
+            if self.strip_tracking_params:
+                params = [(name, value) for name, value in params if not self._is_tracking_param(name)]
+            if self.sort_query:
+                params.sort()
+            query = urlencode(params)
+
+        fragment = '' if self.remove_fragment else parts.fragment
+        return urlunsplit((scheme, host, path, query, fragment))
+
+
+DEFAULT_URL_NORMALIZER = UrlNormalizer()
+
+
+def canonicalize_url(url: str, normalizer: Optional[UrlNormalizer] = None) -> str:
+    """
+    デフォルトの規則（またはnormalizer）でURLを正規化します。
+
+    Args:
+        url (str): 正規化するURL
+        normalizer (UrlNormalizer, optional): 使用する規則。指定がない場合はDEFAULT_URL_NORMALIZER
+
+    Returns:
+        str: 正規化したURL
+    """
+    return (normalizer or DEFAULT_URL_NORMALIZER).normalize(url)
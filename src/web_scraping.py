@@ -1,6 +1,6 @@
 import requests
-from bs4 import BeautifulSoup, NavigableString, Comment
-from typing import Dict, Optional, Union, Any, Tuple, List, Set
+from bs4 import BeautifulSoup, NavigableString, Comment, Tag
+from typing import Dict, Optional, Union, Any, Tuple, List, Set, Iterable, Callable, Iterator
 import logging
 import re
 from urllib.parse import urlparse, urljoin
@@ -8,10 +8,33 @@ import json
 from datetime import datetime
 import os
 from .rate_limiter import RateLimiter
+from . import result_serializer
+from .result_store import SQLiteResultStore
+from .result_writer import BackgroundResultWriter
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from .profiling import PipelineProfiler
+from .content_extraction import select_main_content
+from .near_duplicates import MIN_FINGERPRINT_TOKENS, FingerprintIndex, extract_text, simhash
+from .url_normalizer import UrlNormalizer, DEFAULT_URL_NORMALIZER
+from .robots import RobotsCache
+from .dns_cache import DNSCache, DNSCachingAdapter
+from .http_transport import TRANSPORTS, ContentTooLargeError, HTTPXSession, accept_encoding
 # import asyncio
 # import aiohttp
 import chardet
 import time
+from functools import partial
+from contextlib import contextmanager
+
+def approximate_token_count(text: str) -> int:
+    """
+    トークン数を概算します（max_tokens指定時のデフォルトのトークナイザ）。
+
+    日本語などの非ASCII文字は1文字を1トークン、ASCII文字は4文字を1トークンとして数えます。
+    正確な数が必要な場合は、tiktokenなどを使った関数をtokenizerに指定してください。
+    """
+    non_ascii = sum(1 for c in text if ord(c) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
 
 class WebScraper:
     # クラス変数としてリストを定義
@@ -26,7 +49,17 @@ class WebScraper:
     HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
     PARAGRAPH_TAGS = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol']
     CONTENT_TAGS = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li']
+    # json_to_markdown_budgetedで1つの単位として出力する要素
+    MARKDOWN_BLOCK_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'pre', 'table',
+                           'blockquote', 'a', 'strong', 'b', 'em', 'i', 'code', 'br'}
     EMPTY_HEADING_MARKERS = ["#", "##", "###", "####", "#####", "######"]
+    # "full": ページ全体を変換、"content": 本文と判定したブロックのみを変換
+    EXTRACTION_MODES = ("full", "content")
+    # prune=Trueの場合に子孫をたどらずに除外する要素（タグ名、[属性]、[属性=値]、:hidden）
+    DEFAULT_PRUNE_SELECTORS = (
+        'nav', 'footer', 'aside', 'form', 'svg', 'iframe',
+        '[role=navigation]', '[aria-hidden=true]', ':hidden',
+    )
     
     # 正規表現パターンを事前コンパイル（すべてクラス変数として定義）
     URL_PATH_PATTERN = re.compile(r'^https?://|^/[a-zA-Z0-9/]')
@@ -48,15 +81,75 @@ class WebScraper:
         re.compile(r'%[0-9A-Fa-f]{2}'),  # URLエンコード
     ]
     JAPANESE_CHARS_PATTERN = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]')
+    PRUNE_ATTRIBUTE_SELECTOR_PATTERN = re.compile(r'^\[([\w:-]+)(?:=["\']?([^"\'\]]*)["\']?)?\]$')
+    HIDDEN_STYLE_PATTERN = re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden', re.I)
     
-    def __init__(self, verify_ssl=True):
+    def __init__(self, verify_ssl=True, json_format="pretty", compression=None,
+                 instrumentation: Optional[Instrumentation] = None, profile: bool = False,
+                 extraction: str = "full", prune: Union[bool, Iterable[str]] = False,
+                 url_normalizer: Optional[UrlNormalizer] = None,
+                 robots: Union[bool, RobotsCache] = False,
+                 dns_cache: Union[bool, DNSCache] = False,
+                 transport: str = "requests", http2: bool = True,
+                 max_content_bytes: Optional[int] = 50 * 1024 * 1024):
         """
         WebScraperクラスの初期化
         
         Args:
             verify_ssl (bool): SSLの検証を行うかどうか。デフォルトはTrue
+            json_format (str): JSONの保存形式。"pretty", "compact", "orjson", "ndjson"のいずれか。
+                               "ndjson"の場合はscrape_multiple_urlsの1回の呼び出しごとに1ファイルへ追記する
+            compression (str, optional): JSONファイルの圧縮形式。None, "gzip", "zstd"のいずれか
+            instrumentation (Instrumentation, optional): 各ステージの所要時間を通知する計測器。
+                                                         指定がない場合は計測しない
+            profile (bool): Trueの場合、ステージごとのcProfileの統計とピークメモリを
+                            self.profilerに収集する。結果はself.profiler.dump()で保存する
+            extraction (str): HTMLの変換範囲。"full"はページ全体、"content"はテキスト密度とリンク密度から
+                              本文と判定したブロックのみを変換し、ナビゲーションやフッターなどは変換しない
+            prune (bool or Iterable[str]): 子孫をたどらずに除外する要素。Trueの場合はDEFAULT_PRUNE_SELECTORS。
+                                           タグ名、"[role=navigation]"のような属性、":hidden"
+                                           （hidden属性またはdisplay:none等のインラインスタイル）を指定できる
+            url_normalizer (UrlNormalizer, optional): scrape_multiple_urlsで同じページを指すURLを
+                                                      判定する規則。指定がない場合はDEFAULT_URL_NORMALIZER
+            robots (bool or RobotsCache): Trueの場合、fetch_htmlの前にrobots.txtを確認し、禁止されたURLは
+                                          取得しない。Crawl-delayはホストごとのリクエスト間隔に反映する。
+                                          RobotsCacheを渡すとTTLやディスクキャッシュの設定、複数の
+                                          WebScraperでのキャッシュの共有ができる
+            dns_cache (bool or DNSCache): Trueの場合、名前解決の結果をプロセス内でキャッシュし、
+                                          複数のアドレスにはHappy Eyeballsで接続する。scrape_multiple_urlsでは
+                                          取得前にすべてのホストを並行して解決する。解決時間はdns_cache.stats()で確認できる
+            transport (str): HTTPクライアント。"requests"（HTTP/1.1）または"httpx"
+                             （同じオリジンへの並行リクエストをHTTP/2で多重化する。httpxとh2が必要）
+            http2 (bool): transport="httpx"の場合にHTTP/2を有効にするかどうか
+            max_content_bytes (int, optional): 展開後の本文の最大バイト数。受信しながら展開し、
+                                               超えた時点で取得を中止する（圧縮爆弾対策）。Noneの場合は制限しない
+
+        Raises:
+            ValueError: json_format, compression, extraction, prune, transportに未対応の値が指定された場合、
+                        またはtransport="httpx"とdns_cacheを同時に指定した場合
+            ImportError: transport="httpx"でhttpxがインストールされていない場合
         """
+        result_serializer.validate_options(json_format, compression)
+        if transport not in TRANSPORTS:
+            raise ValueError(f"未対応のtransportです: {transport}（{', '.join(TRANSPORTS)}のいずれか）")
+        if transport == "httpx" and dns_cache:
+            raise ValueError("dns_cacheはtransport='requests'の場合のみ使用できます")
+        self.transport = transport
+        if extraction not in self.EXTRACTION_MODES:
+            raise ValueError(f"未対応の抽出モードです: {extraction}（{', '.join(self.EXTRACTION_MODES)}のいずれか）")
+        self.extraction = extraction
+        self.url_normalizer = url_normalizer or DEFAULT_URL_NORMALIZER
+        # _parse_nodeで子要素をたどらずに除外する要素のid（html_to_jsonの呼び出しごとに設定）
+        self._pruned_nodes = frozenset()
+        self._prune_tags, self._prune_attributes, self._prune_hidden = self._parse_prune_selectors(
+            self.DEFAULT_PRUNE_SELECTORS if prune is True else (prune or ()))
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.profiler = None
+        if profile:
+            self._attach_profiler(PipelineProfiler())
         self.verify_ssl = verify_ssl
+        self.json_format = json_format
+        self.compression = compression
         self.logger = logging.getLogger(__name__)
         self.exclude_links = False
         self.exclude_symbol_semicolon = False  # 記号で始まり;で終わる要素を除外
@@ -69,17 +162,116 @@ class WebScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
+            # 展開できる場合はbrやzstdも提示し、テキストの多いページの転送量を減らす
+            'Accept-Encoding': accept_encoding(transport),
         })
+        if transport == "httpx":
+            self.session = HTTPXSession(headers=self.session.headers, http2=http2, verify=verify_ssl)
+        
+        if dns_cache is True:
+            dns_cache = DNSCache(instrumentation=self.instrumentation)
+        self.dns_cache: Optional[DNSCache] = dns_cache or None
+        if self.dns_cache is not None:
+            adapter = DNSCachingAdapter(self.dns_cache)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        
+        # robots.txtはHTMLと同じセッション（接続プール）で取得する
+        if robots is True:
+            robots = RobotsCache(session=self.session, verify=verify_ssl)
+        self.robots: Optional[RobotsCache] = robots or None
         
         # リクエストの設定
         self.request_timeout = 30  # タイムアウト（秒）
         self.max_retries = 3      # 最大リトライ回数
         self.retry_delay = 0.5     # リトライ間隔（秒）
+        self.max_content_bytes = max_content_bytes
+        self.download_chunk_size = 64 * 1024  # 受信・展開の単位（バイト）
+
+    @classmethod
+    def _parse_prune_selectors(cls, selectors: Iterable[str]) -> Tuple[Set[str], List[Tuple[str, Optional[str]]], bool]:
+        tags = set()
+        attributes = []
+        hidden = False
+        for selector in selectors:
+            selector = selector.strip()
+            if selector == ':hidden':
+                hidden = True
+                attributes.append(('hidden', None))
+                continue
+            match = cls.PRUNE_ATTRIBUTE_SELECTOR_PATTERN.match(selector)
+            if match:
+                name, value = match.groups()
+                attributes.append((name.lower(), value.lower() if value is not None else None))
+            elif re.fullmatch(r'[a-zA-Z][\w-]*', selector):
+                tags.add(selector.lower())
+            else:
+                raise ValueError(f"未対応の除外セレクタです: {selector}")
+        return tags, attributes, hidden
+
+    def _matches_prune_rules(self, tag: Tag) -> bool:
+        if tag.name in self._prune_tags:
+            return True
+        attrs = tag.attrs
+        if not attrs:
+            return False
+        for name, value in self._prune_attributes:
+            actual = attrs.get(name)
+            if actual is None:
+                continue
+            if value is None:
+                return True
+            if isinstance(actual, list):
+                if value in (item.lower() for item in actual):
+                    return True
+            elif actual.lower() == value:
+                return True
+        return False
+
+    def _attach_profiler(self, profiler: PipelineProfiler) -> None:
+        # 共有のNULL_INSTRUMENTATIONにフックを追加しないよう、専用のインスタンスを作成する
+        if self.instrumentation is NULL_INSTRUMENTATION:
+            self.instrumentation = Instrumentation()
+        self.instrumentation.add_hook(profiler)
+        profiler.start_tracing()
+        self.profiler = profiler
+
+    @contextmanager
+    def profiling(self, output_dir: Optional[str] = None, trace_memory: bool = True):
+        """
+        with文の範囲内のスクレイピングをステージごとにプロファイリングします。
+
+        Args:
+            output_dir (str, optional): 終了時に結果を保存するディレクトリ。
+                                        指定がない場合は保存しない
+            trace_memory (bool): ステージごとのピークメモリを計測するかどうか
+
+        Yields:
+            PipelineProfiler: 収集した結果を参照・保存できるプロファイラ
+        """
+        previous_instrumentation = self.instrumentation
+        previous_profiler = self.profiler
+        profiler = PipelineProfiler(trace_memory=trace_memory)
+        self._attach_profiler(profiler)
+        try:
+            yield profiler
+        finally:
+            profiler.stop_tracing()
+            self.instrumentation.remove_hook(profiler)
+            self.instrumentation = previous_instrumentation
+            self.profiler = previous_profiler
+            if output_dir:
+                profiler.dump(output_dir)
 
     def scrape_url(self, url: str, exclude_links: bool = False, 
                   exclude_symbol_semicolon: bool = True,
                   exclude_garbled: bool = True,
-                  max_depth: int = 10) -> Optional[Dict[str, Any]]:
+                  max_depth: int = 10,
+                  clean_markdown: bool = False,
+                  max_chars: Optional[int] = None,
+                  max_tokens: Optional[int] = None,
+                  tokenizer: Optional[Callable[[str], int]] = None,
+                  fingerprint_index: Optional[FingerprintIndex] = None) -> Optional[Dict[str, Any]]:
         """
         URLからHTMLを取得し、各形式のデータを返します。
 
@@ -89,12 +281,22 @@ class WebScraper:
             exclude_symbol_semicolon (bool): 記号で始まり;で終わる要素を除外するかどうか
             exclude_garbled (bool): 文字化けした要素を除外するかどうか
             max_depth (int): HTMLの解析を行う最大の深さ
+            clean_markdown (bool): markdown_dataを_clean_markdownで整形済みの状態で返すかどうか
+            max_chars (int, optional): markdown_dataの最大文字数
+            max_tokens (int, optional): markdown_dataの最大トークン数
+            tokenizer (Callable[[str], int], optional): トークン数を数える関数。デフォルトはapproximate_token_count
+            fingerprint_index (FingerprintIndex, optional): 指定した場合は抽出したテキストのSimHashで
+                ほぼ重複したページを検出し、重複していればMarkdownへの変換を省略する
             
         Returns:
             Optional[Dict[str, Any]]: 以下の情報を含む辞書
                 - raw_html: 取得した生のHTMLデータ
                 - json_data: HTMLをJSON形式に変換したデータ
                 - markdown_data: JSONをMarkdown形式に変換したデータ
+                  （clean_markdown=Trueの場合は整形済み）
+                - truncated: max_chars/max_tokensに達してmarkdown_dataを途中で打ち切ったかどうか
+                - duplicate_of: ほぼ重複したページのURL（重複していない場合はNone。
+                  重複している場合markdown_dataはNone）
                 失敗時はNone
         """
         # 一時的に除外オプションの値を保存
@@ -107,19 +309,45 @@ class WebScraper:
         self.exclude_garbled = exclude_garbled
 
         try:
-            raw_html = self.fetch_html(url)
-            if raw_html is None:
-                return None
-                
-            # HTMLをJSONに変換（max_depthを渡す）
-            json_data = self.html_to_json(raw_html, max_depth=max_depth)
-            # JSONをMarkdownに変換
-            markdown_data = self.json_to_markdown(json_data)
+            with self.instrumentation.span("scrape_url", url=url):
+                raw_html = self.fetch_html(url)
+                if raw_html is None:
+                    return None
+                    
+                # HTMLをJSONに変換（max_depthを渡す）
+                json_data = self.html_to_json(raw_html, max_depth=max_depth)
+
+                duplicate_of = None
+                if fingerprint_index is not None:
+                    with self.instrumentation.span("dedup.fingerprint"):
+                        text = extract_text(json_data)
+                        # テキストがほとんどないページ（画像のみ、JSで描画するページなど）は
+                        # フィンガープリントが一致しやすく、無関係なページを重複と誤判定するため対象外とする
+                        if approximate_token_count(text) >= MIN_FINGERPRINT_TOKENS:
+                            duplicate_of = fingerprint_index.check_and_add(url, simhash(text))
+                    if duplicate_of is not None:
+                        self.logger.info(f"ほぼ重複したページのため変換を省略: {url}（重複元: {duplicate_of}）")
+                        return {
+                            "raw_html": raw_html,
+                            "json_data": json_data,
+                            "markdown_data": None,
+                            "truncated": False,
+                            "duplicate_of": duplicate_of
+                        }
+                # JSONをMarkdownに変換
+                with self.instrumentation.span("render.json_to_markdown"):
+                    markdown_data, truncated = self.json_to_markdown_budgeted(
+                        json_data, max_chars=max_chars, max_tokens=max_tokens, tokenizer=tokenizer)
+                if clean_markdown:
+                    with self.instrumentation.span("render.clean_markdown"):
+                        markdown_data = self._clean_markdown(markdown_data)
             
             return {
                 "raw_html": raw_html,
                 "json_data": json_data,
-                "markdown_data": markdown_data
+                "markdown_data": markdown_data,
+                "truncated": truncated,
+                "duplicate_of": None
             }
         finally:
             # 元の値に戻す
@@ -181,6 +409,40 @@ class WebScraper:
     #         self.exclude_symbol_semicolon = original_exclude_symbol_semicolon
     #         self.exclude_garbled = original_exclude_garbled
 
+    def _allowed_by_robots(self, url: str) -> bool:
+        with self.instrumentation.span("robots", url=url):
+            policy = self.robots.policy(url)
+        # Crawl-delayがあればホストごとの間隔として使う（ないホストは従来どおりdefault_delay）
+        self.rate_limiter.set_host_delay(urlparse(url).netloc, policy.crawl_delay)
+        if not policy.can_fetch(url):
+            self.logger.warning(f"robots.txtで取得が禁止されています: {url}")
+            return False
+        return True
+
+    def _read_body(self, response) -> bytes:
+        """
+        本文をdownload_chunk_sizeずつ受信・展開し、展開後のサイズがmax_content_bytesを超えた時点で中止する
+
+        Raises:
+            ContentTooLargeError: 本文が上限を超えた場合
+        """
+        limit = self.max_content_bytes
+        if limit is not None:
+            # 圧縮されていない本文は、受信する前にContent-Lengthで判定できる
+            content_length = response.headers.get('content-length', '')
+            if (content_length.isdigit() and int(content_length) > limit
+                    and not response.headers.get('content-encoding')):
+                response.close()
+                raise ContentTooLargeError(f"本文が上限を超えています（{content_length} > {limit}バイト）")
+
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=self.download_chunk_size):
+            body += chunk
+            if limit is not None and len(body) > limit:
+                response.close()
+                raise ContentTooLargeError(f"展開後の本文が上限を超えました（{limit}バイト）")
+        return bytes(body)
+
     def fetch_html(self, url: str) -> Optional[str]:
         """
         指定されたURLからHTMLを取得します。
@@ -189,42 +451,59 @@ class WebScraper:
             url (str): スクレイピング対象のURL
             
         Returns:
-            Optional[str]: 取得したHTML。エラーの場合はNone
+            Optional[str]: 取得したHTML。エラーの場合、robots.txtで禁止されている場合、
+                           または展開後の本文がmax_content_bytesを超えた場合はNone
         """
+        if self.robots is not None and not self._allowed_by_robots(url):
+            return None
+
         retries = 0
         while retries < self.max_retries:
             try:
                 # リクエスト前に待機時間を確保
                 self.rate_limiter.wait_if_needed(url)
                 
-                response = self.session.get(
-                    url,
-                    verify=self.verify_ssl,
-                    timeout=self.request_timeout
-                )
+                # ヘッダー受信まで（DNS解決・接続・サーバー処理を含む）と本文の受信を分けて計測する
+                with self.instrumentation.span("fetch.ttfb", url=url):
+                    response = self.session.get(
+                        url,
+                        verify=self.verify_ssl,
+                        timeout=self.request_timeout,
+                        stream=True
+                    )
+                with self.instrumentation.span("fetch.download", url=url):
+                    content = self._read_body(response)
                 response.raise_for_status()
                 
                 # エンコーディングの処理
-                encoding = None
-                
-                # Content-Typeヘッダーからエンコーディングを取得
-                content_type = response.headers.get('content-type', '').lower()
-                if 'charset=' in content_type:
-                    encoding = content_type.split('charset=')[-1]
-                
-                # レスポンスのエンコーディングがISO-8859-1の場合、または未設定の場合
-                if not encoding or response.encoding.lower() == 'iso-8859-1':
-                    # chardetを使用してエンコーディングを推測
-                    raw_content = response.content
-                    encoding_result = chardet.detect(raw_content)
-                    if encoding_result and encoding_result['encoding']:
-                        encoding = encoding_result['encoding']
-                
-                if encoding:
-                    response.encoding = encoding
-                
-                return response.text
+                with self.instrumentation.span("encoding_detection", url=url):
+                    encoding = None
+                    
+                    # Content-Typeヘッダーからエンコーディングを取得
+                    content_type = response.headers.get('content-type', '').lower()
+                    if 'charset=' in content_type:
+                        encoding = content_type.split('charset=')[-1]
+                    
+                    # レスポンスのエンコーディングがISO-8859-1の場合、または未設定の場合
+                    if not encoding or (response.encoding or '').lower() == 'iso-8859-1':
+                        # chardetを使用してエンコーディングを推測
+                        encoding_result = chardet.detect(content)
+                        if encoding_result and encoding_result['encoding']:
+                            encoding = encoding_result['encoding']
+                    
+                    if encoding:
+                        response.encoding = encoding
+                    
+                    try:
+                        return content.decode(response.encoding or 'utf-8', errors='replace')
+                    except LookupError:
+                        # 未知のcharsetが指定された場合
+                        return content.decode('utf-8', errors='replace')
                 
+            except ContentTooLargeError as e:
+                # 再取得しても同じ結果になるためリトライしない
+                self.logger.error(f"HTMLの取得を中止しました: {str(e)}")
+                return None
             except requests.RequestException as e:
                 retries += 1
                 if retries < self.max_retries:
@@ -302,16 +581,24 @@ class WebScraper:
         Returns:
             Dict[str, Any]: JSON形式に変換されたHTML構造
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        with self.instrumentation.span("parse.soup"):
+            soup = BeautifulSoup(html, 'html.parser')
         
         # 不要な要素を削除
-        self._remove_unwanted_elements(soup)
+        with self.instrumentation.span("parse.remove_unwanted_elements"):
+            self._remove_unwanted_elements(soup)
         
         # html要素を取得
         html_element = soup.find('html')
-        if html_element:
-            return self._parse_node(html_element, max_depth=max_depth)
-        return self._parse_node(soup, max_depth=max_depth)
+        root = html_element or soup
+        if self.extraction == "content":
+            with self.instrumentation.span("parse.extract_content"):
+                root, self._pruned_nodes = select_main_content(root)
+        try:
+            with self.instrumentation.span("parse.parse_node"):
+                return self._parse_node(root, max_depth=max_depth)
+        finally:
+            self._pruned_nodes = frozenset()
 
     def _remove_unwanted_elements(self, soup: BeautifulSoup) -> None:
         """
@@ -344,6 +631,9 @@ class WebScraper:
                 
         # インラインスタイルを削除
         for tag in soup.find_all(style=True):
+            # 非表示の要素は、スタイルを削除した後も:hiddenで除外できるようhidden属性に置き換える
+            if self._prune_hidden and self.HIDDEN_STYLE_PATTERN.search(tag['style']):
+                tag['hidden'] = ''
             del tag['style']
 
     def _is_garbled_text(self, text: str) -> bool:
@@ -441,7 +731,14 @@ class WebScraper:
         }
 
         # 子ノードを再帰的にパース（深度を増加させて）
+        pruned_nodes = self._pruned_nodes
+        has_prune_rules = bool(self._prune_tags or self._prune_attributes)
         for child in node.children:
+            # 除外対象の要素は子孫をたどらない
+            if pruned_nodes and id(child) in pruned_nodes:
+                continue
+            if has_prune_rules and isinstance(child, Tag) and self._matches_prune_rules(child):
+                continue
             child_result = self._parse_node(child, current_depth + 1, max_depth)
             if child_result:  # 空文字列や None の場合は追加しない
                 if isinstance(child_result, str) and child_result.strip():
@@ -566,6 +863,98 @@ class WebScraper:
 
         return markdown
 
+    def json_to_markdown_budgeted(self, json_data: Dict[str, Any], max_chars: Optional[int] = None,
+                                  max_tokens: Optional[int] = None,
+                                  tokenizer: Optional[Callable[[str], int]] = None) -> Tuple[str, bool]:
+        """
+        文字数・トークン数の上限の範囲でJSON形式のHTML構造をMarkdown形式に変換します。
+
+        ブロック単位で先頭から変換し、上限に達した時点で本文の変換を打ち切ります。
+        打ち切り後も残りの予算で以降の見出しと、各見出しの直後の段落を優先して出力します。
+        上限を指定しない場合はjson_to_markdownと同じ結果になります。
+
+        Args:
+            json_data (Dict[str, Any]): 変換対象のJSON形式データ
+            max_chars (int, optional): 最大文字数
+            max_tokens (int, optional): 最大トークン数
+            tokenizer (Callable[[str], int], optional): トークン数を数える関数。デフォルトはapproximate_token_count
+
+        Returns:
+            Tuple[str, bool]: Markdown形式の文字列と、上限に達して打ち切ったかどうか
+        """
+        if max_chars is None and max_tokens is None:
+            return self.json_to_markdown(json_data), False
+        count_tokens = tokenizer or approximate_token_count
+
+        parts = []
+        used_chars = used_tokens = 0
+
+        def fits(text):
+            # 2つ目以降のブロックは改行1文字で連結する
+            chars = len(text) + (1 if parts else 0)
+            if max_chars is not None and used_chars + chars > max_chars:
+                return False
+            if max_tokens is not None and used_tokens + count_tokens(text) > max_tokens:
+                return False
+            return True
+
+        def append(text):
+            nonlocal used_chars, used_tokens
+            used_chars += len(text) + (1 if parts else 0)
+            if max_tokens is not None:
+                used_tokens += count_tokens(text)
+            parts.append(text)
+
+        truncated = False
+        lead_pending = False  # 打ち切り後に見出しの直後の段落を1つ出力するかどうか
+        section_has_body = False  # 直前の見出し以降に本文のブロックを出力したかどうか
+        for node, level, is_heading in self._iter_markdown_blocks(json_data):
+            if truncated and not is_heading and not lead_pending:
+                continue
+            text = self.json_to_markdown(node, level)
+            if not text.strip():
+                continue
+            if fits(text):
+                append(text)
+                lead_pending = truncated and is_heading
+                section_has_body = not is_heading
+                continue
+            lead_pending = False
+            if not truncated and (not parts or not (is_heading or section_has_body)):
+                # 最初のブロック、または見出しの最初の段落だけで上限を超える場合は、
+                # 本文が空のまま後続の見出しに進まないよう、収まる長さまで切り詰める
+                prefix = self._fit_prefix(text, fits)
+                if prefix:
+                    append(prefix)
+            truncated = True
+            if is_heading and not fits(""):
+                break
+        return "\n".join(parts), truncated
+
+    def _iter_markdown_blocks(self, node: Any, level: int = 0) -> Iterator[Tuple[Any, int, bool]]:
+        # 出力の単位となるブロックを文書の順に返す。変換は呼び出し側で必要な分だけ行う
+        if isinstance(node, str):
+            yield node, level, False
+            return
+        tag = node["tag"]
+        if tag in self.MARKDOWN_BLOCK_TAGS:
+            yield node, level, tag in self.HEADING_TAGS
+            return
+        for child in node["children"]:
+            yield from self._iter_markdown_blocks(child, level + 1)
+
+    @staticmethod
+    def _fit_prefix(text: str, fits: Callable[[str], bool]) -> str:
+        # 上限に収まる最長の先頭部分を二分探索で求める
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(text[:middle]):
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low]
+
     def _clean_markdown(self, markdown: str) -> str:
         """
         Markdownテキストを整形します。
@@ -634,68 +1023,206 @@ class WebScraper:
 
     def scrape_multiple_urls(
         self,
-        urls: List[str],
+        urls: Iterable[str],
         output_dir: str = "scraped_data",
         save_json: bool = True,
         save_markdown: bool = True,
         exclude_links: bool = False,
-        max_depth: int = 20
+        max_depth: int = 20,
+        clean_markdown: bool = False,
+        store: Optional[SQLiteResultStore] = None,
+        background_save: bool = False,
+        max_pending_writes: int = 32,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        tokenizer: Optional[Callable[[str], int]] = None,
+        dedup: bool = False,
+        fingerprint_index: Optional[FingerprintIndex] = None,
+        dedup_urls: bool = True,
+        ndjson_writer: Optional[result_serializer.NDJSONWriter] = None
     ) -> Dict[str, Dict[str, Union[Dict[str, Any], str, None]]]:
         """
         複数のURLをスクレイピングし、結果を保存します。
 
         Args:
-            urls (List[str]): スクレイピング対象のURLリスト
+            urls (Iterable[str]): スクレイピング対象のURL。ジェネレータの場合は届いた順に処理する
             output_dir (str): 保存先ディレクトリ
             save_json (bool): JSONとして保存するかどうか
             save_markdown (bool): Markdownとして保存するかどうか
             exclude_links (bool): リンクテキストを除外するかどうか
             max_depth (int): HTMLの解析を行う最大の深さ
+            clean_markdown (bool): 返却するmarkdown_dataを整形済みにするかどうか
+            store (SQLiteResultStore, optional): 指定した場合はファイルを作成せず、
+                呼び出しごとに1回のバッチ書き込みでストアへ保存する
+            background_save (bool): ファイルの書き込みをバックグラウンドのスレッドで行い、
+                次のURLの取得と並行させるかどうか。メソッドはすべての書き込み完了後に戻る
+            max_pending_writes (int): background_save時に書き込み待ちにできる最大件数
+            max_chars (int, optional): 1ページあたりのMarkdownの最大文字数
+            max_tokens (int, optional): 1ページあたりのMarkdownの最大トークン数
+            tokenizer (Callable[[str], int], optional): トークン数を数える関数
+            dedup (bool): バッチ内でほぼ重複したページを検出し、2件目以降の変換と保存を省略するかどうか
+            fingerprint_index (FingerprintIndex, optional): 重複の判定に使うインデックス。
+                ファイルに記録するインデックスを渡すと過去のバッチとの重複も検出する（dedupの指定は不要）
+            dedup_urls (bool): self.url_normalizerで正規化したURLが同じものは最初のURLのみ取得するかどうか
+            ndjson_writer (NDJSONWriter, optional): json_formatが"ndjson"の場合に追記するライター。
+                複数の呼び出しで1つのファイルを共有する場合に指定する（呼び出し側で閉じる）
         Returns:
             Dict[str, Dict[str, Union[Dict[str, Any], str, None]]]: 
                 URLをキーとし、以下の情報を含む辞書:
                 - raw_html: 取得した生のHTMLデータ
                 - json_data: スクレイピングしたJSONデータ
                 - markdown_data: 変換したMarkdownデータ
+                - truncated: max_chars/max_tokensに達してMarkdownを打ち切ったかどうか
+                - duplicate_of: 同じURLまたはほぼ重複したページのURL（重複していない場合はNone）
                 - json_file: 保存したJSONファイルのパス（保存した場合）
                 - markdown_file: 保存したMarkdownファイルのパス（保存した場合）
+                - save_error: バックグラウンドでの保存に失敗した場合のエラー内容
         """
         # ファイルを保存する場合のみディレクトリを作成
-        if save_json or save_markdown:
+        if store is None and (save_json or save_markdown):
             os.makedirs(output_dir, exist_ok=True)
         results = {}
+        store_records = []
+        if fingerprint_index is None and dedup:
+            fingerprint_index = FingerprintIndex()
+        # 正規化したURL -> 最初に現れた元のURL
+        first_urls = {}
+        # 件数が分かっている場合は、すべてのホストを先に並行して名前解決しておく
+        # （ジェネレータは届いた順に処理するため先読みしない）
+        if self.dns_cache is not None and isinstance(urls, (list, tuple)) and len(urls) > 1:
+            with self.instrumentation.span("fetch.preresolve"):
+                self.dns_cache.preresolve(urls)
+
+        # NDJSON形式の場合はバッチ全体を1つのファイルに追記する
+        owns_ndjson_writer = False
+        if store is not None or not save_json or self.json_format != "ndjson":
+            ndjson_writer = None
+        elif ndjson_writer is None:
+            ndjson_writer = self.open_ndjson_writer(output_dir)
+            owns_ndjson_writer = True
+
+        writer = None
+        if background_save and store is None and (save_json or save_markdown):
+            writer = BackgroundResultWriter(max_queue_size=max_pending_writes)
+
+        def save(url, result, markdown_content):
+            with self.instrumentation.span("save", url=url):
+                return save_files(url, result, markdown_content)
+
+        def save_files(url, result, markdown_content):
+            json_file, md_file = self.save_results(
+                result["json_data"],
+                url,
+                output_dir,
+                save_json=save_json and ndjson_writer is None,
+                save_markdown=save_markdown,
+                markdown_content=markdown_content
+            )
+            if ndjson_writer is not None:
+                ndjson_writer.write({
+                    "url": url,
+                    "fetched_at": datetime.now().isoformat(),
+                    "json_data": result["json_data"]
+                })
+                json_file = ndjson_writer.file_path
+            return {"json_file": json_file, "markdown_file": md_file}
 
-        for url in urls:
-            self.logger.info(f"スクレイピング開始: {url}")
-            result = self.scrape_url(url, exclude_links, max_depth=max_depth)
+        try:
+            for url in urls:
+                if dedup_urls:
+                    first_url = first_urls.setdefault(self.url_normalizer.normalize(url), url)
+                    if first_url in results:
+                        # 表記ゆれのURLは取得せず、最初のURLの結果を参照する
+                        if url != first_url:
+                            self.logger.info(f"同じURLのため取得を省略: {url}（{first_url}）")
+                            results[url] = {
+                                **results[first_url],
+                                "duplicate_of": first_url,
+                                "json_file": None,
+                                "markdown_file": None
+                            }
+                        continue
+                self.logger.info(f"スクレイピング開始: {url}")
+                result = self.scrape_url(url, exclude_links, max_depth=max_depth,
+                                         clean_markdown=clean_markdown, max_chars=max_chars,
+                                         max_tokens=max_tokens, tokenizer=tokenizer,
+                                         fingerprint_index=fingerprint_index)
             
-            if result:
-                # ファイルに保存
-                json_file, md_file = self.save_results(
-                    result["json_data"],
-                    url,
-                    output_dir,
-                    save_json=save_json,
-                    save_markdown=save_markdown
-                )
-                
-                results[url] = {
-                    **result,
-                    "json_file": json_file,
-                    "markdown_file": md_file
-                }
-            else:
-                self.logger.error(f"スクレイピング失敗: {url}")
-                results[url] = {
-                    "raw_html": None,
-                    "json_data": None,
-                    "markdown_data": None,
-                    "json_file": None,
-                    "markdown_file": None
-                }
+                if result and result["duplicate_of"] is not None:
+                    # 重複したページは保存しない
+                    results[url] = {
+                        **result,
+                        "json_file": None,
+                        "markdown_file": None
+                    }
+                elif result:
+                    # scrape_urlで生成済みのMarkdownを再利用し、二重のレンダリングを避ける
+                    markdown_content = None
+                    if save_markdown:
+                        markdown_content = result["markdown_data"]
+                        if not clean_markdown:
+                            with self.instrumentation.span("render.clean_markdown", url=url):
+                                markdown_content = self._clean_markdown(markdown_content)
+
+                    results[url] = {
+                        **result,
+                        "json_file": None,
+                        "markdown_file": None
+                    }
+                    if store is not None:
+                        # ストアにはバッチの最後にまとめて書き込む
+                        store_records.append({
+                            "url": url,
+                            "fetched_at": datetime.now().isoformat(),
+                            "json_data": result["json_data"] if save_json else None,
+                            "markdown_data": markdown_content
+                        })
+                    elif writer is not None:
+                        # キューが満杯の場合は書き込みが追いつくまで待機する
+                        writer.submit(partial(save, url, result, markdown_content), results[url])
+                    else:
+                        results[url].update(save(url, result, markdown_content))
+                else:
+                    self.logger.error(f"スクレイピング失敗: {url}")
+                    results[url] = {
+                        "raw_html": None,
+                        "json_data": None,
+                        "markdown_data": None,
+                        "duplicate_of": None,
+                        "json_file": None,
+                        "markdown_file": None
+                    }
+        finally:
+            # すべての書き込みが完了してからNDJSONファイルを閉じる
+            if writer is not None:
+                writer.close()
+            if owns_ndjson_writer:
+                ndjson_writer.close()
+            # 途中で例外が発生しても取得済みの結果は保存する
+            if store_records:
+                store.write_batch(store_records)
+                self.logger.info(f"{len(store_records)}件の結果をストアに保存しました: {store.db_path}")
 
         return results
 
+    def open_ndjson_writer(self, output_dir: str = "scraped_data") -> result_serializer.NDJSONWriter:
+        """
+        output_dirにバッチ用のNDJSONファイルを作成し、追記するライターを返します。
+
+        Args:
+            output_dir (str): 保存先ディレクトリ
+
+        Returns:
+            NDJSONWriter: self.compressionで圧縮して追記するライター
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = result_serializer.file_extension("ndjson", self.compression)
+        return result_serializer.NDJSONWriter(
+            os.path.join(output_dir, f"batch_{timestamp}{extension}"),
+            compression=self.compression
+        )
+
     # async def scrape_multiple_urls_async(
     #     self,
     #     urls: List[str],
@@ -783,7 +1310,8 @@ class WebScraper:
         url: str,
         output_dir: str,
         save_json: bool = True,
-        save_markdown: bool = True
+        save_markdown: bool = True,
+        markdown_content: Optional[str] = None
     ) -> Tuple[Optional[str], Optional[str]]:
         """
         スクレイピング結果を保存します。
@@ -794,6 +1322,7 @@ class WebScraper:
             output_dir: 保存先ディレクトリ
             save_json: JSONとして保存するかどうか
             save_markdown: Markdownとして保存するかどうか
+            markdown_content: 整形済みのMarkdown。指定された場合は再変換せずにそのまま保存する
 
         Returns:
             Tuple[Optional[str], Optional[str]]: 保存したJSONとMarkdownのファイルパス
@@ -818,16 +1347,17 @@ class WebScraper:
         md_filename = None
 
         if save_json:
-            json_filename = f"{output_dir}/{safe_name}_{timestamp}.json"
-            with open(json_filename, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            extension = result_serializer.file_extension(self.json_format, self.compression)
+            json_filename = f"{output_dir}/{safe_name}_{timestamp}{extension}"
+            result_serializer.save_json_file(json_filename, result, self.json_format, self.compression)
             self.logger.info(f"JSONを保存しました: {json_filename}")
 
         if save_markdown:
             md_filename = f"{output_dir}/{safe_name}_{timestamp}.md"
-            markdown_content = self.json_to_markdown(result)
-            # Markdownの整形を行う
-            markdown_content = self._clean_markdown(markdown_content)
+            if markdown_content is None:
+                markdown_content = self.json_to_markdown(result)
+                # Markdownの整形を行う
+                markdown_content = self._clean_markdown(markdown_content)
             
             with open(md_filename, "w", encoding="utf-8") as f:
                 # メタデータを追加
@@ -917,8 +1447,7 @@ class WebScraper:
 
     def _save_json_file(self, file_path: str, data: dict) -> None:
         """JSONファイルを保存するヘルパーメソッド"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        result_serializer.save_json_file(file_path, data, self.json_format, self.compression)
 
     def _save_markdown_file(self, file_path: str, markdown_data: str) -> None:
         """Markdownファイルを保存するヘルパーメソッド"""
@@ -1,4 +1,16 @@
-from src.web_scraping import WebScraper
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import copy
+import logging
+import queue
+import threading
+import time
+from src.search_engine import ENGINE_REGISTRY, PrefetchIterator
+from src.rate_limiter import QueryRateLimiter
+from src.batch_checkpoint import BatchCheckpoint
+from src.near_duplicates import FingerprintIndex
+from src.url_normalizer import DEFAULT_URL_NORMALIZER
+from src.instrumentation import NULL_INSTRUMENTATION
 
 class WebSearch:
     """
@@ -6,51 +18,100 @@ class WebSearch:
     各検索エンジンのAPIを統一したインターフェースで利用できます。
     """
     
-    def __init__(self, default_engine="google"):
+    def __init__(self, default_engine="google", instrumentation=None, url_normalizer=None):
         """
         WebSearchクラスの初期化
         
         Args:
             default_engine (str): デフォルトで使用する検索エンジン
                                  "google", "bing", "duckduckgo"のいずれか
+            instrumentation (Instrumentation, optional): 検索・スクレイピングの各ステージの
+                                                         所要時間を通知する計測器
+            url_normalizer (UrlNormalizer, optional): スクレイピング前に検索結果の重複を除く際の
+                                                      URLの正規化規則。指定がない場合はDEFAULT_URL_NORMALIZER
         """
+        # 生成済みのエンジン（初回利用時に生成される）
         self.engines = {}
+        # エンジン名と生成関数の対応（モジュールの読み込みと生成は初回利用時まで遅延）
+        # グローバルなレジストリをコピーし、インスタンスごとの登録が他に影響しないようにする
+        self.engine_factories = dict(ENGINE_REGISTRY)
         self.default_engine = default_engine
-        self._initialize_engines()
-        self.scraper = WebScraper()
+        self._scraper = None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.url_normalizer = url_normalizer or DEFAULT_URL_NORMALIZER
+        self.logger = logging.getLogger(__name__)
         
         # デフォルトエンジンが利用できない場合は、利用可能な最初のエンジンをデフォルトに設定
-        if self.default_engine not in self.engines and self.engines:
-            self.default_engine = next(iter(self.engines.keys()))
-    
-    def _initialize_engines(self):
-        """利用可能な検索エンジンの初期化"""
-        # Google Custom Search API
-        from src.google_custom_search import get_search_response
-        self.engines["google"] = {
-            "instance": None,
-            "search_func": get_search_response
-        }
+        if self.default_engine not in self.engine_factories and self.engine_factories:
+            self.default_engine = next(iter(self.engine_factories.keys()))
+    
+    def register_engine(self, name, factory):
+        """
+        このインスタンスで利用する検索エンジンの生成関数を登録する
         
-        # Bing Web Search API
-        from src.bing_web_search import BingWebSearch
-        bing_search = BingWebSearch()
-        self.engines["bing"] = {
-            "instance": bing_search,
-            "search_func": bing_search.search
-        }
+        Args:
+            name (str): エンジン名
+            factory (callable): SearchEngineを返す関数。初回利用時に呼び出される
+        """
+        self.engine_factories[name] = factory
+        self.engines.pop(name, None)
+    
+    def _get_engine(self, engine):
+        """エンジンを取得する。未生成の場合はここで生成する"""
+        if engine not in self.engine_factories:
+            available = ", ".join(self.available_engines())
+            error_msg = f"指定されたエンジン '{engine}' は利用できません。"
+            
+            if available:
+                error_msg += f"\n利用可能なエンジン: {available}"
+            else:
+                error_msg += "\n利用可能なエンジンはありません。"
+                
+            raise ValueError(error_msg)
         
-        # DuckDuckGo Instant Answer API
-        from src.duckduckgo_instant_answer import DuckDuckGoInstantAnswer
-        ddg_search = DuckDuckGoInstantAnswer()
-        self.engines["duckduckgo"] = {
-            "instance": ddg_search,
-            "search_func": ddg_search.search
-        }
+        if engine not in self.engines:
+            self.engines[engine] = self.engine_factories[engine]()
+        return self.engines[engine]
+    
+    @property
+    def scraper(self):
+        """WebScraperのインスタンス（初回アクセス時に生成）"""
+        if self._scraper is None:
+            from src.web_scraping import WebScraper
+            self._scraper = WebScraper(instrumentation=self.instrumentation, url_normalizer=self.url_normalizer)
+        return self._scraper
+    
+    @scraper.setter
+    def scraper(self, scraper):
+        self._scraper = scraper
     
     def available_engines(self):
         """利用可能な検索エンジンのリストを返す"""
-        return list(self.engines.keys())
+        return list(self.engine_factories.keys())
+    
+    def get_engine(self, engine=None):
+        """
+        SearchEngineのインスタンスを取得する
+        
+        Args:
+            engine (str, optional): エンジン名。指定がない場合はデフォルトエンジン
+        
+        Returns:
+            SearchEngine: 検索エンジン
+        """
+        return self._get_engine(engine or self.default_engine)
+    
+    def capabilities(self, engine=None):
+        """
+        検索エンジンの並列度・QPS・費用などの性能特性を返す
+        
+        Args:
+            engine (str, optional): エンジン名。指定がない場合はデフォルトエンジン
+        
+        Returns:
+            EngineCapabilities: 性能特性
+        """
+        return self.get_engine(engine).capabilities()
     
     def search(self, query, engine=None, max_results=4, **kwargs):
         """
@@ -65,34 +126,302 @@ class WebSearch:
             dict or list: 検索結果（エンジンによって形式が異なる）
         
         Raises:
-            ValueError: 指定されたエンジンが利用できない場合
+            ValueError: 指定されたエンジンが利用できない場合、またはエンジンの生成に失敗した場合
         """
         engine = engine or self.default_engine
         
-        if not self.engines:
+        if not self.engine_factories:
             raise RuntimeError(f"利用可能な検索エンジンがありません。")
         
-        if engine not in self.engines:
-            available = ", ".join(self.available_engines())
-            error_msg = f"指定されたエンジン '{engine}' は利用できません。"
-            
-            if available:
-                error_msg += f"\n利用可能なエンジン: {available}"
-            else:
-                error_msg += "\n利用可能なエンジンはありません。"
-                
-            raise ValueError(error_msg)
+        search_engine = self._get_engine(engine)
+        with self.instrumentation.span("search", engine=engine, query=query):
+            return search_engine.search(query, max_results=max_results, **kwargs)
+    
+    async def asearch(self, query, engine=None, max_results=4, **kwargs):
+        """
+        search()の非同期版
+        
+        Args:
+            query (str): 検索クエリ
+            engine (str, optional): 使用する検索エンジン。指定がない場合はデフォルトエンジンを使用
+            **kwargs: 各検索エンジン固有のパラメータ
+        
+        Returns:
+            dict or list: 検索結果（エンジンによって形式が異なる）
+        """
+        engine = engine or self.default_engine
+        
+        if not self.engine_factories:
+            raise RuntimeError(f"利用可能な検索エンジンがありません。")
+        
+        search_engine = self._get_engine(engine)
+        if not self.instrumentation.enabled:
+            return await search_engine.asearch(query, max_results=max_results, **kwargs)
+        # スレッドローカルな属性の引き継ぎが他のタスクに漏れないよう、spanではなくrecordで通知する
+        start = time.perf_counter()
+        try:
+            return await search_engine.asearch(query, max_results=max_results, **kwargs)
+        finally:
+            self.instrumentation.record("search", time.perf_counter() - start, engine=engine, query=query)
+    
+    def iter_search(self, query, engine=None, max_results=4, prefetch=True, **kwargs):
+        """
+        検索結果を標準化された形式で、届いた順に1件ずつ返すイテレータ
+        
+        Args:
+            query (str): 検索クエリ
+            engine (str, optional): 使用する検索エンジン。指定がない場合はデフォルトエンジンを使用
+            max_results (int): 取得件数
+            prefetch (bool): 別スレッドで次の結果を先読みし、利用側の処理と並行させるかどうか
+            **kwargs: 各検索エンジン固有のパラメータ
         
-        engine_data = self.engines[engine]
+        Yields:
+            dict: process_results()と同じ形式の検索結果
+        """
+        search_engine = self._get_engine(engine or self.default_engine)
+        if not prefetch:
+            yield from search_engine.iter_search(query, max_results=max_results, **kwargs)
+            return
+        
+        iterator = PrefetchIterator(lambda: search_engine.iter_search(query, max_results=max_results, **kwargs))
+        try:
+            yield from iterator
+        finally:
+            # 途中で反復を止めた場合は以降の結果を取得しない
+            iterator.close()
+    
+    async def aiter_search(self, query, engine=None, max_results=4, **kwargs):
+        """
+        iter_search()の非同期版
+        
+        Args:
+            query (str): 検索クエリ
+            engine (str, optional): 使用する検索エンジン。指定がない場合はデフォルトエンジンを使用
+            max_results (int): 取得件数
+            **kwargs: 各検索エンジン固有のパラメータ
+        
+        Yields:
+            dict: process_results()と同じ形式の検索結果
+        """
+        search_engine = self._get_engine(engine or self.default_engine)
+        async for result in search_engine.aiter_search(query, max_results=max_results, **kwargs):
+            yield result
+    
+    def iter_search_and_scrape(self, query, engine=None, max_results=4, scrape_options=None,
+                               scrape_concurrency=4, **kwargs):
+        """
+        検索とスクレイピングをパイプライン化し、スクレイピングが完了した順に結果を返すイテレータ
+        
+        検索結果は届いた時点でスクレイピングのキューに追加されるため、最初のページの内容は
+        おおよそ検索1回分と取得1回分の待ち時間で得られます。
+        
+        Args:
+            query (str): 検索クエリ
+            engine (str, optional): 使用する検索エンジン。指定がない場合はデフォルトエンジンを使用
+            max_results (int): 取得件数
+            scrape_options (dict, optional): search_and_standardize()と同じスクレイピングのオプション
+            scrape_concurrency (int): 同時にスクレイピングするURLの数
+            **kwargs: 各検索エンジン固有のパラメータ
+        
+        Yields:
+            dict: {
+                "rank": int,            # 検索結果の順位（0始まり）
+                "search_result": dict,  # 標準化された検索結果
+                "scraped_data": dict,   # scrape_multiple_urls()の1URL分の結果。失敗時はNone
+                "error": str|None,      # 失敗時のエラー内容
+            }
+        
+        Raises:
+            Exception: 検索自体に失敗した場合は、その例外を送出する
+        """
+        scrape_options = scrape_options or {}
+        search_engine = self._get_engine(engine or self.default_engine)
+        base_scraper = self.scraper
+        # 重複の判定はすべてのスレッドで1つのインデックスを共有する
+        fingerprint_index = scrape_options.get("fingerprint_index")
+        if fingerprint_index is None and scrape_options.get("dedup", False):
+            fingerprint_index = FingerprintIndex()
+        output_dir = scrape_options.get("output_dir", "scraped_data")
+        save_json = scrape_options.get("save_json", True)
+        # NDJSON形式の場合は、スレッドごとの複製が別々に追記しないよう1つのライターを共有する
+        ndjson_writer = None
+        if save_json and base_scraper.json_format == "ndjson":
+            ndjson_writer = base_scraper.open_ndjson_writer(output_dir)
+        results = queue.Queue()
+        stop = threading.Event()
+        local = threading.local()
+        feed_done = object()
+        executor = ThreadPoolExecutor(max_workers=scrape_concurrency)
+        futures = []
+        
+        def scrape(rank, hit):
+            # scrape_urlは除外オプションを一時的に書き換えるため、スレッドごとに複製を使う
+            if not hasattr(local, "scraper"):
+                local.scraper = copy.copy(base_scraper)
+            try:
+                scraped = local.scraper.scrape_multiple_urls(
+                    urls=[hit["link"]],
+                    output_dir=output_dir,
+                    save_json=save_json,
+                    save_markdown=scrape_options.get("save_markdown", True),
+                    exclude_links=scrape_options.get("exclude_links", False),
+                    max_depth=scrape_options.get("max_depth", 20),
+                    fingerprint_index=fingerprint_index,
+                    ndjson_writer=ndjson_writer
+                )
+                results.put((rank, hit, scraped[hit["link"]], None))
+            except Exception as e:
+                results.put((rank, hit, None, e))
+        
+        def feed():
+            submitted = 0
+            try:
+                hits = self._instrumented_hits(search_engine.iter_search(query, max_results=max_results, **kwargs),
+                                               engine or self.default_engine, query)
+                for hit in self._unique_hits(hits, scrape_options):
+                    if stop.is_set():
+                        break
+                    futures.append(executor.submit(scrape, submitted, hit))
+                    submitted += 1
+            except Exception as e:
+                results.put((feed_done, submitted, None, e))
+                return
+            results.put((feed_done, submitted, None, None))
+        
+        threading.Thread(target=feed, daemon=True).start()
+        submitted = None
+        received = 0
+        try:
+            while submitted is None or received < submitted:
+                rank, hit, scraped, error = results.get()
+                if rank is feed_done:
+                    submitted = hit
+                    if error is not None:
+                        raise error
+                    continue
+                received += 1
+                if error is not None:
+                    self.logger.error(f"スクレイピングに失敗しました ({hit['link']}): {error}")
+                yield {
+                    "rank": rank,
+                    "search_result": hit,
+                    "scraped_data": scraped,
+                    "error": str(error) if error is not None else None
+                }
+        finally:
+            # 途中で反復を止めた場合は未開始のスクレイピングを取り消す
+            stop.set()
+            for future in list(futures):
+                future.cancel()
+            # 共有のNDJSONファイルは実行中のスクレイピングの書き込みが終わってから閉じる
+            executor.shutdown(wait=ndjson_writer is not None)
+            if ndjson_writer is not None:
+                ndjson_writer.close()
+    
+    async def aiter_search_and_scrape(self, query, engine=None, max_results=4, scrape_options=None,
+                                      scrape_concurrency=4, **kwargs):
+        """
+        iter_search_and_scrape()の非同期版。引数と返す値は同じです。
+        """
+        loop = asyncio.get_running_loop()
+        iterator = PrefetchIterator(lambda: self.iter_search_and_scrape(
+            query, engine, max_results, scrape_options, scrape_concurrency, **kwargs
+        ))
+        done = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(None, next, iterator, done)
+                if item is done:
+                    break
+                yield item
+        finally:
+            iterator.close()
+    
+    def search_batch(self, queries, engine=None, concurrency=None, qps=None, daily_quota=None,
+                     max_results=4, checkpoint_path=None, standardize=True, **kwargs):
+        """
+        大量のクエリを並行して検索し、完了した順に結果を返すイテレータ
         
-        if engine == "google":
-            # Google検索の場合、custom_search_engine_idを渡す
-            custom_search_engine_id = kwargs.pop("custom_search_engine_id", None)
-            return engine_data["search_func"](query, max_results=max_results, custom_search_engine_id=custom_search_engine_id, **kwargs)
-        elif engine == "bing":
-            return engine_data["search_func"](query, max_results=max_results, **kwargs)
-        elif engine == "duckduckgo":
-            return engine_data["search_func"](query, max_results=max_results, **kwargs)
+        Args:
+            queries (Iterable[str]): 検索クエリ
+            engine (str, optional): 使用する検索エンジン。指定がない場合はデフォルトエンジンを使用
+            concurrency (int, optional): 同時実行数。指定がない場合はエンジンのmax_concurrency
+            qps (float, optional): 1秒あたりの最大リクエスト数。指定がない場合はエンジンのqps、0の場合は制限しない
+            daily_quota (int, optional): 1日あたりの最大リクエスト数。指定がない場合はエンジンのdaily_quota。
+                                         到達した時点で新しいクエリの送信を停止する
+            max_results (int): 1クエリあたりの取得件数
+            checkpoint_path (str, optional): 進捗を記録するファイル。同じファイルを指定して再実行すると
+                                             完了済みのクエリは送信されず、当日のクォータ消費量も引き継がれる
+            standardize (bool): 結果をprocess_results()で標準化するかどうか
+            **kwargs: 各検索エンジン固有のパラメータ
+        
+        Yields:
+            dict: {
+                "query": str,          # 検索クエリ
+                "engine": str,         # 検索エンジン名
+                "results": list|dict,  # 検索結果（standardize=Trueの場合は標準化済み）。失敗時はNone
+                "error": str|None,     # 失敗時のエラー内容
+            }
+        """
+        engine = engine or self.default_engine
+        search_engine = self._get_engine(engine)
+        capabilities = search_engine.capabilities()
+        concurrency = concurrency or capabilities.max_concurrency
+        limiter = QueryRateLimiter(qps if qps is not None else capabilities.qps)
+        daily_quota = daily_quota if daily_quota is not None else capabilities.daily_quota
+        checkpoint = BatchCheckpoint(checkpoint_path)
+        
+        # ページ分割などで1クエリが複数のAPIリクエストになるエンジンは、リクエスト単位で制限する
+        requests_per_query = search_engine.request_count(max_results)
+        
+        def run(query):
+            with self.instrumentation.span("search", engine=engine, query=query):
+                results = search_engine.search_paced(query, limiter.acquire, max_results=max_results, **kwargs)
+            return search_engine.normalize(results) if standardize else results
+        
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = {}
+        submitted = set()  # 同じバッチ内で重複したクエリを2回送信・課金しないため
+        queries = iter(queries)
+        try:
+            while True:
+                # 実行中のクエリが同時実行数の2倍になるまで追加し、全件を一度に投入しない
+                while len(pending) < concurrency * 2:
+                    query = next(queries, None)
+                    if query is None:
+                        break
+                    if query in submitted or checkpoint.is_completed(engine, query):
+                        continue
+                    if daily_quota is not None and checkpoint.used_today(engine) + requests_per_query > daily_quota:
+                        self.logger.warning(f"{engine}の1日あたりのクォータ({daily_quota})に達したため、バッチを中断します")
+                        queries = iter(())
+                        break
+                    checkpoint.reserve(engine, requests_per_query)
+                    submitted.add(query)
+                    pending[executor.submit(run, query)] = query
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query = pending.pop(future)
+                    error = future.exception()
+                    checkpoint.record(engine, query, ok=error is None)
+                    if error is not None:
+                        self.logger.error(f"検索に失敗しました ({engine}: {query}): {error}")
+                    yield {
+                        "query": query,
+                        "engine": engine,
+                        "results": future.result() if error is None else None,
+                        "error": str(error) if error is not None else None
+                    }
+        finally:
+            # 途中でイテレータが閉じられた場合は未実行のクエリを取り消す
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            checkpoint.close()
     
     def process_results(self, results, engine=None):
         """
@@ -112,44 +441,55 @@ class WebSearch:
             }
         """
         engine = engine or self.default_engine
-        standardized_results = []
-        
-        if engine == "google":
-            # Googleの結果を標準化
-            for response in results:
-                if "items" in response:
-                    for item in response["items"]:
-                        standardized_results.append({
-                            "title": item.get("title", ""),
-                            "link": item.get("link", ""),
-                            "snippet": item.get("snippet", "").replace("\n", " "),
-                            "source": "google"
-                        })
-        
-        elif engine == "bing":
-            # Bingの結果を標準化
-            if "webPages" in results and "value" in results["webPages"]:
-                for item in results["webPages"]["value"]:
-                    standardized_results.append({
-                        "title": item.get("name", ""),
-                        "link": item.get("url", ""),
-                        "snippet": item.get("snippet", ""),
-                        "source": "bing"
-                    })
-        
-        elif engine == "duckduckgo":
-            # DuckDuckGoの結果を標準化
-            for item in results:
-                standardized_results.append({
-                    "title": item.get("title", ""),
-                    "link": item.get("href", ""),
-                    "snippet": item.get("body", ""),
-                    "source": "duckduckgo"
-                })
-        
-        return standardized_results
+        return self._get_engine(engine).normalize(results)
 
-    def search_and_standardize(self, query, engine=None, scrape_urls=False, scrape_options=None, max_results=4, **kwargs):
+    def _unique_hits(self, hits, scrape_options):
+        """正規化したURLが同じ検索結果を除き、最初に現れたものだけを返す"""
+        if not scrape_options.get("dedup_urls", True):
+            yield from hits
+            return
+        seen = set()
+        for hit in hits:
+            key = self.url_normalizer.normalize(hit["link"])
+            if key in seen:
+                self.logger.info(f"同じURLの検索結果を除外: {hit['link']}")
+                continue
+            seen.add(key)
+            yield hit
+
+    def _instrumented_hits(self, hits, engine, query):
+        """
+        検索結果のイテレータを包み、結果の到着を待った時間の合計を"search"ステージとして通知する。
+        結果の合間に行うスクレイピングの時間は含めない
+        """
+        if not self.instrumentation.enabled:
+            yield from hits
+            return
+        elapsed = 0.0
+        error = None
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    hit = next(hits)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield hit
+        finally:
+            # 結果の合間に他のステージが入るため、spanではなくrecordで通知する
+            self.instrumentation.record("search", elapsed, error=error, engine=engine, query=query)
+
+    @staticmethod
+    def _is_duplicate(scraped_data):
+        return bool(scraped_data) and scraped_data.get("duplicate_of") is not None
+
+    def search_and_standardize(self, query, engine=None, scrape_urls=False, scrape_options=None, max_results=4,
+                               pipelined=False, on_scraped=None, scrape_concurrency=4, **kwargs):
         """
         検索を実行し、結果を標準化された形式で返す便利なメソッド
         
@@ -162,6 +502,14 @@ class WebSearch:
                 - save_json (bool): JSONとして保存するかどうか（デフォルト: True）
                 - save_markdown (bool): Markdownとして保存するかどうか（デフォルト: True）
                 - exclude_links (bool): リンクテキストを除外するかどうか（デフォルト: False）
+                - dedup (bool): ほぼ重複したページを検出し、2件目以降を結果から除くかどうか（デフォルト: False）
+                - fingerprint_index (FingerprintIndex): 重複の判定に使うインデックス。
+                  ファイルに記録するインデックスを渡すと過去の検索との重複も除く
+                - dedup_urls (bool): 正規化したURLが同じ検索結果を取得前に除くかどうか（デフォルト: True）
+            pipelined (bool): 検索結果が届き次第、複数のURLを並行してスクレイピングするかどうか
+            on_scraped (callable, optional): pipelined=Trueの場合に、1URLのスクレイピングが完了するたびに
+                                             iter_search_and_scrape()の要素を引数として呼び出される関数
+            scrape_concurrency (int): pipelined=Trueの場合に同時にスクレイピングするURLの数
             **kwargs: 各検索エンジン固有のパラメータ
             
         Returns:
@@ -170,30 +518,60 @@ class WebSearch:
                 "scraped_data": dict, # スクレイピング結果（scrape_urls=Trueの場合）
             }
         """
-        raw_results = self.search(query, engine, max_results,**kwargs)
-        standardized_results = self.process_results(raw_results, engine)
+        if not scrape_urls:
+            raw_results = self.search(query, engine, max_results,**kwargs)
+            return {
+                "search_results": self.process_results(raw_results, engine),
+                "scraped_data": None
+            }
         
-        response = {
-            "search_results": standardized_results,
-            "scraped_data": None
-        }
+        if pipelined:
+            items = []
+            for item in self.iter_search_and_scrape(query, engine, max_results, scrape_options,
+                                                    scrape_concurrency, **kwargs):
+                items.append(item)
+                if on_scraped is not None:
+                    on_scraped(item)
+            # 検索結果は完了順ではなく順位順に並べる
+            items.sort(key=lambda item: item["rank"])
+            items = [item for item in items if not self._is_duplicate(item["scraped_data"])]
+            return {
+                "search_results": [item["search_result"] for item in items],
+                "scraped_data": {item["search_result"]["link"]: item["scraped_data"] for item in items} or None
+            }
         
-        if scrape_urls and standardized_results:
-            # スクレイピングオプションの設定
-            scrape_options = scrape_options or {}
-            urls = [result["link"] for result in standardized_results]
-            
-            # スクレイピングの実行
-            scraped_data = self.scraper.scrape_multiple_urls(
-                urls=urls,
-                output_dir=scrape_options.get("output_dir", "scraped_data"),
-                save_json=scrape_options.get("save_json", True),
-                save_markdown=scrape_options.get("save_markdown", True),
-                exclude_links=scrape_options.get("exclude_links", False),
-                max_depth=scrape_options.get("max_depth", 20)
-            )
-            
-            response["scraped_data"] = scraped_data
+        # スクレイピングオプションの設定
+        scrape_options = scrape_options or {}
         
-        return response
-
+        # 検索結果が届いた順にスクレイピングを開始し、検索と取得の待ち時間を重ねる
+        standardized_results = []
+        
+        def iter_links():
+            hits = self._instrumented_hits(self.iter_search(query, engine, max_results, **kwargs),
+                                           engine or self.default_engine, query)
+            for result in self._unique_hits(hits, scrape_options):
+                standardized_results.append(result)
+                yield result["link"]
+        
+        # スクレイピングの実行
+        scraped_data = self.scraper.scrape_multiple_urls(
+            urls=iter_links(),
+            output_dir=scrape_options.get("output_dir", "scraped_data"),
+            save_json=scrape_options.get("save_json", True),
+            save_markdown=scrape_options.get("save_markdown", True),
+            exclude_links=scrape_options.get("exclude_links", False),
+            max_depth=scrape_options.get("max_depth", 20),
+            dedup=scrape_options.get("dedup", False),
+            fingerprint_index=scrape_options.get("fingerprint_index"),
+            dedup_urls=scrape_options.get("dedup_urls", True)
+        )
+        # ほぼ重複したページは検索結果ごと除く
+        duplicates = {url for url, data in scraped_data.items() if self._is_duplicate(data)}
+        if duplicates:
+            standardized_results = [result for result in standardized_results if result["link"] not in duplicates]
+            scraped_data = {url: data for url, data in scraped_data.items() if url not in duplicates}
+        
+        return {
+            "search_results": standardized_results,
+            "scraped_data": scraped_data if standardized_results else None
+        }
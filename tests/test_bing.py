@@ -1,5 +1,5 @@
 import pytest
-from bing_web_search import BingWebSearch
+from src.bing_web_search import BingWebSearch
 
 def test_bing_search_missing_credentials():
     """APIキーが不足している場合にValueErrorが発生することを確認"""
@@ -10,4 +10,47 @@ def test_bing_search_with_credentials():
     """APIキーが正しく設定されることを確認"""
     api_key = "test_api_key"
     search = BingWebSearch(api_key=api_key)
-    assert search.api_key == api_key 
\ No newline at end of file
+    assert search.api_key == api_key
+
+
+def test_bing_search_requests_only_web_pages_by_default(monkeypatch):
+    """デフォルトでresponseFilterによりwebPagesのみを要求することを確認"""
+    from src import bing_web_search
+    captured = {}
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {}
+
+    def fake_get(url, headers=None, params=None):
+        captured.update(params)
+        return FakeResponse()
+
+    monkeypatch.setattr(bing_web_search.requests, "get", fake_get)
+    search = BingWebSearch(api_key="test_api_key")
+    search.search("python", max_results=4)
+    assert captured["responseFilter"] == "Webpages"
+    assert captured["count"] == 4
+
+    captured.clear()
+    search.search("python", sections=["news", "images"])
+    assert captured["responseFilter"] == "News,Images"
+    assert captured["answerCount"] == 2
+
+
+def test_bing_normalize_sections():
+    """指定したセクションのみが型付きの結果に変換されることを確認"""
+    search = BingWebSearch(api_key="test_api_key")
+    results = {
+        "webPages": {"value": [{"name": "Python", "url": "https://python.org", "snippet": "公式"}]},
+        "news": {"value": [{"name": "ニュース", "url": "https://example.com/news",
+                            "description": "概要", "provider": [{"name": "提供元"}]}]},
+    }
+
+    sections = search.normalize_sections(results, sections=["news"])
+    assert list(sections) == ["news"]
+    assert sections["news"][0].provider == "提供元"
+    assert search.normalize_sections(results)["webPages"][0].link == "https://python.org"
@@ -0,0 +1,82 @@
+import socket
+
+import pytest
+
+from benchmarks.corpus import CorpusPage
+from benchmarks.fixture_server import FixtureServer
+from src.dns_cache import DNSCache
+from src.web_scraping import WebScraper
+
+PAGES = [CorpusPage(f"page{i}", f"<html><body><p>ページ{i}</p></body></html>".encode("utf-8"),
+                    "text/html; charset=utf-8") for i in range(3)]
+
+
+@pytest.fixture
+def counted_getaddrinfo(monkeypatch):
+    calls = []
+    original = socket.getaddrinfo
+
+    def getaddrinfo(host, *args, **kwargs):
+        calls.append(host)
+        if host.endswith(".invalid"):
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return original("127.0.0.1", *args, **kwargs)
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    return calls
+
+
+def test_resolve_is_cached_until_ttl(counted_getaddrinfo):
+    """TTLの間は再問い合わせせず、失敗もnegative_ttlの間キャッシュすることを確認"""
+    cache = DNSCache(ttl=60, negative_ttl=60, use_aiodns=False)
+    assert cache.resolve("example.test") == cache.resolve("example.test")
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("missing.invalid")
+
+    assert counted_getaddrinfo == ["example.test", "missing.invalid"]
+    stats = cache.stats()
+    assert stats["example.test"]["hits"] == 1 and stats["example.test"]["misses"] == 1
+    assert stats["missing.invalid"]["failures"] == 1
+
+    expired = DNSCache(ttl=0, use_aiodns=False)
+    expired.resolve("example.test")
+    expired.resolve("example.test")
+    assert counted_getaddrinfo.count("example.test") == 3
+
+
+def test_preresolve_resolves_each_host_once(counted_getaddrinfo):
+    cache = DNSCache(use_aiodns=False)
+    result = cache.preresolve(["https://a.test/1", "https://a.test/2", "https://b.test/", "https://x.invalid/",
+                               "http://127.0.0.1:8000/"])
+    assert result == {"a.test": True, "b.test": True, "x.invalid": False}
+    assert cache.preresolve(["https://a.test/3"]) == {}
+    assert sorted(counted_getaddrinfo) == ["a.test", "b.test", "x.invalid"]
+
+
+def test_create_connection_falls_back_to_next_address():
+    """接続を拒否されたアドレスの次のアドレスに接続することを確認"""
+    with socket.socket() as listener, socket.socket() as closed:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        closed.bind(("127.0.0.1", 0))
+        refused_port = closed.getsockname()[1]
+
+        cache = DNSCache(use_aiodns=False)
+        tcp = (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "")
+        addrinfos = [tcp + (("127.0.0.1", refused_port),), tcp + (listener.getsockname(),)]
+        sock = cache._connect_staggered(addrinfos, timeout=5, source_address=None, socket_options=None)
+        with sock:
+            assert sock.getpeername() == listener.getsockname()
+
+
+def test_scraper_uses_dns_cache(counted_getaddrinfo):
+    """dns_cacheを指定したWebScraperが取得前にホストを解決し、以降はキャッシュを使うことを確認"""
+    with FixtureServer(PAGES) as server:
+        urls = [url.replace("127.0.0.1", "fixture.test") for url in server.urls()]
+        scraper = WebScraper(dns_cache=DNSCache(use_aiodns=False))
+        scraper.rate_limiter.default_delay = 0
+        results = scraper.scrape_multiple_urls(urls, save_json=False, save_markdown=False)
+
+    assert all(results[url]["markdown_data"] for url in urls)
+    assert counted_getaddrinfo == ["fixture.test"]
+    assert scraper.dns_cache.stats()["fixture.test"]["misses"] == 1
@@ -1,4 +1,4 @@
-from duckduckgo_instant_answer import DuckDuckGoInstantAnswer
+from src.duckduckgo_instant_answer import DuckDuckGoInstantAnswer
 
 def test_duckduckgo_search_params():
     """検索パラメータが正しく設定されることを確認"""
@@ -1,5 +1,5 @@
 import pytest
-from google_custom_search import GoogleCustomSearch
+from src.google_custom_search import GoogleCustomSearch
 
 def test_google_search_missing_credentials():
     """認証情報が不足している場合にValueErrorが発生することを確認"""
@@ -12,4 +12,143 @@ def test_google_search_with_credentials():
     cse_id = "test_cse_id"
     search = GoogleCustomSearch(api_key=api_key, cse_id=cse_id)
     assert search.api_key == api_key
-    assert search.cse_id == cse_id 
\ No newline at end of file
+    assert search.cse_id == cse_id
+
+
+def test_get_search_response_paginates_in_rank_order(monkeypatch):
+    """max_resultsが10を超える場合にページを分割し、順位順に結合することを確認"""
+    from src import google_custom_search
+
+    requested = []
+
+    def fake_fetch_page(service, keyword, cse_id, start, num, fields=None):
+        requested.append((start, num))
+        items = [{"title": f"{start + i}", "link": f"https://example.com/{start + i}"} for i in range(num)]
+        return {"searchInformation": {"totalResults": "1000"}, "items": items}
+
+    monkeypatch.setattr(google_custom_search, "_get_service", lambda api_key, base_url=None: None)
+    monkeypatch.setattr(google_custom_search, "_fetch_page", fake_fetch_page)
+    responses = google_custom_search.get_search_response("python", max_results=25, custom_search_engine_id="cse")
+
+    assert sorted(requested) == [(1, 10), (11, 10), (21, 5)]
+    search = GoogleCustomSearch(api_key="test_api_key", cse_id="test_cse_id")
+    titles = [item["title"] for item in search.normalize(responses)]
+    assert titles == [str(i) for i in range(1, 26)]
+
+
+def test_get_search_response_stops_at_total_results(monkeypatch):
+    """totalResultsを超えるページは結果に含めないことを確認"""
+    from src import google_custom_search
+
+    def fake_fetch_page(service, keyword, cse_id, start, num, fields=None):
+        items = [{"title": f"{start + i}"} for i in range(min(num, max(0, 12 - start + 1)))]
+        return {"searchInformation": {"totalResults": "12"}, "items": items}
+
+    monkeypatch.setattr(google_custom_search, "_get_service", lambda api_key, base_url=None: None)
+    monkeypatch.setattr(google_custom_search, "_fetch_page", fake_fetch_page)
+    responses = google_custom_search.get_search_response("python", max_results=50, custom_search_engine_id="cse")
+
+    assert len(responses) == 2
+
+
+def test_fetch_page_sends_fields_projection():
+    """デフォルトでfieldsによるフィールドの絞り込みが指定されることを確認"""
+    from src import google_custom_search
+
+    captured = {}
+
+    class FakeRequest:
+        def execute(self, http=None):
+            return {}
+
+    class FakeCse:
+        def list(self, **params):
+            captured.update(params)
+            return FakeRequest()
+
+    class FakeService:
+        def cse(self):
+            return FakeCse()
+
+    google_custom_search._fetch_page(FakeService(), "python", "cse", 1, 10, google_custom_search.DEFAULT_FIELDS)
+    assert captured["fields"] == "searchInformation/totalResults,items(title,link,snippet)"
+
+    captured.clear()
+    google_custom_search._fetch_page(FakeService(), "python", "cse", 1, 10, None)
+    assert "fields" not in captured
+
+
+def test_get_search_response_paces_each_page(monkeypatch):
+    """ページごとのリクエストの直前にbefore_requestを呼び出し、同時取得数を制限することを確認"""
+    import threading
+    import time
+    from src import google_custom_search
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0, "acquired": 0}
+
+    def fake_fetch_page(service, keyword, cse_id, start, num, fields=None):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.01)
+        with lock:
+            state["active"] -= 1
+        return {"searchInformation": {"totalResults": "100"}, "items": [{"title": str(start)}]}
+
+    def before_request():
+        with lock:
+            state["acquired"] += 1
+
+    monkeypatch.setattr(google_custom_search, "_get_service", lambda api_key, base_url=None: None)
+    monkeypatch.setattr(google_custom_search, "_fetch_page", fake_fetch_page)
+    responses = google_custom_search.get_search_response("python", max_results=50, custom_search_engine_id="cse",
+                                                         max_concurrency=2, before_request=before_request)
+
+    assert len(responses) == 5
+    assert state["acquired"] == 5
+    assert state["peak"] <= 2
+
+    search = GoogleCustomSearch(api_key="test_api_key", cse_id="test_cse_id")
+    assert search.request_count(10) == 1
+    assert search.request_count(25) == 3
+    assert search.request_count(500) == 10
+
+
+def test_search_batch_records_google_api_errors(monkeypatch, tmp_path):
+    """APIのエラーを空の結果として扱わず、search_batchが失敗として記録することを確認"""
+    import json
+    from src import google_custom_search
+    from src.web_search import WebSearch
+
+    def failing_fetch_page(service, keyword, cse_id, start, num, fields=None):
+        raise RuntimeError("403 Daily Limit Exceeded")
+
+    monkeypatch.setattr(google_custom_search, "_get_service", lambda api_key, base_url=None: None)
+    monkeypatch.setattr(google_custom_search, "_fetch_page", failing_fetch_page)
+    web_search = WebSearch()
+    web_search.register_engine("google", lambda: GoogleCustomSearch(api_key="test_api_key", cse_id="test_cse_id"))
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+
+    (result,) = web_search.search_batch(["python"], engine="google", qps=0, max_results=10,
+                                        checkpoint_path=str(checkpoint_path))
+
+    assert result["results"] is None
+    assert "Daily Limit Exceeded" in result["error"]
+    records = [json.loads(line) for line in checkpoint_path.read_text(encoding="utf-8").splitlines()]
+    assert [record["ok"] for record in records if "query" in record] == [False]
+
+
+def test_get_search_response_raises_when_a_page_fails(monkeypatch):
+    """ページの一部の取得に失敗した場合は、欠けた結果を返さずに例外を送出することを確認"""
+    from src import google_custom_search
+
+    def fake_fetch_page(service, keyword, cse_id, start, num, fields=None):
+        if start == 11:
+            raise RuntimeError("429 Rate Limit Exceeded")
+        return {"searchInformation": {"totalResults": "100"}, "items": [{"title": str(start)}]}
+
+    monkeypatch.setattr(google_custom_search, "_get_service", lambda api_key, base_url=None: None)
+    monkeypatch.setattr(google_custom_search, "_fetch_page", fake_fetch_page)
+    with pytest.raises(RuntimeError):
+        google_custom_search.get_search_response("python", max_results=30, custom_search_engine_id="cse")
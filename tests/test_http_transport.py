@@ -0,0 +1,97 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.util import make_headers
+
+from benchmarks.corpus import CorpusPage
+from benchmarks.fixture_server import FixtureServer
+from src import http_transport
+from src.web_scraping import WebScraper
+
+PAGES = [CorpusPage("sjis", "<html><body><p>シフトJISのページ</p></body></html>".encode("shift_jis"),
+                    "text/html; charset=shift_jis")]
+
+
+def test_transport_is_validated():
+    with pytest.raises(ValueError):
+        WebScraper(transport="urllib")
+    with pytest.raises(ValueError):
+        WebScraper(transport="httpx", dns_cache=True)
+
+
+def test_httpx_transport_requires_httpx(monkeypatch):
+    monkeypatch.setattr(http_transport, "httpx", None)
+    with pytest.raises(ImportError):
+        WebScraper(transport="httpx")
+
+
+def test_httpx_transport_fetches_html():
+    """transport="httpx"でもrequestsと同じようにエンコーディングを判定して取得できることを確認"""
+    pytest.importorskip("httpx")
+    with FixtureServer(PAGES) as server:
+        scraper = WebScraper(transport="httpx", http2=False)
+        scraper.rate_limiter.default_delay = 0
+        scraper.max_retries = 1
+        try:
+            assert "シフトJISのページ" in scraper.fetch_html(server.url_for("sjis"))
+            assert scraper.fetch_html(server.base_url + "/missing") is None
+        finally:
+            scraper.session.close()
+
+
+class GzipServer:
+    """gzipで圧縮した本文を返し、受信したAccept-Encodingを記録するサーバー"""
+
+    def __init__(self, body):
+        self.payload = gzip.compress(body)
+        self.accept_encodings = []
+
+    def __enter__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.accept_encodings.append(self.headers.get("Accept-Encoding"))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(server.payload)))
+                self.end_headers()
+                self.wfile.write(server.payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        host, port = self.httpd.server_address[:2]
+        self.url = f"http://{host}:{port}/"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_accept_encoding_lists_available_codecs():
+    value = http_transport.accept_encoding("requests")
+    assert "gzip" in value
+    assert ("br" in value) == ("br" in make_headers(accept_encoding=True)["accept-encoding"])
+
+
+def test_fetch_html_limits_decoded_size():
+    """展開後のサイズが上限を超える圧縮された本文は取得を中止することを確認"""
+    body = ("<html><body>" + "<p>圧縮率の高い本文</p>" * 50000 + "</body></html>").encode("utf-8")
+    with GzipServer(body) as server:
+        scraper = WebScraper()
+        scraper.rate_limiter.default_delay = 0
+        html = scraper.fetch_html(server.url)
+        assert html is not None and len(html.encode("utf-8")) == len(body)
+        assert "gzip" in server.accept_encodings[0]
+
+        scraper.max_content_bytes = len(server.payload) * 2
+        assert scraper.fetch_html(server.url) is None
+        # 上限超過はリトライしない
+        assert len(server.accept_encodings) == 2
@@ -0,0 +1,62 @@
+import pytest
+
+from src.instrumentation import CallbackHook, Instrumentation, NULL_INSTRUMENTATION, StageMetrics
+from src.web_scraping import WebScraper
+
+TEST_HTML = "<html><body><h1>見出し</h1><p>本文の段落です。</p></body></html>"
+
+class FakeResponse:
+    headers = {"content-type": "text/html; charset=utf-8"}
+    encoding = "utf-8"
+    content = TEST_HTML.encode("utf-8")
+    text = TEST_HTML
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        yield self.content
+
+class FakeSession:
+    def get(self, url, **kwargs):
+        return FakeResponse()
+
+def test_scrape_url_reports_each_stage_with_url():
+    """scrape_urlの各ステージがURL付きでフックに通知されることを確認"""
+    events = []
+    scraper = WebScraper(instrumentation=Instrumentation([
+        CallbackHook(lambda name, duration, attributes, error: events.append((name, attributes)))
+    ]))
+    scraper.session = FakeSession()
+
+    result = scraper.scrape_url("https://example.com/page", clean_markdown=True)
+
+    assert result is not None
+    names = [name for name, _ in events]
+    for stage in ["fetch.ttfb", "fetch.download", "encoding_detection", "parse.soup",
+                  "parse.remove_unwanted_elements", "parse.parse_node",
+                  "render.json_to_markdown", "render.clean_markdown", "scrape_url"]:
+        assert stage in names
+    # 入れ子のステージは外側のspanのURLを引き継ぐ
+    assert all(attributes["url"] == "https://example.com/page" for _, attributes in events)
+
+def test_stage_metrics_counts_errors_and_exports_prometheus_text():
+    """StageMetricsが呼び出し回数とエラー数を集計し、Prometheus形式で出力できることを確認"""
+    metrics = StageMetrics()
+    instrumentation = Instrumentation([metrics])
+
+    with instrumentation.span("search", engine="dummy"):
+        pass
+    with pytest.raises(RuntimeError):
+        with instrumentation.span("search", engine="dummy"):
+            raise RuntimeError("失敗")
+
+    assert metrics.snapshot()["search"]["count"] == 2
+    assert metrics.snapshot()["search"]["errors"] == 1
+    assert 'web_search_stage_calls_total{stage="search"} 2' in metrics.to_prometheus_text()
+
+def test_null_instrumentation_is_default():
+    """計測器を指定しない場合は何も通知しない共有インスタンスが使われることを確認"""
+    scraper = WebScraper()
+    assert scraper.instrumentation is NULL_INSTRUMENTATION
+    assert not NULL_INSTRUMENTATION.enabled
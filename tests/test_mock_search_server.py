@@ -0,0 +1,30 @@
+import pytest
+
+from benchmarks.load_test import mock_web_search, run_load_test
+from benchmarks.mock_search_server import MockSearchServer
+
+
+@pytest.fixture
+def server():
+    with MockSearchServer() as server:
+        yield server
+
+
+@pytest.mark.parametrize("engine", ["google", "bing", "duckduckgo"])
+def test_engines_use_base_url_override(server, engine):
+    """base_urlを指定したエンジンがモックサーバーのレスポンスを標準化できることを確認"""
+    results = mock_web_search(server.base_url).search_and_standardize("テスト", engine=engine, max_results=4)
+
+    assert len(results["search_results"]) == 4
+    assert all(item["link"].startswith("https://example.com/") for item in results["search_results"])
+    assert server.stats()[engine][200] >= 1
+
+
+def test_load_test_counts_rate_limited_requests():
+    """429を返したリクエストがクライアント側の失敗として集計されることを確認"""
+    with MockSearchServer(rate_limit_rate=1.0) as server:
+        result = run_load_test(server, "bing", ["a", "b", "c"], concurrency=2)
+
+    assert result["failed"] == 3
+    assert result["server_429"] == 3
+    assert result["requests_per_query"] == 1.0
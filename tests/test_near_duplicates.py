@@ -0,0 +1,68 @@
+from src.near_duplicates import FingerprintIndex, extract_text, hamming_distance, simhash
+from src.web_scraping import WebScraper
+
+ARTICLE = "".join(f"検索結果のミラーやAMP版のページは本文がほぼ同じです。段落{i}の内容を説明します。" for i in range(40))
+
+
+def test_simhash_is_close_for_near_duplicates():
+    """一部だけ異なるテキストは距離が小さく、別のテキストは距離が大きいことを確認"""
+    original = simhash(ARTICLE)
+    assert simhash(ARTICLE) == original
+    assert hamming_distance(original, simhash(ARTICLE + "配信元: example.com")) <= 3
+    other = "".join(f"まったく別の話題について書かれた記事です。項目{i}を紹介します。" for i in range(40))
+    assert hamming_distance(original, simhash(other)) > 3
+
+
+def test_extract_text_keeps_document_order():
+    json_data = {"tag": "div", "children": ["a", {"tag": "p", "children": ["b", "c"]}, "d"]}
+    assert extract_text(json_data) == "a b c d"
+
+
+def test_fingerprint_index_persists_across_batches(tmp_path):
+    """ファイルに記録したフィンガープリントで過去のバッチとの重複を検出できることを確認"""
+    path = str(tmp_path / "fingerprints.jsonl")
+    fingerprint = simhash(ARTICLE)
+    with FingerprintIndex(path) as index:
+        assert index.check_and_add("https://example.com/a", fingerprint) is None
+        # 同じURLを再取得した場合は重複とみなさない
+        assert index.check_and_add("https://example.com/a", fingerprint) is None
+
+    with FingerprintIndex(path) as index:
+        assert len(index) == 1
+        assert index.check_and_add("https://amp.example.com/a", fingerprint ^ 0b101) == "https://example.com/a"
+        assert index.find(fingerprint ^ (0xFFFF << 16)) is None
+
+
+def test_scrape_multiple_urls_skips_duplicates(tmp_path):
+    """dedup=Trueで重複したページの変換と保存を省略することを確認"""
+    pages = {
+        "https://example.com/a": f"<html><body><p>{ARTICLE}</p></body></html>",
+        "https://example.com/a/amp": f"<html><body><div><p>{ARTICLE}</p></div></body></html>",
+        "https://example.com/b": "<html><body><p>別のページの本文です。</p></body></html>",
+    }
+    scraper = WebScraper()
+    scraper.fetch_html = pages.get
+
+    results = scraper.scrape_multiple_urls(list(pages), output_dir=str(tmp_path), save_json=False, dedup=True)
+
+    assert results["https://example.com/a"]["duplicate_of"] is None
+    duplicate = results["https://example.com/a/amp"]
+    assert duplicate["duplicate_of"] == "https://example.com/a"
+    assert duplicate["markdown_data"] is None and duplicate["markdown_file"] is None
+    assert results["https://example.com/b"]["duplicate_of"] is None
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_pages_without_text_are_not_duplicates(tmp_path):
+    """テキストのない別々のページを重複と判定しないことを確認"""
+    pages = {
+        "https://a.com/": '<html><body><img src="a.png"></body></html>',
+        "https://b.com/": '<html><body><img src="b.png"></body></html>',
+    }
+    scraper = WebScraper()
+    scraper.fetch_html = pages.get
+
+    results = scraper.scrape_multiple_urls(list(pages), output_dir=str(tmp_path), save_json=False,
+                                           save_markdown=False, dedup=True)
+
+    assert all(result["duplicate_of"] is None for result in results.values())
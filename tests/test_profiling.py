@@ -0,0 +1,43 @@
+import json
+import pstats
+
+from src.web_scraping import WebScraper
+
+TEST_HTML = "<html><body><h1>見出し</h1><p>本文の段落です。</p></body></html>"
+
+def test_profiling_dumps_stage_stats(tmp_path):
+    """profiling()がステージごとのpstats、折りたたみスタック、JSONの集計結果を保存することを確認"""
+    scraper = WebScraper()
+    scraper.fetch_html = lambda url: TEST_HTML
+
+    with scraper.profiling(str(tmp_path)) as profiler:
+        scraper.scrape_url("https://example.com/1")
+        scraper.scrape_url("https://example.com/2")
+
+    with open(tmp_path / "summary.json", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["parse.parse_node"]["calls"] == 2
+    assert summary["parse.parse_node"]["peak_memory_bytes"] is not None
+    assert summary["parse.parse_node"]["top_functions"]
+
+    # 入れ子のステージの処理は外側のステージの統計に含まれない
+    scrape_functions = {name for _, _, name in pstats.Stats(str(tmp_path / "scrape_url.pstats")).stats}
+    assert "_parse_node" not in scrape_functions
+
+    lines = (tmp_path / "profile.collapsed").read_text(encoding="utf-8").splitlines()
+    assert any(line.startswith("parse.parse_node;") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    # with文を抜けると計測は無効になる
+    assert scraper.profiler is None
+    assert not scraper.instrumentation.enabled
+
+def test_profile_option_attaches_profiler():
+    """profile=Trueの場合は生成時からプロファイラが有効になることを確認"""
+    scraper = WebScraper(profile=True)
+    scraper.fetch_html = lambda url: TEST_HTML
+    try:
+        scraper.scrape_url("https://example.com/")
+        assert scraper.profiler.summary()["render.json_to_markdown"]["calls"] == 1
+    finally:
+        scraper.profiler.stop_tracing()
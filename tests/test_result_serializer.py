@@ -0,0 +1,54 @@
+import gzip
+import json
+
+import pytest
+
+from src import result_serializer
+from src.web_scraping import WebScraper
+
+SAMPLE = {"tag": "html", "attributes": {}, "children": ["日本語のテキスト", {"tag": "p", "attributes": {}, "children": ["本文"]}]}
+
+@pytest.mark.parametrize("json_format", ["pretty", "compact", "orjson"])
+def test_save_json_file_roundtrip(tmp_path, json_format):
+    """各出力形式で保存したJSONが元のデータに復元できることを確認"""
+    file_path = tmp_path / ("result" + result_serializer.file_extension(json_format))
+    result_serializer.save_json_file(str(file_path), SAMPLE, json_format)
+    assert json.loads(file_path.read_bytes()) == SAMPLE
+
+def test_compact_matches_one_shot_encoding():
+    """compact形式の分割した書き込みがjson.dumpsのワンショット変換と同じ出力になることを確認"""
+    import io
+
+    nested = SAMPLE
+    for _ in range(10):
+        nested = {"tag": "div", "attributes": {"class": "x"}, "children": [nested, "テキスト"]}
+    for data in ([nested, {"empty": {}, "list": []}], {"ids": {1: "a"}, "pair": (1, None)}):
+        buffer = io.BytesIO()
+        result_serializer.write_json(buffer, data, "compact")
+        assert buffer.getvalue() == json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def test_gzip_compression(tmp_path):
+    """gzip圧縮したJSONが復元できることを確認"""
+    file_path = tmp_path / ("result" + result_serializer.file_extension("compact", "gzip"))
+    result_serializer.save_json_file(str(file_path), SAMPLE, "compact", "gzip")
+    assert str(file_path).endswith(".json.gz")
+    with gzip.open(file_path, "rb") as f:
+        assert json.loads(f.read()) == SAMPLE
+
+def test_invalid_format():
+    """未対応の出力形式でValueErrorが発生することを確認"""
+    with pytest.raises(ValueError):
+        WebScraper(json_format="xml")
+
+def test_scrape_multiple_urls_ndjson_batch(tmp_path):
+    """NDJSON形式ではバッチ全体が1ファイルに1行1ドキュメントで保存されることを確認"""
+    scraper = WebScraper(json_format="ndjson", compression="gzip")
+    scraper.fetch_html = lambda url: "<html><body><p>本文</p></body></html>"
+    urls = ["https://example.com/a", "https://example.com/b"]
+    results = scraper.scrape_multiple_urls(urls, output_dir=str(tmp_path), save_markdown=False)
+
+    batch_file = results[urls[0]]["json_file"]
+    assert batch_file == results[urls[1]]["json_file"]
+    with gzip.open(batch_file, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["url"] for record in records] == urls
@@ -0,0 +1,45 @@
+from src.result_store import SQLiteResultStore
+from src.web_scraping import WebScraper
+
+def test_write_batch_and_lookup(tmp_path):
+    """バッチで書き込んだ結果をURLと取得日時で参照できることを確認"""
+    with SQLiteResultStore(str(tmp_path / "results.db")) as store:
+        store.write_batch([
+            {"url": "https://example.com/a", "fetched_at": "2024-01-01T00:00:00", "markdown_data": "古い"},
+            {"url": "https://example.com/a", "fetched_at": "2024-01-02T00:00:00", "markdown_data": "新しい"},
+            {"url": "https://example.com/b", "fetched_at": "2024-01-03T00:00:00", "json_data": {"tag": "p"}},
+        ])
+
+        assert store.get("https://example.com/a")["markdown_data"] == "新しい"
+        assert len(store.history("https://example.com/a")) == 2
+        assert store.get("https://example.com/b")["json_data"] == {"tag": "p"}
+        assert store.get("https://example.com/missing") is None
+        recent = list(store.iter_fetched_between(start="2024-01-02T00:00:00"))
+        assert [record["url"] for record in recent] == ["https://example.com/a", "https://example.com/b"]
+
+def test_iter_fetched_between_reads_in_batches(tmp_path):
+    """batch_size件ずつ読み出し、反復の途中でも書き込めることを確認"""
+    with SQLiteResultStore(str(tmp_path / "results.db")) as store:
+        store.write_batch([
+            {"url": f"https://example.com/{i}", "fetched_at": f"2024-01-0{i + 1}T00:00:00"} for i in range(5)
+        ])
+
+        records = store.iter_fetched_between(batch_size=2)
+        first = next(records)
+        store.write_batch([{"url": "https://example.com/late", "fetched_at": "2023-12-31T00:00:00"}])
+        urls = [first["url"]] + [record["url"] for record in records]
+
+        assert urls[:5] == [f"https://example.com/{i}" for i in range(5)]
+
+def test_scrape_multiple_urls_with_store(tmp_path):
+    """ストアを指定した場合はファイルを作成せずにストアへ保存されることを確認"""
+    scraper = WebScraper()
+    scraper.fetch_html = lambda url: "<html><body><p>本文</p></body></html>"
+    output_dir = tmp_path / "scraped"
+    with SQLiteResultStore(str(tmp_path / "results.db")) as store:
+        results = scraper.scrape_multiple_urls(
+            ["https://example.com/a"], output_dir=str(output_dir), store=store
+        )
+        assert results["https://example.com/a"]["json_file"] is None
+        assert store.get("https://example.com/a")["markdown_data"] == "本文"
+    assert not output_dir.exists()
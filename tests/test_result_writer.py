@@ -0,0 +1,44 @@
+import threading
+
+from src.result_writer import BackgroundResultWriter
+from src.web_scraping import WebScraper
+
+def test_errors_are_reported_in_result():
+    """保存ジョブの例外がresult["save_error"]に反映されることを確認"""
+    def failing_job():
+        raise OSError("disk full")
+
+    ok_result, failed_result = {}, {}
+    with BackgroundResultWriter() as writer:
+        writer.submit(lambda: {"json_file": "a.json"}, ok_result)
+        writer.submit(failing_job, failed_result)
+        writer.flush()
+
+    assert ok_result == {"json_file": "a.json"}
+    assert failed_result["save_error"] == "disk full"
+
+def test_submit_blocks_when_queue_is_full():
+    """キューが満杯の場合にsubmitが待機すること（バックプレッシャー）を確認"""
+    release = threading.Event()
+    writer = BackgroundResultWriter(max_queue_size=1)
+    writer.submit(release.wait, {})   # スレッドが実行中
+    writer.submit(lambda: None, {})   # キューで待機
+    blocked = threading.Thread(target=writer.submit, args=(lambda: None, {}))
+    blocked.start()
+    blocked.join(timeout=0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join()
+    writer.close()
+
+def test_scrape_multiple_urls_background_save(tmp_path):
+    """background_save=Trueでも戻り値にファイルパスが設定されていることを確認"""
+    scraper = WebScraper()
+    scraper.fetch_html = lambda url: "<html><body><p>本文</p></body></html>"
+    urls = ["https://example.com/a", "https://example.com/b"]
+    results = scraper.scrape_multiple_urls(urls, output_dir=str(tmp_path), background_save=True)
+
+    for url in urls:
+        assert results[url]["json_file"] and results[url]["markdown_file"]
+        assert "save_error" not in results[url]
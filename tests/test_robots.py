@@ -0,0 +1,111 @@
+import time
+
+import requests
+
+from src.rate_limiter import RateLimiter
+from src.robots import RobotsCache
+from src.web_scraping import WebScraper
+
+ROBOTS_TXT = """User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+"""
+TEST_HTML = "<html><body><p>本文</p></body></html>"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {"content-type": "text/html; charset=utf-8"}
+        self.encoding = "utf-8"
+        self.content = text.encode("utf-8")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def iter_content(self, chunk_size=1):
+        yield self.content
+
+
+class FakeSession:
+    def __init__(self, robots_responses):
+        self.robots_responses = robots_responses
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(url)
+        if url.endswith("/robots.txt"):
+            response = self.robots_responses.get(url.rsplit("/", 1)[0])
+            if isinstance(response, Exception):
+                raise response
+            return response or FakeResponse(404)
+        return FakeResponse(200, TEST_HTML)
+
+
+def test_robots_txt_is_fetched_once_per_origin():
+    """オリジンごとに1回だけ取得し、以降はキャッシュで判定することを確認"""
+    session = FakeSession({"https://example.com": FakeResponse(200, ROBOTS_TXT)})
+    robots = RobotsCache(session=session)
+
+    assert robots.can_fetch("https://example.com/public/page")
+    assert not robots.can_fetch("https://example.com/private/page")
+    assert robots.crawl_delay("https://example.com/") == 2
+    assert session.requests == ["https://example.com/robots.txt"]
+
+
+def test_missing_and_unreachable_robots_txt():
+    """404はすべて許可、5xxや接続エラーはすべて拒否とみなすことを確認"""
+    session = FakeSession({
+        "https://down.example.com": FakeResponse(503),
+        "https://offline.example.com": requests.ConnectionError("接続できません"),
+    })
+    robots = RobotsCache(session=session, ttl=3600, error_ttl=60)
+
+    assert robots.can_fetch("https://missing.example.com/page")
+    assert not robots.can_fetch("https://down.example.com/page")
+    assert not robots.can_fetch("https://offline.example.com/page")
+    down = robots.policy("https://down.example.com/")
+    assert down.expires_at - down.fetched_at == 60
+
+
+def test_robots_cache_persists_to_disk_until_expired(tmp_path):
+    session = FakeSession({"https://example.com": FakeResponse(200, ROBOTS_TXT)})
+    RobotsCache(session=session, cache_dir=str(tmp_path)).policy("https://example.com/")
+
+    # 別のインスタンスでもディスクのキャッシュを使い、再取得しない
+    reloaded = RobotsCache(session=session, cache_dir=str(tmp_path))
+    assert not reloaded.can_fetch("https://example.com/private/a")
+    assert len(session.requests) == 1
+
+    expired = RobotsCache(session=session, cache_dir=str(tmp_path), ttl=0)
+    expired.policy("https://example.com/")
+    expired_again = RobotsCache(session=session, cache_dir=str(tmp_path), ttl=0)
+    expired_again.policy("https://example.com/")
+    assert len(session.requests) == 3
+
+
+def test_fetch_html_respects_robots_and_crawl_delay():
+    """禁止されたURLは取得せず、Crawl-delayがホストごとの間隔に反映されることを確認"""
+    scraper = WebScraper(robots=True)
+    scraper.session = scraper.robots.session = FakeSession({"https://example.com": FakeResponse(200, ROBOTS_TXT)})
+
+    assert scraper.fetch_html("https://example.com/private/secret") is None
+    assert scraper.fetch_html("https://example.com/public") == TEST_HTML
+    assert scraper.session.requests == ["https://example.com/robots.txt", "https://example.com/public"]
+    assert scraper.rate_limiter.host_delays == {"example.com": 2}
+
+
+def test_rate_limiter_host_delay_applies_across_domains(monkeypatch):
+    """最小間隔を設定したドメインは、他のドメインを挟んでも間隔を空けることを確認"""
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    limiter = RateLimiter(default_delay=0)
+    limiter.set_host_delay("slow.example.com", 5)
+
+    limiter.wait_if_needed("https://slow.example.com/1")
+    limiter.wait_if_needed("https://fast.example.com/1")
+    limiter.wait_if_needed("https://slow.example.com/2")
+
+    assert len(sleeps) == 1 and 4 < sleeps[0] <= 5
@@ -0,0 +1,58 @@
+import pytest
+
+from src.url_normalizer import UrlNormalizer, canonicalize_url
+from src.web_scraping import WebScraper
+
+
+@pytest.mark.parametrize("url", [
+    "https://example.com/article?id=1",
+    "http://example.com/article?id=1",
+    "https://WWW.Example.COM:443/article/?id=1",
+    "https://example.com/article?utm_source=news&id=1&utm_medium=rss#comments",
+    "https://example.com//article?fbclid=abc&id=1",
+])
+def test_variants_share_canonical_url(url):
+    assert canonicalize_url(url) == "https://example.com/article?id=1"
+
+
+def test_query_and_path_encoding_are_normalized():
+    assert canonicalize_url("https://example.com/%7euser/a%2fb?b=2&a=1") == "https://example.com/~user/a%2Fb?a=1&b=2"
+    # 既定以外のポートやhttp(s)以外のURLは変更しない
+    assert canonicalize_url("https://example.com:8443/") == "https://example.com:8443/"
+    assert canonicalize_url("mailto:info@example.com") == "mailto:info@example.com"
+
+
+def test_ipv6_hosts_keep_brackets():
+    assert canonicalize_url("http://[::1]:8080/") == "https://[::1]:8080/"
+    assert canonicalize_url("https://[2001:DB8::1]:443/a/") == "https://[2001:db8::1]/a"
+    assert UrlNormalizer(lowercase_host=False).normalize("http://[::1]/") == "https://[::1]/"
+
+
+def test_rules_can_be_disabled():
+    normalizer = UrlNormalizer(strip_www=False, ignore_scheme=False, remove_fragment=False,
+                               strip_tracking_params=False, strip_trailing_slash=False)
+    assert (normalizer.normalize("http://www.Example.com:80/a/?utm_source=x#top")
+            == "http://www.example.com/a/?utm_source=x#top")
+    custom = UrlNormalizer(tracking_params=["ref", "session_*"])
+    assert custom.normalize("https://example.com/?ref=top&session_id=1&utm_source=x") == \
+        "https://example.com/?utm_source=x"
+
+
+def test_scrape_multiple_urls_fetches_variants_once(tmp_path):
+    """表記ゆれのURLは1回だけ取得し、最初のURLの結果を参照することを確認"""
+    fetched = []
+    scraper = WebScraper()
+
+    def fetch_html(url):
+        fetched.append(url)
+        return "<html><body><p>本文</p></body></html>"
+    scraper.fetch_html = fetch_html
+
+    urls = ["https://example.com/a?utm_source=x", "http://www.example.com/a/", "https://example.com/a",
+            "https://example.com/b"]
+    results = scraper.scrape_multiple_urls(urls, output_dir=str(tmp_path), save_json=False, save_markdown=False)
+
+    assert fetched == ["https://example.com/a?utm_source=x", "https://example.com/b"]
+    assert results["http://www.example.com/a/"]["duplicate_of"] == "https://example.com/a?utm_source=x"
+    assert results["https://example.com/a"]["markdown_data"] == results[urls[0]]["markdown_data"]
+    assert results["https://example.com/b"]["duplicate_of"] is None
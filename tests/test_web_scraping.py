@@ -0,0 +1,172 @@
+import pytest
+
+from src.web_scraping import WebScraper
+
+TEST_HTML = """
+<html><body>
+<h1>見出し</h1>
+<p>本文の段落です。</p>
+<ul><li>項目1</li><li>項目2</li></ul>
+</body></html>
+"""
+
+def test_save_results_uses_precomputed_markdown(tmp_path):
+    """markdown_contentが指定された場合は再変換せずにそのまま保存されることを確認"""
+    scraper = WebScraper()
+    scraper.json_to_markdown = None  # 呼ばれた場合はTypeErrorになる
+
+    _, md_file = scraper.save_results(
+        {"tag": "html", "attributes": {}, "children": []},
+        "https://example.com/page",
+        str(tmp_path),
+        save_json=False,
+        markdown_content="生成済みのMarkdown"
+    )
+
+    with open(md_file, encoding="utf-8") as f:
+        assert f.read().endswith("生成済みのMarkdown")
+
+def test_scrape_multiple_urls_renders_markdown_once(tmp_path):
+    """save_markdown=Trueでもjson_to_markdownのトップレベル呼び出しが1回だけであることを確認"""
+    scraper = WebScraper()
+    scraper.fetch_html = lambda url: TEST_HTML
+    calls = []
+    original_json_to_markdown = scraper.json_to_markdown
+
+    def counting_json_to_markdown(json_data, level=0):
+        if level == 0:
+            calls.append(json_data)
+        return original_json_to_markdown(json_data, level)
+
+    scraper.json_to_markdown = counting_json_to_markdown
+    results = scraper.scrape_multiple_urls(
+        ["https://example.com/"], output_dir=str(tmp_path), save_json=False, clean_markdown=True
+    )
+
+    data = results["https://example.com/"]
+    assert len(calls) == 1
+    with open(data["markdown_file"], encoding="utf-8") as f:
+        assert f.read().endswith(data["markdown_data"])
+
+BOILERPLATE_HTML = """
+<html><body>
+<header><nav><ul><li><a href="/">ホーム</a></li><li><a href="/news">ニュース一覧</a></li></ul></nav></header>
+<div id="cookie-banner"><p>このサイトはクッキーを使用しています。同意してください。</p></div>
+<div class="layout">
+  <article class="post-content">
+    <h1>記事のタイトル</h1>
+    <p>本文の最初の段落です。検索結果から取得したページの主要な内容がここに書かれています。</p>
+    <p>本文の二つ目の段落です。十分な長さのテキストがあるため本文として採点されます。</p>
+  </article>
+  <aside class="sidebar"><ul><li><a href="/a">関連記事A</a></li><li><a href="/b">関連記事B</a></li></ul></aside>
+</div>
+<footer><p>Copyright Example Inc. All rights reserved.</p></footer>
+</body></html>
+"""
+
+def test_content_extraction_drops_boilerplate():
+    """extraction="content"では本文のみが変換され、ナビゲーションやフッターなどが除外されることを確認"""
+    full = WebScraper()
+    content = WebScraper(extraction="content")
+
+    full_markdown = full.json_to_markdown(full.html_to_json(BOILERPLATE_HTML, max_depth=20))
+    content_markdown = content.json_to_markdown(content.html_to_json(BOILERPLATE_HTML, max_depth=20))
+
+    assert "ニュース一覧" in full_markdown
+    assert "本文の最初の段落です" in content_markdown
+    assert "本文の二つ目の段落です" in content_markdown
+    for boilerplate in ["ニュース一覧", "クッキー", "関連記事A", "Copyright"]:
+        assert boilerplate not in content_markdown
+
+def test_unknown_extraction_mode_is_rejected():
+    """未対応の抽出モードを指定した場合にValueErrorが発生することを確認"""
+    with pytest.raises(ValueError):
+        WebScraper(extraction="readability")
+
+PRUNE_HTML = """
+<html><body>
+<nav><a href="/">ホーム</a></nav>
+<div role="navigation"><p>メニュー</p></div>
+<p aria-hidden="true">読み上げ対象外</p>
+<div style="display: none"><p>非表示のブロック</p></div>
+<svg><text>図のテキスト</text></svg>
+<p>本文です。</p>
+</body></html>
+"""
+
+def test_prune_skips_subtrees_before_descending():
+    """prune=Trueではタグ・属性・非表示の指定に一致する要素の子孫をたどらないことを確認"""
+    scraper = WebScraper(prune=True)
+    visited = []
+    original_parse_node = scraper._parse_node
+
+    def recording_parse_node(node, current_depth=0, max_depth=10):
+        visited.append(node)
+        return original_parse_node(node, current_depth, max_depth)
+
+    scraper._parse_node = recording_parse_node
+    markdown = scraper.json_to_markdown(scraper.html_to_json(PRUNE_HTML, max_depth=20))
+
+    assert "本文です。" in markdown
+    for pruned in ["ホーム", "メニュー", "読み上げ対象外", "非表示のブロック", "図のテキスト"]:
+        assert pruned not in markdown
+        assert not any(pruned in str(node) for node in visited if isinstance(node, str))
+
+def test_prune_accepts_custom_selectors():
+    """任意のタグ名と属性セレクタを指定でき、未対応の形式はValueErrorになることを確認"""
+    scraper = WebScraper(prune=["svg", "[role=navigation]"])
+    markdown = scraper.json_to_markdown(scraper.html_to_json(PRUNE_HTML, max_depth=20))
+
+    assert "メニュー" not in markdown
+    assert "ホーム" in markdown
+    with pytest.raises(ValueError):
+        WebScraper(prune=["div > p"])
+
+def _long_document(sections=5, paragraphs=5):
+    body = "".join(
+        f"<h2>見出し{i}</h2>" + "".join(f"<p>セクション{i}の段落{j}です。{'本文' * 20}</p>" for j in range(paragraphs))
+        for i in range(sections)
+    )
+    return f"<html><body>{body}</body></html>"
+
+def test_markdown_budget_truncates_and_reports():
+    """max_charsに達した場合は打ち切り、以降の見出しを優先して出力することを確認"""
+    scraper = WebScraper()
+    json_data = scraper.html_to_json(_long_document(), max_depth=20)
+
+    full = scraper.json_to_markdown(json_data)
+    unlimited, unlimited_truncated = scraper.json_to_markdown_budgeted(json_data, max_chars=len(full))
+    assert unlimited == full
+    assert not unlimited_truncated
+
+    markdown, truncated = scraper.json_to_markdown_budgeted(json_data, max_chars=300)
+    assert truncated
+    assert len(markdown) <= 300
+    assert markdown.startswith("## 見出し0")
+
+    # 本文の打ち切り後も予算が残っていれば後続の見出しを出力する
+    markdown, truncated = scraper.json_to_markdown_budgeted(
+        json_data, max_tokens=200, tokenizer=lambda text: 1 if text.startswith("#") else len(text))
+    assert truncated
+    assert "## 見出し4" in markdown
+
+def test_markdown_budget_truncates_first_paragraph():
+    """見出しの最初の段落が上限を超える場合は、後続の見出しに進まず切り詰めることを確認"""
+    scraper = WebScraper()
+    html = f"<html><body><h1>Title</h1><p>{'x' * 200}</p><h2>Second</h2><p>lead para</p></body></html>"
+    json_data = scraper.html_to_json(html, max_depth=20)
+
+    markdown, truncated = scraper.json_to_markdown_budgeted(json_data, max_chars=60)
+    assert truncated
+    assert len(markdown) <= 60
+    assert markdown.startswith("# Title\n\nxxx")
+    assert "Second" not in markdown
+
+def test_scrape_url_reports_truncation():
+    """scrape_urlの結果にtruncatedが含まれることを確認"""
+    scraper = WebScraper()
+    scraper.fetch_html = lambda url: _long_document()
+
+    assert scraper.scrape_url("https://example.com/", max_depth=20)["truncated"] is False
+    result = scraper.scrape_url("https://example.com/", max_depth=20, max_tokens=50)
+    assert result["truncated"] is True
@@ -0,0 +1,283 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.instrumentation import Instrumentation, StageMetrics
+from src.search_engine import SearchEngine, EngineCapabilities, ENGINE_REGISTRY
+from src.web_search import WebSearch
+
+class DummyEngine(SearchEngine):
+    name = "dummy"
+    CAPABILITIES = EngineCapabilities(max_concurrency=2, qps=5, cost_per_query=0.001)
+
+    def search(self, query, max_results=4, **kwargs):
+        return [{"title": query, "href": f"https://example.com/{query}"}][:max_results]
+
+    def normalize(self, results):
+        return [{"title": r["title"], "link": r["href"], "snippet": "", "source": self.name} for r in results]
+
+def test_engines_are_created_lazily():
+    """WebSearchの生成時にはエンジンのモジュール読み込みや生成が行われないことを確認"""
+    web_search = WebSearch(default_engine="bing")
+
+    assert web_search.available_engines() == ["google", "bing", "duckduckgo"]
+    assert web_search.engines == {}
+
+def test_engine_created_on_first_use():
+    """登録したエンジンは初回の検索時に1度だけ生成されることを確認"""
+    web_search = WebSearch()
+    created = []
+
+    def factory():
+        created.append(True)
+        return DummyEngine()
+
+    web_search.register_engine("dummy", factory)
+    web_search.search("q1", engine="dummy")
+    web_search.search("q2", engine="dummy")
+    assert len(created) == 1
+    assert "dummy" not in ENGINE_REGISTRY
+
+def test_registered_engine_search_normalize_and_capabilities():
+    """登録したエンジンがWebSearchを変更せずにsearch/asearch/process_resultsで使えることを確認"""
+    web_search = WebSearch()
+    web_search.register_engine("dummy", DummyEngine)
+
+    results = web_search.search("q", engine="dummy")
+    assert web_search.process_results(results, engine="dummy")[0]["link"] == "https://example.com/q"
+    assert asyncio.run(web_search.asearch("q", engine="dummy")) == results
+    assert web_search.capabilities("dummy").max_concurrency == 2
+
+def test_unknown_engine():
+    """未登録のエンジンを指定した場合にValueErrorが発生することを確認"""
+    with pytest.raises(ValueError):
+        WebSearch().search("q", engine="unknown")
+
+def test_search_batch_resumes_from_checkpoint(tmp_path):
+    """チェックポイントを指定した場合、完了済みのクエリは再実行されないことを確認"""
+    calls = []
+
+    class CountingEngine(DummyEngine):
+        def search(self, query, max_results=4, **kwargs):
+            calls.append(query)
+            return super().search(query, max_results, **kwargs)
+
+    web_search = WebSearch()
+    web_search.register_engine("dummy", CountingEngine)
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+    batch = web_search.search_batch(["a", "b", "c"], engine="dummy", qps=0, checkpoint_path=checkpoint_path)
+    first = next(batch)
+    batch.close()
+    assert first["results"][0]["link"].startswith("https://example.com/")
+
+    calls.clear()
+    results = list(web_search.search_batch(["a", "b", "c"], engine="dummy", qps=0, checkpoint_path=checkpoint_path))
+    assert first["query"] not in calls
+    assert {r["query"] for r in results} | {first["query"]} == {"a", "b", "c"}
+
+def test_search_batch_persists_quota_and_skips_repeated_queries(tmp_path):
+    """重複したクエリは1回だけ送信し、クォータの消費量を再開時に引き継ぐことを確認"""
+    calls = []
+
+    class CountingEngine(DummyEngine):
+        def search(self, query, max_results=4, **kwargs):
+            calls.append(query)
+            return super().search(query, max_results, **kwargs)
+
+    web_search = WebSearch()
+    web_search.register_engine("dummy", CountingEngine)
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+    results = list(web_search.search_batch(["a", "b", "a"], engine="dummy", qps=0, daily_quota=3,
+                                           checkpoint_path=checkpoint_path))
+    assert sorted(r["query"] for r in results) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+    # 1日のクォータ3件のうち2件を消費済みのため、再開後は1件だけ送信する
+    results = list(web_search.search_batch(["c", "d"], engine="dummy", qps=0, daily_quota=3,
+                                           checkpoint_path=checkpoint_path))
+    assert [r["query"] for r in results] == ["c"]
+
+def test_search_batch_stops_at_daily_quota():
+    """1日あたりのクォータに達した時点で送信を停止することを確認"""
+    web_search = WebSearch()
+    web_search.register_engine("dummy", DummyEngine)
+    results = list(web_search.search_batch([f"q{i}" for i in range(5)], engine="dummy", qps=0, daily_quota=2))
+    assert len(results) == 2
+
+def test_search_batch_charges_quota_per_request():
+    """1クエリで複数のリクエストを送信するエンジンは、リクエスト数でクォータを消費することを確認"""
+    class PagedEngine(DummyEngine):
+        def request_count(self, max_results=4):
+            return 3
+
+    web_search = WebSearch()
+    web_search.register_engine("dummy", PagedEngine)
+    results = list(web_search.search_batch([f"q{i}" for i in range(5)], engine="dummy", qps=0, daily_quota=7))
+    assert len(results) == 2
+
+def test_search_and_standardize_scrapes_while_results_stream():
+    """検索結果の取得完了を待たずに、URLが届いた順にスクレイピングへ渡されることを確認"""
+    events = []
+    received = []
+    first_scraped = threading.Event()
+
+    class StreamingEngine(DummyEngine):
+        def iter_search(self, query, max_results=4, **kwargs):
+            for i in range(3):
+                if i == 2:
+                    # 最初のURLのスクレイピングが始まるまで最後の結果を返さない
+                    first_scraped.wait(timeout=1)
+                events.append(f"result{i}")
+                yield {"title": str(i), "link": f"https://example.com/{i}", "snippet": "", "source": self.name}
+
+    class RecordingScraper:
+        def scrape_multiple_urls(self, urls, **kwargs):
+            received.append(urls)
+            results = {}
+            for url in urls:
+                events.append(f"scrape {url}")
+                first_scraped.set()
+                results[url] = {"raw_html": ""}
+            return results
+
+    metrics = StageMetrics()
+    web_search = WebSearch(instrumentation=Instrumentation([metrics]))
+    web_search.register_engine("dummy", StreamingEngine)
+    web_search.scraper = RecordingScraper()
+    response = web_search.search_and_standardize("q", engine="dummy", scrape_urls=True)
+
+    assert [r["link"] for r in response["search_results"]] == [f"https://example.com/{i}" for i in range(3)]
+    assert len(response["scraped_data"]) == 3
+    assert not isinstance(received[0], list)
+    assert events.index("scrape https://example.com/0") < events.index("result2")
+    assert metrics.snapshot()["search"]["count"] == 1
+
+def test_iter_search_stops_early():
+    """iter_searchを途中で止めた場合に以降の結果を取得しないことを確認"""
+    produced = []
+
+    class SlowEngine(DummyEngine):
+        def iter_search(self, query, max_results=4, **kwargs):
+            for i in range(1000):
+                produced.append(i)
+                yield {"title": str(i), "link": "", "snippet": "", "source": self.name}
+
+    web_search = WebSearch()
+    web_search.register_engine("dummy", SlowEngine)
+    iterator = web_search.iter_search("q", engine="dummy")
+    assert next(iterator)["title"] == "0"
+    iterator.close()
+    assert len(produced) < 1000
+
+def test_aiter_search():
+    """aiter_searchが標準化された結果を返すことを確認"""
+    web_search = WebSearch()
+    web_search.register_engine("dummy", DummyEngine)
+
+    async def collect():
+        return [result async for result in web_search.aiter_search("q", engine="dummy")]
+
+    assert asyncio.run(collect())[0]["link"] == "https://example.com/q"
+
+def test_pipelined_search_and_standardize(tmp_path):
+    """pipelined=Trueでスクレイピングが完了するたびにコールバックが呼ばれ、順位順に結果が並ぶことを確認"""
+    from src.web_scraping import WebScraper
+
+    class ThreeHitEngine(DummyEngine):
+        def iter_search(self, query, max_results=4, **kwargs):
+            for i in range(3):
+                yield {"title": str(i), "link": f"https://example.com/{i}", "snippet": "", "source": self.name}
+
+    metrics = StageMetrics()
+    web_search = WebSearch(instrumentation=Instrumentation([metrics]))
+    web_search.register_engine("dummy", ThreeHitEngine)
+    web_search.scraper = WebScraper()
+    web_search.scraper.fetch_html = lambda url: f"<html><body><p>ページ {url[-1]}</p></body></html>"
+    scraped = []
+
+    response = web_search.search_and_standardize(
+        "q", engine="dummy", scrape_urls=True, pipelined=True, on_scraped=scraped.append,
+        scrape_options={"output_dir": str(tmp_path), "save_json": False}
+    )
+
+    assert len(scraped) == 3
+    assert [r["title"] for r in response["search_results"]] == ["0", "1", "2"]
+    for i in range(3):
+        assert response["scraped_data"][f"https://example.com/{i}"]["markdown_data"].strip() == f"ページ {i}"
+    assert metrics.snapshot()["search"]["count"] == 1
+
+def test_pipelined_search_and_standardize_shares_ndjson_file(tmp_path):
+    """pipelined=TrueのNDJSON形式では、並行したスクレイピングの結果が1つの圧縮ファイルに書き込まれることを確認"""
+    import gzip
+    import json
+    from src.web_scraping import WebScraper
+
+    class FiveHitEngine(DummyEngine):
+        def iter_search(self, query, max_results=4, **kwargs):
+            for i in range(5):
+                yield {"title": str(i), "link": f"https://example.com/{i}", "snippet": "", "source": self.name}
+
+    web_search = WebSearch()
+    web_search.register_engine("dummy", FiveHitEngine)
+    web_search.scraper = WebScraper(json_format="ndjson", compression="gzip")
+    web_search.scraper.fetch_html = lambda url: f"<html><body><p>ページ {url[-1]}</p></body></html>"
+
+    response = web_search.search_and_standardize(
+        "q", engine="dummy", scrape_urls=True, pipelined=True, max_results=5,
+        scrape_options={"output_dir": str(tmp_path), "save_markdown": False}
+    )
+
+    assert len({data["json_file"] for data in response["scraped_data"].values()}) == 1
+    (batch_file,) = tmp_path.iterdir()
+    with gzip.open(batch_file, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(record["url"] for record in records) == [f"https://example.com/{i}" for i in range(5)]
+
+def test_pipelined_search_and_standardize_dedup(tmp_path):
+    """dedupを指定するとスレッド間で共有したインデックスで重複したページを結果から除くことを確認"""
+    from src.web_scraping import WebScraper
+
+    class MirrorEngine(DummyEngine):
+        def iter_search(self, query, max_results=4, **kwargs):
+            for link in ("https://example.com/a", "https://mirror.example.com/a", "https://example.com/b"):
+                yield {"title": link, "link": link, "snippet": "", "source": self.name}
+
+    body = "同じ記事が複数のサイトに転載されています。" * 20
+    web_search = WebSearch()
+    web_search.register_engine("dummy", MirrorEngine)
+    web_search.scraper = WebScraper()
+    web_search.scraper.fetch_html = lambda url: f"<html><body><p>{body if '/a' in url else url}</p></body></html>"
+
+    response = web_search.search_and_standardize(
+        "q", engine="dummy", scrape_urls=True, pipelined=True, scrape_concurrency=3,
+        scrape_options={"output_dir": str(tmp_path), "save_json": False, "save_markdown": False, "dedup": True}
+    )
+
+    links = [r["link"] for r in response["search_results"]]
+    assert len(links) == 2 and "https://example.com/b" in links
+    assert set(response["scraped_data"]) == set(links)
+
+def test_search_and_standardize_drops_url_variants_before_scraping():
+    """正規化したURLが同じ検索結果は取得前に除かれることを確認"""
+    received = []
+
+    class VariantEngine(DummyEngine):
+        def iter_search(self, query, max_results=4, **kwargs):
+            for link in ("https://example.com/a", "http://www.example.com/a/?utm_source=search",
+                         "https://example.com/b"):
+                yield {"title": link, "link": link, "snippet": "", "source": self.name}
+
+    class RecordingScraper:
+        def scrape_multiple_urls(self, urls, **kwargs):
+            return {url: received.append(url) or {"raw_html": ""} for url in urls}
+
+    web_search = WebSearch()
+    web_search.register_engine("dummy", VariantEngine)
+    web_search.scraper = RecordingScraper()
+    response = web_search.search_and_standardize("q", engine="dummy", scrape_urls=True)
+
+    assert received == ["https://example.com/a", "https://example.com/b"]
+    assert [r["link"] for r in response["search_results"]] == received